@@ -0,0 +1,37 @@
+from typing import Any, Callable, Dict, Tuple
+from fastapi import Request, Response
+from app.services.snapshots import Snapshot
+from app.utils.compression import negotiate
+
+# Clients may reuse a body only after revalidating it with If-None-Match
+CACHE_CONTROL = "no-cache"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires; proxies may have weakened our tag
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def snapshot_response(request: Request, snapshot: Snapshot, render: Callable[[], Tuple[Any, Dict[str, str]]],
+                      variant: str = "") -> Response:
+    """
+    Serve one view of a snapshot with ETag revalidation: 304 when the client
+    already holds it, otherwise the cached body in the best content coding
+    the client accepts. Each coding has its own ETag, and every response,
+    304s included, varies on Accept-Encoding.
+    """
+    encoding = snapshot.coding(variant, negotiate(request.headers.get("accept-encoding")), render)
+    etag = snapshot.etag(variant, encoding)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    body, encoding, extra = snapshot.body(variant, encoding, render)
+    headers.update(extra)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
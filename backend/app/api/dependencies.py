@@ -0,0 +1,40 @@
+import secrets
+from fastapi import Header, HTTPException, Request
+from app.services.container import ServiceContainer
+from app.services.nse_scraper import NSEScraper
+from app.services.options_analyzer import OptionsAnalyzer
+from app.services.ml_predictor import MLPredictor
+from app.services.portfolio import PortfolioRiskEngine
+from app.services.snapshots import SnapshotService
+from app.utils.config import ADMIN_TOKEN
+
+
+def get_container(request: Request) -> ServiceContainer:
+    return request.app.state.container
+
+
+def get_nse_scraper(request: Request) -> NSEScraper:
+    return get_container(request).nse_scraper
+
+
+def get_options_analyzer(request: Request) -> OptionsAnalyzer:
+    return get_container(request).options_analyzer
+
+
+def get_ml_predictor(request: Request) -> MLPredictor:
+    return get_container(request).ml_predictor
+
+
+def get_portfolio(request: Request) -> PortfolioRiskEngine:
+    return get_container(request).portfolio
+
+
+def get_snapshots(request: Request) -> SnapshotService:
+    return get_container(request).snapshots
+
+
+def require_admin(x_admin_token: str = Header("")):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: set ADMIN_TOKEN")
+    if not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
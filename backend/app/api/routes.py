@@ -1,56 +1,117 @@
-from fastapi import APIRouter, Query, Body
-from app.services.nse_scraper import NSEScraper
-from app.services.options_analyzer import OptionsAnalyzer
+from fastapi import APIRouter, Query, Body, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import List, Optional
+from datetime import datetime
+import asyncio
 from app.services.ml_predictor import MLPredictor
-from app.models.option_chain import OptionChain
-from app.models.strategies import OptionStrategy
-from app.models.market_data import MarketData
-import random
+from app.services.options_analyzer import OptionsAnalyzer
+from app.services.strategy_index import SORT_KEYS
+from app.services.export import ARROW_STREAM_MEDIA_TYPE, TABLES, stream_ipc
+from app.services.portfolio import PortfolioRiskEngine
+from app.services.snapshots import SnapshotService, UnknownChain
+from app.models.portfolio import Position
+from app.api.dependencies import get_ml_predictor, get_portfolio, get_snapshots, require_admin
+from app.api.conditional import snapshot_response
+from app.utils.profiler import MAX_PROFILE_SECONDS, PROFILER, ProfilerBusy, collapsed
 
 router = APIRouter()
 
-# Initialize service classes
-nse_scraper = NSEScraper()
-options_analyzer = OptionsAnalyzer()
-ml_predictor = MLPredictor()
-
 @router.get("/option-chain")
-async def get_option_chain(symbol: str = Query("NIFTY"), expiry: str = Query("")):
+async def get_option_chain(request: Request, symbol: str = Query("NIFTY"), expiry: str = Query(""),
+                           snapshots: SnapshotService = Depends(get_snapshots)):
     """Get real-time option chain data from NSE"""
+    print(f"Fetching real-time data for {symbol}...")
     try:
-        print(f"Fetching real-time data for {symbol}...")
-        data = await nse_scraper.get_option_chain(symbol, expiry)
-        print(f"Successfully fetched data for {symbol}: {data.get('underlying_value', 'N/A')}")
-        return data
-    except Exception as e:
-        print(f"Error fetching data for {symbol}: {e}")
-        # The NSE scraper now has built-in fallback data generation
-        # This should rarely be reached as the scraper handles fallbacks internally
-        return await nse_scraper.get_option_chain(symbol, expiry)
+        snapshot = await snapshots.get(symbol, expiry)
+    except UnknownChain as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    print(f"Successfully fetched data for {symbol}: {snapshot.chain.get('underlying_value', 'N/A')}")
+    return snapshot_response(request, snapshot, lambda: (snapshot.chain, {}), variant="option-chain")
 
 @router.get("/strategies")
-async def get_strategies(symbol: str = Query("NIFTY"), expiry: str = Query("")):
-    """Get real-time strategy analysis"""
+async def get_strategies(request: Request, symbol: str = Query("NIFTY"), expiry: str = Query(""),
+                         min_pop: Optional[float] = Query(OptionsAnalyzer.MIN_PROBABILITY_OF_PROFIT),
+                         max_pop: Optional[float] = Query(None),
+                         min_profit: Optional[float] = Query(OptionsAnalyzer.MIN_PROFIT_PERCENTAGE),
+                         max_profit: Optional[float] = Query(None),
+                         min_strike_distance: Optional[float] = Query(None),
+                         max_strike_distance: Optional[float] = Query(None),
+                         min_dte: Optional[int] = Query(None), max_dte: Optional[int] = Query(None),
+                         sort: str = Query("probability_of_profit"), order: str = Query("desc"),
+                         limit: Optional[int] = Query(None, ge=1), page: int = Query(1, ge=1),
+                         cursor: Optional[str] = Query(None),
+                         snapshots: SnapshotService = Depends(get_snapshots)):
+    """
+    Get real-time strategy analysis, filtered, sorted and paged server-side.
+    Without parameters this is the high-probability list (profit >= 0.5%, POP >= 85%)
+    sorted by POP. X-Total-Count carries the match count and, when a limit is
+    set, X-Next-Cursor the cursor for the following page. A cursor only pages
+    through the snapshot it came from; once that is replaced it gets a 409.
+    """
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_KEYS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    if cursor:
+        try:
+            cursor_snapshot, offset = _parse_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        cursor_snapshot, offset = None, (page - 1) * (limit or 0)
+    ranges = {
+        'probability_of_profit': (min_pop, max_pop),
+        'profit_percentage': (min_profit, max_profit),
+        'strike_distance': (min_strike_distance, max_strike_distance),
+        'days_to_expiry': (min_dte, max_dte),
+    }
     try:
         print(f"Analyzing strategies for {symbol}...")
-        option_chain = await nse_scraper.get_option_chain(symbol, expiry)
-        analysis = options_analyzer.analyze_option_chain(option_chain)
-        strategies = analysis.get('high_probability_strategies', [])
-        print(f"Found {len(strategies)} high-probability strategies for {symbol}")
-        return strategies
+        snapshot = await snapshots.get(symbol, expiry)
+    except UnknownChain as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         print(f"Error analyzing strategies for {symbol}: {e}")
         # Return empty array if analysis fails
         return []
+    if cursor_snapshot is not None and cursor_snapshot != _snapshot_id(snapshot):
+        raise HTTPException(status_code=409, detail="Cursor is from an older snapshot; start again from the first page")
+    try:
+        def render():
+            total, strategies = snapshot.strategy_index.query(ranges, sort, order == "desc", offset, limit)
+            headers = {"X-Total-Count": str(total)}
+            if limit is not None and offset + limit < total:
+                headers["X-Next-Cursor"] = f"{_snapshot_id(snapshot)}.{offset + limit}"
+            print(f"Found {total} high-probability strategies for {symbol}")
+            return strategies, headers
+
+        variant = f"strategies|{sorted(ranges.items())}|{sort}|{order}|{offset}|{limit}"
+        return snapshot_response(request, snapshot, render, variant)
+    except Exception as e:
+        print(f"Error analyzing strategies for {symbol}: {e}")
+        # Return empty array if analysis fails
+        return []
+
+def _snapshot_id(snapshot) -> str:
+    return f"{snapshot.version:x}-{int(snapshot.created_at * 1e6):x}"
+
+def _parse_cursor(cursor: str):
+    """Cursor -> (snapshot id, offset); raises ValueError when malformed"""
+    snapshot_id, _, offset = cursor.rpartition(".")
+    if not snapshot_id or int(offset) < 0:
+        raise ValueError(cursor)
+    return snapshot_id, int(offset)
 
 @router.get("/market-data")
-async def market_data(symbol: str = Query("NIFTY")):
+async def market_data(request: Request, symbol: str = Query("NIFTY"), snapshots: SnapshotService = Depends(get_snapshots)):
     """Get real-time market indicators"""
     try:
         print(f"Fetching market data for {symbol}...")
-        data = await nse_scraper.get_market_indicators()
+        snapshot = await snapshots.get(symbol)
         print(f"Market data fetched for {symbol}")
-        return data
+        return snapshot_response(request, snapshot, lambda: (snapshot.market_data, {}), variant="market-data")
+    except UnknownChain as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         print(f"Error fetching market data for {symbol}: {e}")
         # Return basic market data
@@ -63,6 +124,109 @@ async def market_data(symbol: str = Query("NIFTY")):
             "timestamp": "2024-12-15T12:18:11.909240"
         }
 
+@router.get("/pipeline/metrics")
+async def pipeline_metrics(snapshots: SnapshotService = Depends(get_snapshots)):
+    """Per-stage throughput, queue depth and drops of this worker's refresh pipeline"""
+    return snapshots.metrics()
+
+@router.get("/export/{table}")
+async def export_snapshots(table: str, symbols: str = Query(""), start: Optional[datetime] = Query(None),
+                           end: Optional[datetime] = Query(None), snapshots: SnapshotService = Depends(get_snapshots)):
+    """
+    Stream retained snapshots of `table` (chain, greeks or strategies) as Arrow
+    IPC record batches, one per snapshot, filtered by comma-separated symbols
+    and an inclusive time range. `start`/`end` without a UTC offset are IST.
+    An empty range is a valid stream with the table's schema and no batches.
+    """
+    if table not in TABLES:
+        raise HTTPException(status_code=404, detail=f"table must be one of: {', '.join(TABLES)}")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Arrow export requires the 'pyarrow' package")
+    history = await snapshots.history([s for s in symbols.split(",") if s], start, end)
+    return StreamingResponse(stream_ipc(history, table), media_type=ARROW_STREAM_MEDIA_TYPE,
+                             headers={"X-Snapshot-Count": str(len(history))})
+
+@router.get("/admin/profile", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def profile(seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS),
+                  interval_ms: float = Query(5.0, ge=1, le=1000), idle: bool = Query(False)):
+    """
+    Sample every thread of this worker for `seconds` and return collapsed
+    stacks (flamegraph.pl / speedscope input). Threads blocked waiting for
+    work are left out unless `idle` is set.
+    """
+    try:
+        PROFILER.start(interval_ms / 1000, include_idle=idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        counts = PROFILER.stop()
+    return PlainTextResponse(collapsed(counts), headers={"X-Profile-Samples": str(sum(counts.values()))})
+
+@router.get("/admin/traces", dependencies=[Depends(require_admin)])
+async def slow_request_traces():
+    """Trace capture status and the most recent slow-request traces, newest first"""
+    return {**PROFILER.status(), "requests": list(reversed(PROFILER.traces))}
+
+@router.post("/admin/traces", dependencies=[Depends(require_admin)])
+async def arm_slow_request_traces(threshold_ms: float = Query(250.0, gt=0),
+                                  seconds: float = Query(300.0, gt=0, le=86400)):
+    """Keep stack samples for requests slower than `threshold_ms` for the next `seconds`"""
+    PROFILER.arm_traces(threshold_ms / 1000, seconds)
+    return PROFILER.status()
+
+@router.delete("/admin/traces", dependencies=[Depends(require_admin)])
+async def disarm_slow_request_traces():
+    PROFILER.disarm_traces()
+    return PROFILER.status()
+
 @router.post("/predict-probability")
-async def predict_prob(features: dict = Body(...)):
-    return {"probability": ml_predictor.predict_probability(features)} 
\ No newline at end of file
+async def predict_prob(features: dict = Body(...), ml_predictor: MLPredictor = Depends(get_ml_predictor)):
+    return {"probability": ml_predictor.predict_probability(features)} 
+
+@router.get("/positions")
+async def list_positions(portfolio: PortfolioRiskEngine = Depends(get_portfolio)):
+    return list(portfolio.positions.values())
+
+@router.post("/positions")
+async def add_position(position: Position = Body(...), portfolio: PortfolioRiskEngine = Depends(get_portfolio)):
+    try:
+        return portfolio.add_position(position)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/positions/{position_id}")
+async def remove_position(position_id: str, portfolio: PortfolioRiskEngine = Depends(get_portfolio)):
+    if not portfolio.remove_position(position_id):
+        raise HTTPException(status_code=404, detail=f"Unknown position {position_id}")
+    return {"removed": position_id}
+
+async def _position_chains(portfolio: PortfolioRiskEngine, snapshots: SnapshotService) -> dict:
+    """Latest chain per (symbol, expiry) in the book, from the shared snapshots"""
+    keys = portfolio.chain_keys()
+    found = await asyncio.gather(*(snapshots.get(symbol, expiry) for symbol, expiry in keys))
+    return {key: snapshot.chain for key, snapshot in zip(keys, found)}
+
+@router.get("/positions/greeks")
+async def position_greeks(portfolio: PortfolioRiskEngine = Depends(get_portfolio),
+                          snapshots: SnapshotService = Depends(get_snapshots)):
+    """Net Greeks across every open leg"""
+    try:
+        return portfolio.greeks(await _position_chains(portfolio, snapshots))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/positions/risk-grid")
+async def position_risk_grid(spot_shocks: Optional[List[float]] = Query(None),
+                             vol_shocks: Optional[List[float]] = Query(None),
+                             days_forward: Optional[List[float]] = Query(None),
+                             portfolio: PortfolioRiskEngine = Depends(get_portfolio),
+                             snapshots: SnapshotService = Depends(get_snapshots)):
+    """Book P&L over spot shock x vol shock x days forward"""
+    try:
+        return portfolio.scenario_grid(await _position_chains(portfolio, snapshots), spot_shocks, vol_shocks, days_forward)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
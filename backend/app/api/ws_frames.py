@@ -0,0 +1,148 @@
+"""
+WebSocket frame encodings for the real-time stream.
+
+`json` (default) sends text frames shaped exactly as before. `msgpack` sends
+binary MessagePack frames in which the per-strike chain and option-analysis
+fields are packed columns instead of lists of objects:
+
+    {"dtype": "<f4" | "<i4" | "|u1", "data": <bin, little-endian>}
+
+e.g. `new Float32Array(col.data.slice().buffer)` in a browser (the copy
+realigns the bytes). Missing legs are NaN in float columns and flagged by the
+`call_present` / `put_present` columns. Everything else stays plain
+MessagePack. Clients pick an encoding with `?encoding=msgpack` or the
+`msgpack` WebSocket subprotocol; asking for msgpack on a server without it
+installed fails the handshake rather than silently sending JSON.
+
+Either way the snapshot part of a frame is encoded once per snapshot and
+format; only `timestamp` (when the frame was sent) is encoded per send.
+`snapshot_created_at` is when the snapshot was built, so delivery lag is
+`now - snapshot_created_at`; both are ISO 8601 with a UTC offset.
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+from fastapi import WebSocket
+from app.services.snapshots import Snapshot, _json_default
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+COLUMNAR_FORMAT = "msgpack-columnar/1"
+
+CHAIN_FLOAT_FIELDS = ('last_price', 'bid', 'ask', 'iv', 'delta', 'gamma', 'theta', 'vega')
+CHAIN_INT_FIELDS = ('volume', 'open_interest')
+GREEK_FIELDS = ('delta', 'gamma', 'theta', 'vega', 'rho')
+
+
+class UnsupportedEncoding(ValueError):
+    """The client asked for a frame encoding this server cannot produce"""
+
+
+def negotiate(websocket: WebSocket) -> Tuple[str, Optional[str]]:
+    """
+    (encoding, subprotocol to accept with) from the query string or offered
+    subprotocols; raises UnsupportedEncoding for an unknown encoding or for
+    msgpack when the package is not installed
+    """
+    offered = [p.strip() for p in websocket.headers.get("sec-websocket-protocol", "").split(",") if p.strip()]
+    requested = websocket.query_params.get("encoding", "").lower() or (MSGPACK if MSGPACK in offered else JSON)
+    if requested not in (JSON, MSGPACK):
+        raise UnsupportedEncoding(f"Unknown encoding {requested!r}: expected json or msgpack")
+    if requested == MSGPACK and msgpack is None:
+        raise UnsupportedEncoding("msgpack frames need the 'msgpack' package on the server")
+    subprotocol = requested if requested in offered else None
+    return requested, subprotocol
+
+
+def snapshot_frame(snapshot: Snapshot, encoding: str) -> Union[str, bytes]:
+    """Real-time update for `snapshot` in `encoding`, stamped with the current time"""
+    timestamp = datetime.now(timezone.utc).isoformat()
+    if encoding == MSGPACK:
+        count, entries = snapshot.frame(MSGPACK, lambda: _msgpack_entries(snapshot))
+        return _map_header(count + 1) + msgpack.packb("timestamp") + msgpack.packb(timestamp) + entries
+    rest = snapshot.frame(JSON, lambda: json.dumps(_message(snapshot), default=_json_default)[1:])
+    return '{"timestamp": ' + json.dumps(timestamp) + (', ' + rest if rest != '}' else '}')
+
+
+def message_frame(message: Dict[str, Any], encoding: str) -> Union[str, bytes]:
+    """Uncached frame for one-off messages such as errors"""
+    if encoding == MSGPACK:
+        return msgpack.packb(message, default=_json_default)
+    return json.dumps(message, default=_json_default)
+
+
+def _message(snapshot: Snapshot) -> Dict[str, Any]:
+    return {
+        "snapshot_created_at": datetime.fromtimestamp(snapshot.created_at, timezone.utc).isoformat(),
+        "option_chain": snapshot.chain,
+        "analysis": snapshot.analysis,
+        "predictions": snapshot.predictions,
+        "indicators": snapshot.market_data,
+        "status": "success",
+    }
+
+
+def _msgpack_entries(snapshot: Snapshot) -> Tuple[int, bytes]:
+    chain = {key: value for key, value in snapshot.chain.items() if key != 'options'}
+    chain['columns'] = _chain_columns(snapshot.chain.get('options', []))
+    analysis = dict(snapshot.analysis)
+    legs = analysis.get('option_analysis', {})
+    analysis['option_analysis'] = {side: _analysis_columns(legs.get(side, [])) for side in ('calls', 'puts')}
+    message = dict(_message(snapshot), option_chain=chain, analysis=analysis, format=COLUMNAR_FORMAT)
+    entries = b"".join(
+        msgpack.packb(key) + msgpack.packb(value, default=_json_default) for key, value in message.items()
+    )
+    return len(message), entries
+
+
+def _chain_columns(options: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    missing = {}
+    fields = CHAIN_FLOAT_FIELDS + CHAIN_INT_FIELDS
+    rows = np.array([
+        (opt['strike_price'],)
+        + tuple(float(bool(opt.get(side))) for side in ('call', 'put'))
+        + tuple((opt.get(side) or missing).get(field, np.nan) for side in ('call', 'put') for field in fields)
+        for opt in options
+    ], dtype=float).reshape(-1, 3 + 2 * len(fields))
+    columns = {
+        'strike': _packed(rows[:, 0], '<f4'),
+        'call_present': _packed(rows[:, 1], '|u1'),
+        'put_present': _packed(rows[:, 2], '|u1'),
+    }
+    for i, (side, field) in enumerate((side, field) for side in ('call', 'put') for field in fields):
+        columns[f'{side}_{field}'] = _packed(rows[:, 3 + i], '<i4' if field in CHAIN_INT_FIELDS else '<f4')
+    return columns
+
+
+def _analysis_columns(entries: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    rows = np.array([
+        (entry['strike'], entry['price'], entry['iv'] or np.nan, entry['volume'], entry['open_interest'])
+        + tuple(entry['greeks'].get(greek, np.nan) for greek in GREEK_FIELDS)
+        for entry in entries
+    ], dtype=float).reshape(-1, 5 + len(GREEK_FIELDS))
+    names = ('strike', 'price', 'iv', 'volume', 'open_interest') + GREEK_FIELDS
+    return {
+        name: _packed(rows[:, i], '<i4' if name in CHAIN_INT_FIELDS else '<f4')
+        for i, name in enumerate(names)
+    }
+
+
+def _packed(values: np.ndarray, dtype: str) -> Dict[str, Any]:
+    if dtype != '<f4':
+        # Integer columns have no NaN; a missing leg counts as zero
+        values = np.nan_to_num(values)
+    return {'dtype': dtype, 'data': values.astype(dtype).tobytes()}
+
+
+def _map_header(size: int) -> bytes:
+    if size < 16:
+        return bytes([0x80 | size])
+    if size < 1 << 16:
+        return b'\xde' + size.to_bytes(2, 'big')
+    return b'\xdf' + size.to_bytes(4, 'big')
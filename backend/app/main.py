@@ -1,21 +1,36 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import uvicorn
+from contextlib import asynccontextmanager
 import asyncio
 import json
+import time
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Union
 
 from .api.routes import router
-from .services.options_analyzer import OptionsAnalyzer
-from .services.ml_predictor import MLPredictor
-from .services.nse_scraper import NSEScraper
+from .api import ws_frames
+from .services.container import ServiceContainer
+from .utils.config import SLOW_REQUEST_TRACE_MS
+from .utils.profiler import PROFILER, SlowRequestTraceMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are built lazily by the container, and the snapshot refresher
+    # starts with the first request that reads a snapshot
+    started = time.perf_counter()
+    container = ServiceContainer()
+    app.state.container = container
+    if SLOW_REQUEST_TRACE_MS > 0:
+        PROFILER.arm_traces(SLOW_REQUEST_TRACE_MS / 1000)
+    app.state.startup_ms = round((time.perf_counter() - started) * 1000, 2)
+    yield
+    await container.shutdown()
 
 app = FastAPI(
     title="Options Trading Dashboard API",
     description="Advanced options trading analysis with AI-powered insights",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -25,20 +40,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "ETag", "X-Profile-Samples"],
 )
-
-# Initialize services
-options_analyzer = OptionsAnalyzer()
-ml_predictor = MLPredictor()
-nse_scraper = NSEScraper()
+# Times requests only while slow-request trace capture is armed
+app.add_middleware(SlowRequestTraceMiddleware)
 
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, subprotocol: Optional[str] = None):
+        await websocket.accept(subprotocol=subprotocol)
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
@@ -60,7 +73,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "startup_ms": getattr(app.state, "startup_ms", None)
+    }
 
 # Include API routes under /api/v1
 app.include_router(router, prefix="/api/v1")
@@ -68,41 +85,40 @@ app.include_router(router, prefix="/api/v1")
 # WebSocket endpoint for real-time updates
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    # JSON text frames unless the client asks for msgpack (?encoding=msgpack or subprotocol)
+    try:
+        encoding, subprotocol = ws_frames.negotiate(websocket)
+    except ws_frames.UnsupportedEncoding as e:
+        # Closing before accept rejects the handshake (HTTP 403)
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=str(e))
+        return
+    await manager.connect(websocket, subprotocol)
     try:
         while True:
             # Send real-time market data every 5 seconds
-            market_data = await get_real_time_data()
-            await websocket.send_text(json.dumps(market_data))
+            frame = await get_real_time_data(websocket.app.state.container, encoding)
+            if isinstance(frame, bytes):
+                await websocket.send_bytes(frame)
+            else:
+                await websocket.send_text(frame)
             await asyncio.sleep(5)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
-async def get_real_time_data():
-    """Get real-time market data and analysis"""
+async def get_real_time_data(container: ServiceContainer, encoding: str = ws_frames.JSON) -> Union[str, bytes]:
+    """Get real-time market data and analysis as an encoded frame"""
     try:
-        # Scrape NSE data
-        nifty_data = await nse_scraper.get_option_chain("NIFTY")
-        # Analyze options
-        analysis = options_analyzer.analyze_option_chain(nifty_data)
-        # Get ML predictions
-        predictions = ml_predictor.predict_probabilities(analysis['strategies'])
-        # Market indicators
-        indicators = await nse_scraper.get_market_indicators()
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "option_chain": nifty_data,
-            "analysis": analysis,
-            "predictions": predictions,
-            "indicators": indicators,
-            "status": "success"
-        }
+        # Shared NIFTY snapshot, already analyzed and scored by the pipeline;
+        # its frame is encoded once per format and reused by every connection
+        snapshot = await container.snapshots.get("NIFTY")
+        return ws_frames.snapshot_frame(snapshot, encoding)
     except Exception as e:
-        return {
+        return ws_frames.message_frame({
             "timestamp": datetime.now().isoformat(),
             "error": str(e),
             "status": "error"
-        }
+        }, encoding)
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -1,9 +1,12 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class MarketData(BaseModel):
-    vix: float
+    vix: Optional[float] = None
     pcr: float
+    pcr_volume: float = 1.0
     max_pain: float
     open_interest: float
+    oi_change: float = 0
     rsi: float
-    timestamp: str 
\ No newline at end of file
+    timestamp: str 
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class PositionLeg(BaseModel):
+    symbol: str
+    expiry: str  # YYYY-MM-DD
+    strike: float
+    type: str  # 'CE' or 'PE'
+    action: str  # 'BUY' or 'SELL'
+    quantity: int  # units, i.e. lots x lot size
+    premium: float = 0.0  # entry price per unit
+    iv: Optional[float] = None  # override for the market-implied volatility
+
+class Position(BaseModel):
+    id: Optional[str] = None
+    name: str = ""
+    legs: List[PositionLeg]
@@ -1,8 +1,24 @@
 import numpy as np
-from scipy.stats import norm
-from typing import Optional
+from typing import Optional, Dict
 import math
 
+SQRT_2PI = math.sqrt(2 * math.pi)
+_ndtr = None
+
+
+def norm_cdf(x):
+    """Standard normal CDF; scipy is imported on first use to keep app startup fast"""
+    global _ndtr
+    if _ndtr is None:
+        from scipy.special import ndtr
+        _ndtr = ndtr
+    return _ndtr(x)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / SQRT_2PI
+
+
 class BlackScholesCalculator:
     """
     Advanced Black-Scholes calculator for options pricing and Greeks
@@ -15,7 +31,7 @@ class BlackScholesCalculator:
             return max(S - K, 0)
         d1 = self._d1(S, K, T, r, sigma)
         d2 = self._d2(d1, sigma, T)
-        call_price = S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
+        call_price = S * norm_cdf(d1) - K * np.exp(-r * T) * norm_cdf(d2)
         return max(call_price, 0)
 
     def put_price(self, S: float, K: float, T: float, r: float, sigma: float) -> float:
@@ -23,7 +39,7 @@ class BlackScholesCalculator:
             return max(K - S, 0)
         d1 = self._d1(S, K, T, r, sigma)
         d2 = self._d2(d1, sigma, T)
-        put_price = K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+        put_price = K * np.exp(-r * T) * norm_cdf(-d2) - S * norm_cdf(-d1)
         return max(put_price, 0)
 
     def calculate_greeks(self, S: float, K: float, T: float, r: float, sigma: float, option_type: str = 'call') -> dict:
@@ -34,29 +50,29 @@ class BlackScholesCalculator:
         greeks = {}
         # Delta
         if option_type.lower() == 'call':
-            greeks['delta'] = norm.cdf(d1)
+            greeks['delta'] = norm_cdf(d1)
         else:
-            greeks['delta'] = norm.cdf(d1) - 1
+            greeks['delta'] = norm_cdf(d1) - 1
         # Gamma
-        greeks['gamma'] = norm.pdf(d1) / (S * sigma * np.sqrt(T))
+        greeks['gamma'] = norm_pdf(d1) / (S * sigma * np.sqrt(T))
         # Theta
         if option_type.lower() == 'call':
             greeks['theta'] = (
-                -(S * norm.pdf(d1) * sigma) / (2 * np.sqrt(T))
-                - r * K * np.exp(-r * T) * norm.cdf(d2)
+                -(S * norm_pdf(d1) * sigma) / (2 * np.sqrt(T))
+                - r * K * np.exp(-r * T) * norm_cdf(d2)
             ) / 365
         else:
             greeks['theta'] = (
-                -(S * norm.pdf(d1) * sigma) / (2 * np.sqrt(T))
-                + r * K * np.exp(-r * T) * norm.cdf(-d2)
+                -(S * norm_pdf(d1) * sigma) / (2 * np.sqrt(T))
+                + r * K * np.exp(-r * T) * norm_cdf(-d2)
             ) / 365
         # Vega
-        greeks['vega'] = S * norm.pdf(d1) * np.sqrt(T) / 100
+        greeks['vega'] = S * norm_pdf(d1) * np.sqrt(T) / 100
         # Rho
         if option_type.lower() == 'call':
-            greeks['rho'] = K * T * np.exp(-r * T) * norm.cdf(d2) / 100
+            greeks['rho'] = K * T * np.exp(-r * T) * norm_cdf(d2) / 100
         else:
-            greeks['rho'] = -K * T * np.exp(-r * T) * norm.cdf(-d2) / 100
+            greeks['rho'] = -K * T * np.exp(-r * T) * norm_cdf(-d2) / 100
         return greeks
 
     def implied_volatility(self, market_price: float, S: float, K: float, T: float, r: float, option_type: str = 'call', max_iterations: int = 100, tolerance: float = 1e-6) -> Optional[float]:
@@ -78,6 +94,86 @@ class BlackScholesCalculator:
             sigma = max(0.001, min(5.0, sigma))
         return sigma if sigma > 0.001 else None
 
+    def price_vectorized(self, S, K, T, r: float, sigma, is_call) -> np.ndarray:
+        """
+        Black-Scholes prices over broadcastable arrays in a single pass.
+        `is_call` is a boolean array (or scalar); expired contracts price at intrinsic.
+        """
+        S, K, T, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, sigma)))
+        is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), S.shape)
+        live = T > 0
+        safe_T = np.where(live, T, 1.0)
+        d1, d2 = self._d1_d2_vectorized(S, K, safe_T, r, sigma)
+        discount = np.exp(-r * safe_T)
+        call = S * norm_cdf(d1) - K * discount * norm_cdf(d2)
+        put = K * discount * norm_cdf(-d2) - S * norm_cdf(-d1)
+        price = np.where(is_call, call, put)
+        intrinsic = np.where(is_call, S - K, K - S)
+        return np.maximum(np.where(live, price, intrinsic), 0.0)
+
+    def greeks_vectorized(self, S, K, T, r: float, sigma, is_call) -> Dict[str, np.ndarray]:
+        """
+        Vectorized counterpart of calculate_greeks with the same units
+        (theta per day, vega and rho per 1% move). Expired contracts get zero Greeks.
+        """
+        S, K, T, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, sigma)))
+        is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), S.shape)
+        live = T > 0
+        safe_T = np.where(live, T, 1.0)
+        sqrt_T = np.sqrt(safe_T)
+        d1, d2 = self._d1_d2_vectorized(S, K, safe_T, r, sigma)
+        pdf_d1 = norm_pdf(d1)
+        discount = np.exp(-r * safe_T)
+        cdf_d2_signed = np.where(is_call, norm_cdf(d2), norm_cdf(-d2))
+        delta = np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1)
+        gamma = pdf_d1 / (S * sigma * sqrt_T)
+        theta = (
+            -(S * pdf_d1 * sigma) / (2 * sqrt_T)
+            + np.where(is_call, -1.0, 1.0) * r * K * discount * cdf_d2_signed
+        ) / 365
+        vega = S * pdf_d1 * sqrt_T / 100
+        rho = np.where(is_call, 1.0, -1.0) * K * safe_T * discount * cdf_d2_signed / 100
+        return {
+            name: np.where(live, values, 0.0)
+            for name, values in (
+                ('delta', delta), ('gamma', gamma), ('theta', theta), ('vega', vega), ('rho', rho)
+            )
+        }
+
+    def implied_volatility_vectorized(self, market_price, S, K, T, r: float, is_call,
+                                      max_iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+        """
+        Newton-Raphson IV solve over whole arrays at once. Contracts that are
+        expired, priced below intrinsic or fail to converge come back as NaN.
+        """
+        market_price, S, K, T = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (market_price, S, K, T)))
+        is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), S.shape)
+        sigma = np.full(S.shape, 0.2)
+        active = T > 0
+        converged = np.zeros(S.shape, dtype=bool)
+        for _ in range(max_iterations):
+            if not active.any():
+                break
+            idx = np.flatnonzero(active)
+            price = self.price_vectorized(S.flat[idx], K.flat[idx], T.flat[idx], r, sigma.flat[idx], is_call.flat[idx])
+            diff = market_price.flat[idx] - price
+            done = np.abs(diff) < tolerance
+            converged.flat[idx[done]] = True
+            active.flat[idx[done]] = False
+            idx, diff = idx[~done], diff[~done]
+            d1, _ = self._d1_d2_vectorized(S.flat[idx], K.flat[idx], T.flat[idx], r, sigma.flat[idx])
+            vega = S.flat[idx] * norm_pdf(d1) * np.sqrt(T.flat[idx])
+            stalled = vega < 1e-12
+            active.flat[idx[stalled]] = False
+            idx, diff, vega = idx[~stalled], diff[~stalled], vega[~stalled]
+            sigma.flat[idx] = np.clip(sigma.flat[idx] + diff / vega, 0.001, 5.0)
+        return np.where(converged & (sigma > 0.001), sigma, np.nan)
+
+    def _d1_d2_vectorized(self, S: np.ndarray, K: np.ndarray, T: np.ndarray, r: float, sigma: np.ndarray):
+        sigma_sqrt_T = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / sigma_sqrt_T
+        return d1, d1 - sigma_sqrt_T
+
     def _d1(self, S: float, K: float, T: float, r: float, sigma: float) -> float:
         return (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
 
@@ -0,0 +1,86 @@
+import threading
+from ..utils.config import (
+    INCREMENTAL_ANALYSIS, SNAPSHOT_BACKEND, SNAPSHOT_DIR, REDIS_URL,
+    SNAPSHOT_REFRESH_SECONDS, SNAPSHOT_MAX_AGE_SECONDS, SNAPSHOT_OFF_HOURS_REFRESH_SECONDS,
+    SNAPSHOT_MAX_REFRESH_SECONDS, PIPELINE_QUEUE_SIZE, PIPELINE_FETCH_CONCURRENCY, PIPELINE_ANALYZE_CONCURRENCY,
+    PIPELINE_QUEUE_SIZES, PIPELINE_QUEUE_POLICIES, SNAPSHOT_HISTORY
+)
+from .nse_scraper import NSEScraper
+from .options_analyzer import OptionsAnalyzer
+from .incremental_analyzer import IncrementalOptionsAnalyzer
+from .ml_predictor import MLPredictor
+from .portfolio import PortfolioRiskEngine
+from .snapshot_store import create_snapshot_store
+from .snapshots import SnapshotService
+
+
+class ServiceContainer:
+    """
+    Owns the app's long-lived services. Each one is built on first use and then
+    shared by the REST routes and the WebSocket stream; nothing is built, and
+    no network or refresh work starts, until a request needs it.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._nse_scraper = None
+        self._options_analyzer = None
+        self._ml_predictor = None
+        self._portfolio = None
+        self._snapshots = None
+
+    @property
+    def nse_scraper(self) -> NSEScraper:
+        if self._nse_scraper is None:
+            with self._lock:
+                if self._nse_scraper is None:
+                    self._nse_scraper = NSEScraper()
+        return self._nse_scraper
+
+    @property
+    def options_analyzer(self) -> OptionsAnalyzer:
+        if self._options_analyzer is None:
+            with self._lock:
+                if self._options_analyzer is None:
+                    self._options_analyzer = IncrementalOptionsAnalyzer() if INCREMENTAL_ANALYSIS else OptionsAnalyzer()
+        return self._options_analyzer
+
+    @property
+    def ml_predictor(self) -> MLPredictor:
+        if self._ml_predictor is None:
+            with self._lock:
+                if self._ml_predictor is None:
+                    self._ml_predictor = MLPredictor()
+        return self._ml_predictor
+
+    @property
+    def portfolio(self) -> PortfolioRiskEngine:
+        if self._portfolio is None:
+            with self._lock:
+                if self._portfolio is None:
+                    self._portfolio = PortfolioRiskEngine(self.options_analyzer)
+        return self._portfolio
+
+    @property
+    def snapshots(self) -> SnapshotService:
+        if self._snapshots is None:
+            with self._lock:
+                if self._snapshots is None:
+                    self._snapshots = SnapshotService(
+                        create_snapshot_store(SNAPSHOT_BACKEND, SNAPSHOT_DIR, REDIS_URL),
+                        self.nse_scraper, self.options_analyzer, self.ml_predictor,
+                        refresh_interval=SNAPSHOT_REFRESH_SECONDS, max_age=SNAPSHOT_MAX_AGE_SECONDS,
+                        off_hours_interval=SNAPSHOT_OFF_HOURS_REFRESH_SECONDS,
+                        max_interval=SNAPSHOT_MAX_REFRESH_SECONDS, queue_size=PIPELINE_QUEUE_SIZE,
+                        fetch_concurrency=PIPELINE_FETCH_CONCURRENCY, analyze_concurrency=PIPELINE_ANALYZE_CONCURRENCY,
+                        history_size=SNAPSHOT_HISTORY, queue_sizes=PIPELINE_QUEUE_SIZES,
+                        queue_policies=PIPELINE_QUEUE_POLICIES
+                    )
+        return self._snapshots
+
+    async def shutdown(self):
+        """Stop and close whatever was built; services never used are left alone"""
+        if self._snapshots is not None:
+            await self._snapshots.stop()
+            self._snapshots.store.close()
+        if self._nse_scraper is not None:
+            self._nse_scraper.close()
@@ -0,0 +1,207 @@
+"""
+Columnar export of chain snapshots, per-strike Greeks/IV and strategy sets.
+
+Each snapshot is flattened into NumPy columns once, when this worker first
+sees it; the export endpoints then wrap those arrays as Arrow record batches
+without copying or touching individual rows. pyarrow is optional and only
+needed to export.
+
+    # pull strategy snapshots from a running server into partitioned Parquet
+    python -m app.services.export --table strategies --symbols NIFTY TCS --out data/strategies
+"""
+import argparse
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+import numpy as np
+from .strategy_index import SORT_KEYS
+
+TABLES = ('chain', 'greeks', 'strategies')
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARTITIONS = ['symbol', 'date']
+
+CHAIN_LEG_FIELDS = ('last_price', 'bid', 'ask', 'iv', 'volume', 'open_interest')
+GREEK_FIELDS = ('delta', 'gamma', 'theta', 'vega', 'rho')
+STRATEGY_FIELDS = (
+    'probability_of_profit', 'profit_percentage', 'net_premium', 'max_profit', 'max_loss',
+    'margin_required', 'call_iv', 'put_iv', 'days_to_expiry',
+)
+
+
+class SnapshotColumns:
+    """One snapshot flattened into a dict of equal-length float64 arrays per table"""
+    def __init__(self, symbol: str, expiry: str, created_at: float, spot_price: float,
+                 tables: Dict[str, Dict[str, np.ndarray]]):
+        self.symbol = symbol
+        self.expiry = expiry
+        self.created_at = created_at
+        self.spot_price = spot_price
+        self.tables = tables
+
+
+def snapshot_columns(symbol: str, expiry: str, created_at: float, chain: Dict[str, Any],
+                     analysis: Dict[str, Any], strategy_columns: Dict[str, np.ndarray]) -> SnapshotColumns:
+    """Flatten one snapshot; strategy metrics reuse the StrategyIndex arrays as they are"""
+    missing = {}
+    options = chain.get('options', [])
+    chain_table = _columns(
+        ['strike'] + [f'{side}_{field}' for side in ('call', 'put') for field in CHAIN_LEG_FIELDS],
+        [
+            (opt['strike_price'],)
+            + tuple((opt.get(side) or missing).get(field, np.nan) for side in ('call', 'put') for field in CHAIN_LEG_FIELDS)
+            for opt in options
+        ],
+    )
+
+    legs = analysis.get('option_analysis', {})
+    entries = [(1.0, entry) for entry in legs.get('calls', [])] + [(0.0, entry) for entry in legs.get('puts', [])]
+    greeks_table = _columns(
+        ['strike', 'is_call', 'price', 'iv', 'volume', 'open_interest'] + list(GREEK_FIELDS),
+        [
+            (entry['strike'], is_call, entry['price'], entry['iv'] or np.nan, entry['volume'], entry['open_interest'])
+            + tuple(entry['greeks'].get(greek, np.nan) for greek in GREEK_FIELDS)
+            for is_call, entry in entries
+        ],
+    )
+
+    strategies = analysis.get('strategies', [])
+    strategy_table = _columns(
+        ['put_strike', 'call_strike'] + [f for f in STRATEGY_FIELDS if f not in strategy_columns],
+        [
+            tuple(s.get('strikes') or (np.nan, np.nan))
+            + tuple(s.get(f, np.nan) for f in STRATEGY_FIELDS if f not in strategy_columns)
+            for s in strategies
+        ],
+    )
+    strategy_table.update(strategy_columns)
+
+    return SnapshotColumns(symbol, expiry, created_at, analysis.get('spot_price', chain.get('underlying_value', 0)), {
+        'chain': chain_table,
+        'greeks': greeks_table,
+        'strategies': strategy_table,
+    })
+
+
+def record_batch(columns: SnapshotColumns, table: str):
+    """Arrow record batch over the snapshot's arrays; numeric columns are not copied"""
+    import pyarrow as pa
+    arrays = columns.tables[table]
+    n = len(next(iter(arrays.values()))) if arrays else 0
+    names = ['snapshot_time', 'symbol', 'expiry', 'spot_price']
+    data = [
+        pa.array(np.full(n, int(columns.created_at * 1e6), dtype=np.int64), pa.timestamp('us', tz='UTC')),
+        # Constant per batch, so dictionary-encode rather than repeat the strings
+        pa.DictionaryArray.from_arrays(np.zeros(n, dtype=np.int32), pa.array([columns.symbol])),
+        pa.DictionaryArray.from_arrays(np.zeros(n, dtype=np.int32), pa.array([columns.expiry])),
+        pa.array(np.full(n, columns.spot_price, dtype=np.float64)),
+    ]
+    for name in sorted(arrays):
+        names.append(name)
+        data.append(pa.array(arrays[name]))
+    return pa.RecordBatch.from_arrays(data, names=names)
+
+
+def table_schema(table: str):
+    """Schema of `table` batches, for streams with no snapshot to take it from"""
+    empty = snapshot_columns('', '', 0.0, {}, {}, {name: np.empty(0) for name in SORT_KEYS})
+    return record_batch(empty, table).schema
+
+
+def stream_ipc(snapshots: Iterable[SnapshotColumns], table: str) -> Iterator[bytes]:
+    """
+    Arrow IPC stream, one record batch per snapshot, yielded as each batch is
+    encoded. With no snapshots it is still a valid stream: schema, then end.
+    """
+    import pyarrow as pa
+    sink = _ChunkSink()
+    writer = None
+    for columns in snapshots:
+        batch = record_batch(columns, table)
+        if writer is None:
+            writer = pa.ipc.new_stream(pa.PythonFile(sink, mode='w'), batch.schema)
+        writer.write_batch(batch)
+        yield sink.take()
+    if writer is None:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode='w'), table_schema(table))
+    writer.close()
+    yield sink.take()
+
+
+def write_parquet(batches: Iterable, out_dir: str) -> int:
+    """Write record batches as Parquet partitioned by symbol and date; returns the row count"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    table = pa.Table.from_batches(list(batches))
+    if table.num_rows == 0:
+        return 0
+    dates = pc.strftime(table['snapshot_time'], format='%Y-%m-%d')
+    table = table.append_column('date', dates).set_column(
+        table.schema.get_field_index('symbol'), 'symbol', pc.cast(table['symbol'], pa.string())
+    )
+    ds.write_dataset(
+        table, out_dir, format='parquet', partitioning=PARTITIONS, partitioning_flavor='hive',
+        existing_data_behavior='overwrite_or_ignore',
+        basename_template=f"part-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{{i}}.parquet",
+    )
+    return table.num_rows
+
+
+def _columns(names: List[str], rows: List[tuple]) -> Dict[str, np.ndarray]:
+    matrix = np.array(rows, dtype=float).reshape(-1, len(names))
+    # Transposed once so every column is a contiguous slice Arrow can wrap without copying
+    block = np.ascontiguousarray(matrix.T)
+    return {name: block[i] for i, name in enumerate(names)}
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last take()"""
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def main():
+    import requests
+    import pyarrow as pa
+    parser = argparse.ArgumentParser(description="Export snapshots from a running server to partitioned Parquet")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--table", choices=TABLES, default="strategies")
+    parser.add_argument("--symbols", nargs="*", default=[])
+    parser.add_argument("--start", help="ISO timestamp, inclusive; IST unless it has a UTC offset")
+    parser.add_argument("--end", help="ISO timestamp, inclusive; IST unless it has a UTC offset")
+    parser.add_argument("--out", required=True, help="output directory")
+    args = parser.parse_args()
+
+    params: Dict[str, Any] = {}
+    if args.symbols:
+        params["symbols"] = ",".join(args.symbols)
+    if args.start:
+        params["start"] = args.start
+    if args.end:
+        params["end"] = args.end
+    with requests.get(f"{args.base_url}/api/v1/export/{args.table}", params=params, stream=True) as response:
+        response.raise_for_status()
+        if response.headers.get("X-Snapshot-Count") == "0":
+            print(f"No {args.table} snapshots matched")
+            return
+        response.raw.decode_content = True
+        reader = pa.ipc.open_stream(response.raw)
+        rows = write_parquet(reader, args.out)
+    print(f"Wrote {rows} {args.table} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+from .options_analyzer import OptionsAnalyzer
+
+
+class _ChainState:
+    """What the analyzer keeps between ticks for one (symbol, expiry)"""
+    def __init__(self, symbol: str, expiry_date: str, spot_price: float, time_to_expiry: float, layout: Tuple):
+        self.symbol = symbol
+        self.expiry_date = expiry_date
+        self.spot_price = spot_price
+        self.time_to_expiry = time_to_expiry
+        # (strike, has_call, has_put) per row; any change forces a full rebuild
+        self.layout = layout
+        self.strikes = tuple(row[0] for row in layout)
+        self.quotes: Dict[float, Tuple] = {}
+        self.calls: Dict[float, Dict] = {}
+        self.puts: Dict[float, Dict] = {}
+        self.ivs: Dict[Tuple[float, str], float] = {}
+        # Vectorized-solver IVs aligned with `strikes` (NaN where a solve failed), for the volatility index
+        self.index_call_ivs = np.empty(0)
+        self.index_put_ivs = np.empty(0)
+        # (call_strike, put_strike) -> strategy or None, in full-analysis order
+        self.pairs: Dict[Tuple[float, float], Optional[Dict]] = {}
+        self.call_strikes: List[float] = []
+        self.put_strikes: List[float] = []
+        self.totals = {'call_volume': 0, 'put_volume': 0, 'call_oi': 0, 'put_oi': 0}
+        self.pain_grid = np.empty(0)
+        self.pain_curve = np.empty(0)
+        self.result: Dict[str, Any] = {}
+
+
+class IncrementalOptionsAnalyzer(OptionsAnalyzer):
+    """
+    OptionsAnalyzer that remembers the previous snapshot per symbol/expiry and,
+    when the spot, time to expiry and strike set are unchanged, re-solves only
+    the strikes whose quotes moved. Strangle candidates touching those strikes
+    are rebuilt, while volume/OI totals and the max-pain curve are patched with
+    deltas, so per-tick cost follows the size of the change rather than the chain.
+
+    Each (symbol, expiry) has its own lock, so different chains are analyzed
+    concurrently; `_lock` only guards the state and lock tables.
+    """
+    def __init__(self, max_chains: int = 64):
+        super().__init__()
+        self.max_chains = max_chains
+        self._states: "OrderedDict[Tuple[str, str], _ChainState]" = OrderedDict()
+        self._chain_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {'full': 0, 'incremental': 0, 'unchanged': 0, 'dirty_strikes': 0}
+
+    def analyze_option_chain(self, option_chain_data: Dict) -> Dict[str, Any]:
+        try:
+            symbol = option_chain_data.get('symbol', '').upper()
+            expiry_date = option_chain_data.get('expiry_date')
+            spot_price = option_chain_data.get('underlying_value', 0)
+            time_to_expiry = self._calculate_time_to_expiry(expiry_date)
+            options = {opt['strike_price']: opt for opt in option_chain_data['options']}
+            quotes = {strike: self._quote(opt) for strike, opt in options.items()}
+            layout = tuple((strike, quote[0] is not None, quote[1] is not None) for strike, quote in quotes.items())
+
+            key = (symbol, expiry_date)
+            with self._chain_lock(key):
+                with self._lock:
+                    state = self._states.get(key)
+                if (state is None or state.spot_price != spot_price
+                        or state.time_to_expiry != time_to_expiry or state.layout != layout):
+                    state = self._full_analysis(symbol, expiry_date, options, quotes, layout, spot_price, time_to_expiry)
+                    self._remember(key, state)
+                    self._count('full')
+                else:
+                    self._remember(key, state)
+                    dirty = [strike for strike, quote in quotes.items() if quote != state.quotes[strike]]
+                    if not dirty:
+                        self._count('unchanged')
+                        return dict(state.result, analysis_timestamp=datetime.now().isoformat())
+                    self._apply_changes(state, options, quotes, dirty)
+                    self._count('incremental')
+                    self._count('dirty_strikes', len(dirty))
+                return state.result
+        except Exception as e:
+            return {'error': str(e), 'status': 'failed'}
+
+    def _chain_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            lock = self._chain_locks.get(key)
+            if lock is None:
+                lock = self._chain_locks[key] = threading.Lock()
+            return lock
+
+    def _remember(self, key: Tuple[str, str], state: _ChainState):
+        with self._lock:
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_chains:
+                evicted, _ = self._states.popitem(last=False)
+                # A chain being analyzed right now keeps its lock
+                if not self._chain_locks[evicted].locked():
+                    del self._chain_locks[evicted]
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def _full_analysis(self, symbol: str, expiry_date: str, options: Dict[float, Dict], quotes: Dict[float, Tuple],
+                       layout: Tuple, spot_price: float, time_to_expiry: float) -> _ChainState:
+        state = _ChainState(symbol, expiry_date, spot_price, time_to_expiry, layout)
+        state.quotes = quotes
+        for strike, option in options.items():
+            for side, entries in (('call', state.calls), ('put', state.puts)):
+                if option.get(side):
+                    entries[strike] = self._analyze_option_leg(option[side], strike, spot_price, time_to_expiry, side)
+                    state.ivs[(strike, side)] = entries[strike]['iv']
+
+        if self._builds_strategies(symbol, time_to_expiry):
+            state.call_strikes = [k for k, opt in options.items() if opt['call'] and k > spot_price]
+            state.put_strikes = [k for k, opt in options.items() if opt['put'] and k < spot_price]
+            margins = self._margins(state, state.call_strikes, state.put_strikes)
+            for i, call_strike in enumerate(state.call_strikes):
+                for j, put_strike in enumerate(state.put_strikes):
+                    state.pairs[(call_strike, put_strike)] = self._pair(
+                        state, options, call_strike, put_strike, margins[i, j]
+                    )
+
+        call_oi = np.array([self._leg_value(opt, 'call', 'open_interest') for opt in options.values()], dtype=float)
+        put_oi = np.array([self._leg_value(opt, 'put', 'open_interest') for opt in options.values()], dtype=float)
+        state.totals = {
+            'call_volume': sum(self._leg_value(opt, 'call', 'volume') for opt in options.values()),
+            'put_volume': sum(self._leg_value(opt, 'put', 'volume') for opt in options.values()),
+            'call_oi': int(call_oi.sum()),
+            'put_oi': int(put_oi.sum()),
+        }
+        if options:
+            strike_array = np.array(state.strikes, dtype=float)
+            state.pain_grid = np.sort(strike_array)
+            state.pain_curve = self.indicator_engine.pain_curve(state.pain_grid, strike_array, call_oi, put_oi)
+        state.index_call_ivs, state.index_put_ivs = self._index_ivs(state, state.strikes)
+        self._publish(state)
+        return state
+
+    def _apply_changes(self, state: _ChainState, options: Dict[float, Dict],
+                       quotes: Dict[float, Tuple], dirty: List[float]):
+        repriced = {'call': set(), 'put': set()}
+        for strike in dirty:
+            old, new = state.quotes[strike], quotes[strike]
+            option = options[strike]
+            for i, (side, entries) in enumerate((('call', state.calls), ('put', state.puts))):
+                # The layout is unchanged, so a leg is either present in both snapshots or in neither
+                old_leg, new_leg = old[i], new[i]
+                if old_leg == new_leg:
+                    continue
+                old_price, old_volume, old_oi = old_leg
+                new_price, new_volume, new_oi = new_leg
+                state.totals[f'{side}_volume'] += new_volume - old_volume
+                state.totals[f'{side}_oi'] += new_oi - old_oi
+                if new_oi != old_oi:
+                    # Each strike's OI adds a hinge to the max-pain curve; swap the old weight for the new
+                    payoff = np.maximum(state.pain_grid - strike, 0) if side == 'call' else np.maximum(strike - state.pain_grid, 0)
+                    state.pain_curve += (new_oi - old_oi) * payoff
+                # Only a price change moves the IV, the Greeks and therefore the strangles
+                if new_price != old_price:
+                    entries[strike] = self._analyze_option_leg(
+                        option[side], strike, state.spot_price, state.time_to_expiry, side
+                    )
+                    state.ivs[(strike, side)] = entries[strike]['iv']
+                    repriced[side].add(strike)
+                else:
+                    entries[strike] = dict(entries[strike], volume=new_volume, open_interest=new_oi)
+            state.quotes[strike] = quotes[strike]
+
+        moved = sorted(repriced['call'] | repriced['put'])
+        if moved:
+            rows = [state.strikes.index(strike) for strike in moved]
+            state.index_call_ivs[rows], state.index_put_ivs[rows] = self._index_ivs(state, moved)
+
+        if self._builds_strategies(state.symbol, state.time_to_expiry):
+            for call_strike in repriced['call'].intersection(state.call_strikes):
+                margins = self._margins(state, [call_strike], state.put_strikes)[0]
+                for j, put_strike in enumerate(state.put_strikes):
+                    state.pairs[(call_strike, put_strike)] = self._pair(
+                        state, options, call_strike, put_strike, margins[j]
+                    )
+            for put_strike in repriced['put'].intersection(state.put_strikes):
+                margins = self._margins(state, state.call_strikes, [put_strike])[:, 0]
+                for i, call_strike in enumerate(state.call_strikes):
+                    state.pairs[(call_strike, put_strike)] = self._pair(
+                        state, options, call_strike, put_strike, margins[i]
+                    )
+        self._publish(state)
+
+    def _pair(self, state: _ChainState, options: Dict[float, Dict], call_strike: float, put_strike: float,
+              margin: float) -> Optional[Dict]:
+        return self._build_strangle(
+            state.symbol, state.expiry_date, options[call_strike], options[put_strike], state.spot_price, state.time_to_expiry,
+            state.ivs[(call_strike, 'call')], state.ivs[(put_strike, 'put')], float(margin)
+        )
+
+    def _margins(self, state: _ChainState, call_strikes: List[float], put_strikes: List[float]) -> np.ndarray:
+        # Unchanged strikes hit the margin engine's per-strike scenario cache
+        return self.margin_engine.short_strangle_margins(
+            state.symbol, state.expiry_date, state.spot_price, state.time_to_expiry,
+            call_strikes, [state.ivs[(k, 'call')] for k in call_strikes],
+            put_strikes, [state.ivs[(k, 'put')] for k in put_strikes]
+        )
+
+    def _publish(self, state: _ChainState):
+        """Materialise the analysis dict from the maintained state"""
+        strategies = [strategy for strategy in state.pairs.values() if strategy]
+        totals = state.totals
+        max_pain = float(state.pain_grid[np.argmin(state.pain_curve)]) if len(state.pain_grid) else 0
+        rolling = self.indicator_engine.update_rolling(
+            (state.symbol, state.expiry_date), state.spot_price, totals['call_oi'] + totals['put_oi']
+        )
+        state.result = {
+            'spot_price': state.spot_price,
+            'time_to_expiry': state.time_to_expiry,
+            'option_analysis': {
+                'calls': [state.calls[k] for k in state.strikes if k in state.calls],
+                'puts': [state.puts[k] for k in state.strikes if k in state.puts],
+            },
+            'strategies': strategies,
+            'high_probability_strategies': self._filter_high_probability_strangle_strategies(strategies),
+            'market_indicators': {
+                'pcr_volume': totals['put_volume'] / totals['call_volume'] if totals['call_volume'] > 0 else 1.0,
+                'pcr_oi': totals['put_oi'] / totals['call_oi'] if totals['call_oi'] > 0 else 1.0,
+                'total_call_volume': totals['call_volume'],
+                'total_put_volume': totals['put_volume'],
+                'total_call_oi': totals['call_oi'],
+                'total_put_oi': totals['put_oi'],
+                'max_pain': max_pain,
+                'volatility_index': self._volatility_index(state),
+                **rolling,
+            },
+            'analysis_timestamp': datetime.now().isoformat(),
+        }
+
+    def _volatility_index(self, state: _ChainState) -> Optional[float]:
+        """ATM IV through the same solver and NaN handling as IndicatorEngine.compute"""
+        return self.indicator_engine.volatility_index(
+            np.array(state.strikes, dtype=float), state.index_call_ivs, state.index_put_ivs, state.spot_price
+        )
+
+    def _index_ivs(self, state: _ChainState, strikes) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized IVs for `strikes` from their current quotes; a missing leg is NaN"""
+        prices = np.array([
+            [quote[0] if quote else np.nan for quote in state.quotes[strike]] for strike in strikes
+        ], dtype=float).reshape(-1, 2)
+        return self.indicator_engine.solve_ivs(
+            np.array(strikes, dtype=float), prices[:, 0], prices[:, 1], state.spot_price, state.time_to_expiry
+        )
+
+    @staticmethod
+    def _quote(option: Dict) -> Tuple:
+        return tuple(
+            (leg['last_price'], leg.get('volume', 0), leg.get('open_interest', 0)) if leg else None
+            for leg in (option.get('call'), option.get('put'))
+        )
+
+    @staticmethod
+    def _leg_value(option: Dict, side: str, field: str):
+        leg = option.get(side)
+        return leg.get(field, 0) if leg else 0
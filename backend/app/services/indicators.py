@@ -0,0 +1,166 @@
+import threading
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from .black_scholes import BlackScholesCalculator
+
+# Column layout of the per-snapshot array
+STRIKE, CALL_VOLUME, PUT_VOLUME, CALL_OI, PUT_OI, CALL_PRICE, PUT_PRICE = range(7)
+
+
+class RollingState:
+    """Per-chain history that rolling indicators update in O(1) per tick"""
+    def __init__(self):
+        self.last_spot: Optional[float] = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.moves = 0
+        self.last_total_oi: Optional[float] = None
+
+
+class IndicatorEngine:
+    """
+    Market indicators from an option-chain snapshot. The chain is read into
+    one array in a single pass; PCR, max pain and the ATM-IV volatility index
+    are then vectorized over it. RSI and OI change are rolled forward from
+    stored per-chain state (Wilder smoothing), so each tick costs O(1).
+    """
+    def __init__(self, rsi_period: int = 14):
+        self.rsi_period = rsi_period
+        self.bs_calculator = BlackScholesCalculator()
+        self.risk_free_rate = self.bs_calculator.risk_free_rate
+        self._rolling: Dict[Tuple[str, str], RollingState] = {}
+        # Chains are analyzed on worker threads; this serializes rolling-state updates
+        self._rolling_lock = threading.Lock()
+
+    def compute(self, option_chain_data: Dict, time_to_expiry: float) -> Dict[str, Any]:
+        options = option_chain_data.get('options', [])
+        spot = option_chain_data.get('underlying_value', 0)
+        table = self.to_array(options)
+        strikes = table[:, STRIKE]
+        totals = table[:, CALL_VOLUME:PUT_OI + 1].sum(axis=0)
+        total_call_volume, total_put_volume, total_call_oi, total_put_oi = (int(x) for x in totals)
+
+        call_ivs, put_ivs = self.solve_ivs(strikes, table[:, CALL_PRICE], table[:, PUT_PRICE], spot, time_to_expiry)
+        volatility_index = self.volatility_index(strikes, call_ivs, put_ivs, spot)
+
+        indicators = {
+            'pcr_volume': total_put_volume / total_call_volume if total_call_volume > 0 else 1.0,
+            'pcr_oi': total_put_oi / total_call_oi if total_call_oi > 0 else 1.0,
+            'total_call_volume': total_call_volume,
+            'total_put_volume': total_put_volume,
+            'total_call_oi': total_call_oi,
+            'total_put_oi': total_put_oi,
+            'max_pain': self.max_pain(strikes, table[:, CALL_OI], table[:, PUT_OI]),
+            'volatility_index': volatility_index,
+        }
+        indicators.update(self.update_rolling(
+            (option_chain_data.get('symbol', '').upper(), option_chain_data.get('expiry_date', '')),
+            spot, total_call_oi + total_put_oi
+        ))
+        return indicators
+
+    def update_rolling(self, key: Tuple[str, str], spot: float, total_oi: float) -> Dict[str, Any]:
+        """Advance RSI and OI change for `key` by one snapshot"""
+        with self._rolling_lock:
+            return self._advance(self._rolling.setdefault(key, RollingState()), spot, total_oi)
+
+    def _advance(self, state: RollingState, spot: float, total_oi: float) -> Dict[str, Any]:
+        if state.last_spot is not None and spot != state.last_spot:
+            change = spot - state.last_spot
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            state.moves += 1
+            # Simple average until the window fills, Wilder smoothing after
+            weight = min(state.moves, self.rsi_period)
+            state.avg_gain += (gain - state.avg_gain) / weight
+            state.avg_loss += (loss - state.avg_loss) / weight
+        state.last_spot = spot
+
+        oi_change = total_oi - state.last_total_oi if state.last_total_oi is not None else 0
+        state.last_total_oi = total_oi
+
+        if state.avg_loss > 0:
+            rsi = 100 - 100 / (1 + state.avg_gain / state.avg_loss)
+        else:
+            rsi = 100.0 if state.avg_gain > 0 else 50.0
+        return {'rsi': rsi, 'oi_change': oi_change, 'total_oi': total_oi}
+
+    @staticmethod
+    def to_array(options: List[Dict]) -> np.ndarray:
+        """Chain rows -> (n, 7) float array in one pass; missing legs count as zero"""
+        empty = {}
+        table = np.array([
+            (
+                opt['strike_price'],
+                (opt.get('call') or empty).get('volume', 0),
+                (opt.get('put') or empty).get('volume', 0),
+                (opt.get('call') or empty).get('open_interest', 0),
+                (opt.get('put') or empty).get('open_interest', 0),
+                (opt.get('call') or empty).get('last_price', np.nan),
+                (opt.get('put') or empty).get('last_price', np.nan),
+            )
+            for opt in options
+        ], dtype=float)
+        return table.reshape(-1, 7)
+
+    @staticmethod
+    def pain_curve(points: np.ndarray, strikes: np.ndarray, call_oi: np.ndarray, put_oi: np.ndarray) -> np.ndarray:
+        """
+        Total option-writer payout if the underlying settles at each of `points`:
+        calls struck below the price plus puts struck above it, via prefix sums
+        over sorted strikes in O((n + m) log n)
+        """
+        order = np.argsort(strikes)
+        strikes, call_oi, put_oi = strikes[order], call_oi[order], put_oi[order]
+        call_cum = np.concatenate([[0.0], np.cumsum(call_oi)])
+        call_strike_cum = np.concatenate([[0.0], np.cumsum(call_oi * strikes)])
+        put_cum = np.concatenate([[0.0], np.cumsum(put_oi)])
+        put_strike_cum = np.concatenate([[0.0], np.cumsum(put_oi * strikes)])
+        below = np.searchsorted(strikes, points, side='left')
+        above = np.searchsorted(strikes, points, side='right')
+        calls = points * call_cum[below] - call_strike_cum[below]
+        puts = (put_strike_cum[-1] - put_strike_cum[above]) - points * (put_cum[-1] - put_cum[above])
+        return calls + puts
+
+    def max_pain(self, strikes: np.ndarray, call_oi: np.ndarray, put_oi: np.ndarray) -> float:
+        if not len(strikes):
+            return 0
+        points = np.sort(strikes)
+        return float(points[np.argmin(self.pain_curve(points, strikes, call_oi, put_oi))])
+
+    def solve_ivs(self, strikes: np.ndarray, call_prices: np.ndarray, put_prices: np.ndarray, spot: float,
+                  time_to_expiry: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Call and put IVs per strike from one vectorized solve. Missing legs and
+        failed solves are NaN; nothing is substituted, so every caller of the
+        volatility index sees the same gaps.
+        """
+        n = len(strikes)
+        if not n or not spot or time_to_expiry <= 0:
+            return np.full(n, np.nan), np.full(n, np.nan)
+        ivs = self.bs_calculator.implied_volatility_vectorized(
+            np.concatenate([call_prices, put_prices]), spot, np.concatenate([strikes, strikes]),
+            time_to_expiry, self.risk_free_rate, np.repeat([True, False], n)
+        )
+        return ivs[:n], ivs[n:]
+
+    def volatility_index(self, strikes: np.ndarray, call_ivs: np.ndarray, put_ivs: np.ndarray,
+                         spot: float) -> Optional[float]:
+        """ATM volatility from solve_ivs output; None without strikes, a spot or any solved IV"""
+        if not len(strikes) or not spot:
+            return None
+        return self.atm_volatility(strikes, call_ivs, put_ivs, spot)
+
+    @staticmethod
+    def atm_volatility(strikes: np.ndarray, call_ivs: np.ndarray, put_ivs: np.ndarray, spot: float) -> Optional[float]:
+        """
+        Volatility index in percent: call/put IVs averaged per strike, then
+        linearly interpolated at the spot between the bracketing strikes
+        """
+        both = np.vstack([call_ivs, put_ivs])
+        solved = (~np.isnan(both)).sum(axis=0)
+        valid = solved > 0
+        if not valid.any():
+            return None
+        mid = np.where(valid, np.nansum(both, axis=0) / np.maximum(solved, 1), np.nan)
+        order = np.argsort(strikes[valid])
+        return float(np.interp(spot, strikes[valid][order], mid[valid][order]) * 100)
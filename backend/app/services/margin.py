@@ -0,0 +1,120 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Tuple
+from .black_scholes import BlackScholesCalculator
+
+INDEX_SYMBOLS = {"NIFTY", "BANKNIFTY", "FINNIFTY"}
+
+# Standard SPAN risk array: (fraction of the price scan range, vol direction, loss weight).
+# Fourteen regular scenarios at 0, 1/3, 2/3 and 3/3 of the range with vol up and
+# down, plus two extreme moves of which only a fraction counts towards the margin.
+EXTREME_MOVE = 2.0
+EXTREME_COVER = 0.35
+SCENARIOS = np.array(
+    [(0, 1, 1.0), (0, -1, 1.0)]
+    + [(sign * step / 3, vol, 1.0) for step in (1, 2, 3) for sign in (1, -1) for vol in (1, -1)]
+    + [(EXTREME_MOVE, 0, EXTREME_COVER), (-EXTREME_MOVE, 0, EXTREME_COVER)]
+)
+PRICE_MOVES, VOL_MOVES, WEIGHTS = SCENARIOS.T
+
+# Scenario loss rows kept across all symbols and expiries, least recently used evicted first
+MAX_CACHED_LEGS = 16384
+
+
+class SpanMarginEngine:
+    """
+    SPAN-style margin for short option positions: every leg is repriced under
+    the 16 standard price x volatility scenarios in one batched Black-Scholes
+    call, the worst scenario loss of the combined position is the scan risk,
+    and exposure margin on the short notional is added on top.
+
+    Scenario losses depend only on the strike, side and IV for a given spot
+    and expiry, so they are cached per strike: a chain of n calls and m puts
+    costs n + m repricings however many of the n x m pairs are margined. The
+    cache is keyed by symbol and expiry too, so chains analyzed in turn do not
+    evict each other.
+    """
+    def __init__(self, vol_scan_range: float = 0.25, index_price_scan: float = 0.06, stock_price_scan: float = 0.075,
+                 index_exposure_rate: float = 0.02, stock_exposure_rate: float = 0.035, risk_free_rate: float = 0.065,
+                 max_cached_legs: int = MAX_CACHED_LEGS):
+        self.vol_scan_range = vol_scan_range
+        self.index_price_scan = index_price_scan
+        self.stock_price_scan = stock_price_scan
+        self.index_exposure_rate = index_exposure_rate
+        self.stock_exposure_rate = stock_exposure_rate
+        self.risk_free_rate = risk_free_rate
+        self.max_cached_legs = max_cached_legs
+        self.bs_calculator = BlackScholesCalculator()
+        self._cache: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def price_scan_range(self, symbol: str, spot_price: float) -> float:
+        """Price scan range in points for the underlying"""
+        return spot_price * (self.index_price_scan if symbol.upper() in INDEX_SYMBOLS else self.stock_price_scan)
+
+    def exposure_margin(self, symbol: str, spot_price: float, short_legs: int = 1) -> float:
+        rate = self.index_exposure_rate if symbol.upper() in INDEX_SYMBOLS else self.stock_exposure_rate
+        return rate * spot_price * short_legs
+
+    def scenario_losses(self, symbol: str, expiry: str, spot_price: float, time_to_expiry: float,
+                        strikes: np.ndarray, ivs: np.ndarray, is_call: np.ndarray, price_scan: float) -> np.ndarray:
+        """
+        (n, 16) weighted loss of one short unit of each option per scenario;
+        only legs missing from the cache are repriced
+        """
+        strikes = np.asarray(strikes, dtype=float)
+        ivs = np.asarray(ivs, dtype=float)
+        is_call = np.asarray(is_call, dtype=bool)
+        context = (symbol.upper(), expiry, spot_price, time_to_expiry, price_scan)
+        keys = [context + leg for leg in zip(strikes.tolist(), is_call.tolist(), ivs.tolist())]
+        with self._lock:
+            missing = [i for i, key in enumerate(keys) if key not in self._cache]
+            rows = {}
+            if missing:
+                fresh = self._reprice(spot_price, time_to_expiry, strikes[missing], ivs[missing], is_call[missing], price_scan)
+                rows = {keys[i]: row for i, row in zip(missing, fresh)}
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    rows[key] = self._cache[key]
+                else:
+                    self._cache[key] = rows[key]
+            while len(self._cache) > self.max_cached_legs:
+                self._cache.popitem(last=False)
+            return np.array([rows[key] for key in keys]).reshape(-1, len(SCENARIOS))
+
+    def short_strangle_margins(self, symbol: str, expiry: str, spot_price: float, time_to_expiry: float,
+                               call_strikes: np.ndarray, call_ivs: np.ndarray,
+                               put_strikes: np.ndarray, put_ivs: np.ndarray) -> np.ndarray:
+        """(calls, puts) margin per unit for every short call x short put pair"""
+        price_scan = self.price_scan_range(symbol, spot_price)
+        call_losses = self.scenario_losses(symbol, expiry, spot_price, time_to_expiry, call_strikes, call_ivs,
+                                           np.ones(len(call_strikes), dtype=bool), price_scan)
+        put_losses = self.scenario_losses(symbol, expiry, spot_price, time_to_expiry, put_strikes, put_ivs,
+                                          np.zeros(len(put_strikes), dtype=bool), price_scan)
+        # Legs share the scenario, so the pair's loss is the sum before taking the worst case
+        scan_risk = (call_losses[:, None, :] + put_losses[None, :, :]).max(axis=2)
+        return np.maximum(scan_risk, 0) + self.exposure_margin(symbol, spot_price, short_legs=2)
+
+    def short_strangle_margin(self, symbol: str, expiry: str, spot_price: float, time_to_expiry: float,
+                              call_strike: float, call_iv: float, put_strike: float, put_iv: float) -> float:
+        return float(self.short_strangle_margins(
+            symbol, expiry, spot_price, time_to_expiry, [call_strike], [call_iv], [put_strike], [put_iv]
+        )[0, 0])
+
+    def _reprice(self, spot_price: float, time_to_expiry: float, strikes: np.ndarray, ivs: np.ndarray,
+                 is_call: np.ndarray, price_scan: float) -> np.ndarray:
+        # (legs, scenarios) grids priced in a single vectorized pass
+        spots = spot_price + PRICE_MOVES[None, :] * price_scan
+        vols = np.maximum(ivs[:, None] * (1 + VOL_MOVES[None, :] * self.vol_scan_range), 1e-4)
+        shape = (len(strikes), len(SCENARIOS))
+        scenario_prices = self.bs_calculator.price_vectorized(
+            np.broadcast_to(spots, shape), strikes[:, None], time_to_expiry, self.risk_free_rate,
+            vols, np.broadcast_to(is_call[:, None], shape)
+        )
+        base_prices = self.bs_calculator.price_vectorized(
+            spot_price, strikes, time_to_expiry, self.risk_free_rate, np.maximum(ivs, 1e-4), is_call
+        )
+        return (scenario_prices - base_prices[:, None]) * WEIGHTS[None, :]
+
@@ -1,14 +1,16 @@
 from app.models.market_data import MarketData
-import random
 from datetime import datetime
+from typing import Dict, Any
 
-def get_market_data(symbol: str) -> MarketData:
-    # Simulate for now; in production, parse from NSE or other APIs
+def get_market_data(symbol: str, market_indicators: Dict[str, Any]) -> MarketData:
+    """Dashboard indicators for `symbol` from the analyzer's market_indicators"""
     return MarketData(
-        vix=random.uniform(10, 25),
-        pcr=random.uniform(0.7, 1.3),
-        max_pain=random.uniform(18000, 20000),
-        open_interest=random.uniform(1e6, 5e6),
-        rsi=random.uniform(30, 70),
+        vix=market_indicators.get('volatility_index'),
+        pcr=market_indicators.get('pcr_oi', 1.0),
+        pcr_volume=market_indicators.get('pcr_volume', 1.0),
+        max_pain=market_indicators.get('max_pain', 0),
+        open_interest=market_indicators.get('total_oi', 0),
+        oi_change=market_indicators.get('oi_change', 0),
+        rsi=market_indicators.get('rsi', 50.0),
         timestamp=datetime.utcnow().isoformat()
-    ) 
\ No newline at end of file
+    ) 
@@ -1,14 +1,19 @@
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import asyncio
+import threading
 import time
-import random
+from datetime import datetime
+from .synthetic_chain import SyntheticChainGenerator
+from ..utils.config import NSE_BASE_URL, NSE_LIVE_DATA, SYNTHETIC_SEED
+
+SESSION_BOOTSTRAP_TIMEOUT = 15
 
 class NSEScraper:
     """
     NSE Option Chain and Market Data Scraper
     """
-    BASE_URL = "https://www.nseindia.com"
+    BASE_URL = NSE_BASE_URL
     OPTION_CHAIN_INDICES_URL = BASE_URL + "/api/option-chain-indices?symbol={symbol}"
     OPTION_CHAIN_EQUITIES_URL = BASE_URL + "/api/option-chain-equities?symbol={symbol}"
     HEADERS = {
@@ -27,7 +32,31 @@ class NSEScraper:
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
-        self._initialize_session()
+        self.synthetic = SyntheticChainGenerator(seed=SYNTHETIC_SEED)
+        self._synthetic_clock = None
+        # Parsing runs on worker threads, and the generator is not thread-safe
+        self._synthetic_lock = threading.Lock()
+        self._session_ready = threading.Event()
+        self._bootstrap_thread = None
+
+    def start_session_bootstrap(self):
+        """
+        Warm up NSE cookies on a daemon thread so app startup never blocks on the
+        network. Nothing to do while the synthetic fallback is in use.
+        """
+        if not NSE_LIVE_DATA:
+            self._session_ready.set()
+            return
+        if self._bootstrap_thread is not None:
+            return
+        def bootstrap():
+            self._initialize_session()
+            self._session_ready.set()
+        self._bootstrap_thread = threading.Thread(target=bootstrap, name="nse-session-bootstrap", daemon=True)
+        self._bootstrap_thread.start()
+
+    def close(self):
+        self.session.close()
 
     def _initialize_session(self):
         """Initialize NSE session by visiting the main page first"""
@@ -49,14 +78,18 @@ class NSEScraper:
 
     async def get_option_chain(self, symbol: str, expiry: str = "") -> Dict[str, Any]:
         """Get real-time option chain data from NSE"""
+        return self.parse(symbol, await self.fetch_raw(symbol), expiry)
+
+    async def fetch_raw(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Raw NSE option chain JSON for `symbol`, or None when the fallback should be used"""
         print(f"Attempting to fetch real-time data for {symbol}...")
-        
-        # NSE API is currently blocked (403 errors), use realistic fallback data
-        print(f"NSE API is currently blocked, using realistic fallback data for {symbol}")
-        return self._get_fallback_data(symbol, expiry)
-        
-        # Uncomment below code when NSE API session management is properly implemented
-        """
+
+        if not NSE_LIVE_DATA:
+            # nseindia.com blocks scripted clients (403 errors); set NSE_LIVE_DATA=1
+            # to fetch from NSE_BASE_URL, e.g. the local replay server in loadtest/
+            print(f"NSE API is currently blocked, using realistic fallback data for {symbol}")
+            return None
+
         try:
             # Choose the correct URL based on whether it's an index or stock
             symbol_upper = symbol.upper()
@@ -67,26 +100,39 @@ class NSEScraper:
             else:
                 # Default to indices for unknown symbols
                 url = self.OPTION_CHAIN_INDICES_URL.format(symbol=symbol)
-            
+
             # Make request with proper session handling
             loop = asyncio.get_event_loop()
             response = await loop.run_in_executor(None, self._make_request, url)
-            
+
             if response.status_code == 200:
                 data = response.json()
-                return self._parse_option_chain(symbol, data)
-            else:
-                print(f"NSE API returned status {response.status_code} for {symbol}")
-                return self._get_fallback_data(symbol)
-                
+                if data.get("records"):
+                    return data
+            print(f"NSE API returned status {response.status_code} for {symbol}")
+            return None
+
         except Exception as e:
             print(f"Error fetching real-time data for {symbol}: {e}")
-            return self._get_fallback_data(symbol)
-        """
+            return None
+
+    def parse(self, symbol: str, data: Optional[Dict[str, Any]], expiry: str = "") -> Dict[str, Any]:
+        """Chain for one expiry from a fetch_raw result, falling back to synthetic data"""
+        if not data:
+            return self._get_fallback_data(symbol, expiry)
+        try:
+            return self._parse_option_chain(symbol, data, expiry)
+        except Exception as e:
+            print(f"Error parsing option chain for {symbol}: {e}")
+            return self._get_fallback_data(symbol, expiry)
 
     def _make_request(self, url: str):
         """Make HTTP request with retry logic"""
         max_retries = 3
+        # Give the background bootstrap a chance to collect cookies first
+        if not self._session_ready.is_set():
+            self.start_session_bootstrap()
+            self._session_ready.wait(timeout=SESSION_BOOTSTRAP_TIMEOUT)
         for attempt in range(max_retries):
             try:
                 response = self.session.get(url, timeout=15)
@@ -111,146 +157,27 @@ class NSEScraper:
 
     def _get_fallback_data(self, symbol: str, expiry: str = "") -> Dict[str, Any]:
         """Generate realistic fallback data when NSE API is unavailable"""
-        # Realistic current prices for different symbols
-        current_prices = {
-            "NIFTY": 24500 + random.randint(-200, 200),
-            "BANKNIFTY": 52000 + random.randint(-500, 500),
-            "FINNIFTY": 21000 + random.randint(-200, 200),
-            "RELIANCE": 2800 + random.randint(-50, 50),
-            "TCS": 3800 + random.randint(-50, 50),
-            "INFY": 1450 + random.randint(-30, 30),  # Updated to match real market
-            "SBICARD": 850 + random.randint(-20, 20),  # Updated to match real market
-            "HDFCBANK": 1600 + random.randint(-30, 30),
-            "HINDUNILVR": 2500 + random.randint(-50, 50),
-            "MARUTI": 12000 + random.randint(-200, 200)
-        }
-        
-        spot_price = current_prices.get(symbol.upper(), 20000)
-        
-        # Generate realistic expiry dates - prioritize Sept 30th as per real market
-        from datetime import datetime, timedelta
-        expiry_dates = []
-        
-        # Add Sept 30th, 2025 as primary expiry (matching real market)
-        sept_30 = datetime(2025, 9, 30)
-        expiry_dates.append(sept_30.strftime('%Y-%m-%d'))
-        
-        # Add other realistic expiries
-        oct_31 = datetime(2025, 10, 31)
-        expiry_dates.append(oct_31.strftime('%Y-%m-%d'))
-        
-        nov_28 = datetime(2025, 11, 28)
-        expiry_dates.append(nov_28.strftime('%Y-%m-%d'))
-        
-        dec_26 = datetime(2025, 12, 26)
-        expiry_dates.append(dec_26.strftime('%Y-%m-%d'))
-        
-        # Generate option chain data
-        options = []
-        strikes = self._generate_strikes(spot_price, symbol)
-        
-        for strike in strikes:
-            # More realistic premium calculation based on distance from spot
-            call_distance = max(0, strike - spot_price)
-            put_distance = max(0, spot_price - strike)
-            
-            # Base premiums similar to real market (2.35 for call, 0.4 for put)
-            if call_distance == 0:  # ATM call
-                call_price = random.uniform(2.0, 3.0)
-            elif call_distance < 50:  # Near ATM call
-                call_price = random.uniform(1.5, 2.5)
-            else:  # OTM call
-                call_price = random.uniform(0.5, 2.0)
-                
-            if put_distance == 0:  # ATM put
-                put_price = random.uniform(0.3, 0.6)
-            elif put_distance < 50:  # Near ATM put
-                put_price = random.uniform(0.2, 0.5)
-            else:  # OTM put
-                put_price = random.uniform(0.1, 0.4)
-            
-            options.append({
-                "strike_price": strike,
-                "call": {
-                    "last_price": round(call_price, 2),
-                    "bid": round(call_price * 0.95, 2),
-                    "ask": round(call_price * 1.05, 2),
-                    "iv": round(random.uniform(0.15, 0.35), 3),
-                    "delta": round(random.uniform(0.1, 0.9), 3),
-                    "gamma": round(random.uniform(0.001, 0.01), 4),
-                    "theta": round(random.uniform(-0.1, -0.01), 3),
-                    "vega": round(random.uniform(0.01, 0.1), 3),
-                    "open_interest": random.randint(1000, 50000),
-                    "volume": random.randint(100, 10000),
-                    "expiry": expiry_dates[0]
-                },
-                "put": {
-                    "last_price": round(put_price, 2),
-                    "bid": round(put_price * 0.95, 2),
-                    "ask": round(put_price * 1.05, 2),
-                    "iv": round(random.uniform(0.15, 0.35), 3),
-                    "delta": round(random.uniform(-0.9, -0.1), 3),
-                    "gamma": round(random.uniform(0.001, 0.01), 4),
-                    "theta": round(random.uniform(-0.1, -0.01), 3),
-                    "vega": round(random.uniform(0.01, 0.1), 3),
-                    "open_interest": random.randint(1000, 50000),
-                    "volume": random.randint(100, 10000),
-                    "expiry": expiry_dates[0]
-                }
-            })
-        
-        # Use selected expiry date if provided, otherwise use first available
-        selected_expiry = expiry if expiry and expiry in expiry_dates else expiry_dates[0]
-        
-        return {
-            "symbol": symbol,
-            "expiry_date": selected_expiry,
-            "expiry_dates": expiry_dates,
-            "underlying_value": spot_price,
-            "options": options
-        }
-
-    def _generate_strikes(self, spot_price: float, symbol: str) -> list:
-        """Generate realistic strike prices around current spot"""
-        if symbol.upper() in self.INDICES:
-            # For indices, use 50-point intervals
-            interval = 50
-            center = round(spot_price / interval) * interval
-        else:
-            # For stocks, use smaller intervals
-            if spot_price > 1000:
-                interval = 50
-            elif spot_price > 500:
-                interval = 25
-            else:
-                interval = 10
-            center = round(spot_price / interval) * interval
-        
-        strikes = []
-        # Generate strikes more realistically - don't go too far below current price
-        # For puts, we need strikes below current price, but not too far
-        # For calls, we need strikes above current price
-        
-        # Start from a reasonable point below current price (for puts)
-        min_strike = max(spot_price * 0.85, center - (3 * interval))  # Don't go below 85% of spot
-        max_strike = center + (8 * interval)  # Go up to 8 intervals above center
-        
-        current_strike = min_strike
-        while current_strike <= max_strike:
-            strikes.append(current_strike)
-            current_strike += interval
-        
-        return sorted(strikes)
+        # Advance the synthetic market by the wall-clock time since the last call
+        # so consecutive fallbacks behave like a live feed
+        with self._synthetic_lock:
+            now = time.monotonic()
+            if self._synthetic_clock is not None:
+                self.synthetic.advance(now - self._synthetic_clock)
+            self._synthetic_clock = now
+            return self.synthetic.generate_chain(symbol, expiry)
 
-    def _parse_option_chain(self, symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Parse real NSE option chain data"""
+    def _parse_option_chain(self, symbol: str, data: Dict[str, Any], expiry: str = "") -> Dict[str, Any]:
+        """Parse real NSE option chain data for one expiry"""
         records = data.get("records", {})
-        expiry_dates = records.get("expiryDates", [])
-        expiry = expiry_dates[0] if expiry_dates else "N/A"
+        expiry_dates = [self._normalize_expiry(e) for e in records.get("expiryDates", [])]
+        selected_expiry = expiry if expiry and expiry in expiry_dates else (expiry_dates[0] if expiry_dates else "N/A")
         underlying_value = records.get("underlyingValue", 0)
-        
+
         options = []
         for entry in records.get("data", []):
+            # Rows for every expiry are interleaved; keep the selected one
+            if "expiryDate" in entry and self._normalize_expiry(entry["expiryDate"]) != selected_expiry:
+                continue
             strike = entry.get("strikePrice", 0)
             call = entry.get("CE", None)
             put = entry.get("PE", None)
@@ -259,15 +186,23 @@ class NSEScraper:
                 "call": self._parse_option_leg(call),
                 "put": self._parse_option_leg(put)
             })
-        
+
         return {
             "symbol": symbol,
-            "expiry_date": expiry,
+            "expiry_date": selected_expiry,
             "expiry_dates": expiry_dates,
             "underlying_value": underlying_value,
             "options": options
         }
 
+    @staticmethod
+    def _normalize_expiry(expiry: str) -> str:
+        """NSE spells expiries as 30-Sep-2025; the rest of the app uses 2025-09-30"""
+        try:
+            return datetime.strptime(expiry, "%d-%b-%Y").strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            return expiry
+
     def _parse_option_leg(self, leg: Dict[str, Any]) -> Dict[str, Any]:
         if not leg:
             return None
@@ -282,18 +217,5 @@ class NSEScraper:
             "vega": leg.get("vega", 0),
             "open_interest": leg.get("openInterest", 0),
             "volume": leg.get("totalTradedVolume", 0),
-            "expiry": leg.get("expiryDate", "")
+            "expiry": self._normalize_expiry(leg.get("expiryDate", ""))
         }
-
-    async def get_market_indicators(self) -> Dict[str, Any]:
-        # Simulate for now; extend to fetch real data if available
-        import random
-        from datetime import datetime
-        return {
-            "vix": random.uniform(10, 25),
-            "pcr": random.uniform(0.7, 1.3),
-            "max_pain": random.uniform(18000, 20000),
-            "open_interest": random.uniform(1e6, 5e6),
-            "rsi": random.uniform(30, 70),
-            "timestamp": datetime.utcnow().isoformat()
-        } 
\ No newline at end of file
@@ -1,17 +1,28 @@
 import numpy as np
-import pandas as pd
 from typing import List, Dict, Any
 from datetime import datetime
-from .black_scholes import BlackScholesCalculator
-from scipy.stats import norm
+from .black_scholes import BlackScholesCalculator, norm_cdf
+from .indicators import IndicatorEngine
+from .margin import SpanMarginEngine
+from .trading_calendar import TRADING_CALENDAR
 
 class OptionsAnalyzer:
     """
     Advanced options analysis with strategy evaluation and probability calculations
     """
+    SUPPORTED_SYMBOLS = {'NIFTY', 'BANKNIFTY', 'FINNIFTY', 'RELIANCE', 'TCS', 'INFY', 'SBICARD', 'HDFCBANK', 'HINDUNILVR', 'MARUTI'}
+    # Thresholds for high_probability_strategies, also the /strategies query defaults.
+    # Profit is the credit as % of SPAN + exposure margin for the life of the
+    # trade, so a one-week strangle at 85% POP typically returns 0.5-2%
+    MIN_PROFIT_PERCENTAGE = 0.5
+    MIN_PROBABILITY_OF_PROFIT = 85.0
+
     def __init__(self):
         self.bs_calculator = BlackScholesCalculator()
+        self.indicator_engine = IndicatorEngine()
         self.risk_free_rate = 0.065
+        self.margin_engine = SpanMarginEngine(risk_free_rate=self.risk_free_rate)
+        self.calendar = TRADING_CALENDAR
 
     def analyze_option_chain(self, option_chain_data: Dict) -> Dict[str, Any]:
         try:
@@ -23,13 +34,14 @@ class OptionsAnalyzer:
             )
             # Generate strangle pairs for all supported stocks
             symbol = option_chain_data.get('symbol', '').upper()
-            self.current_expiry_date = expiry_date  # Set current expiry date for strategies
-            supported_stocks = {'NIFTY', 'BANKNIFTY', 'FINNIFTY', 'RELIANCE', 'TCS', 'INFY', 'SBICARD', 'HDFCBANK', 'HINDUNILVR', 'MARUTI'}
-            if symbol.upper() in supported_stocks:
-                strategies = self._generate_strangle_pairs(option_chain_data['options'], spot_price, time_to_expiry)
+            if self._builds_strategies(symbol, time_to_expiry):
+                ivs = self._ivs_from_analysis(option_analysis)
+                strategies = self._generate_strangle_pairs(
+                    symbol, expiry_date, option_chain_data['options'], spot_price, time_to_expiry, ivs
+                )
             else:
                 strategies = []
-            market_indicators = self._calculate_market_indicators(option_chain_data)
+            market_indicators = self._calculate_market_indicators(option_chain_data, time_to_expiry)
             high_prob_strategies = self._filter_high_probability_strangle_strategies(strategies)
             return {
                 'spot_price': spot_price,
@@ -49,42 +61,39 @@ class OptionsAnalyzer:
         for option in options_data:
             strike = option['strike_price']
             if 'call' in option and option['call']:
-                call_data = option['call']
-                call_iv = self._calculate_implied_volatility(
-                    call_data['last_price'], spot_price, strike, time_to_expiry, 'call'
-                )
-                call_greeks = self.bs_calculator.calculate_greeks(
-                    spot_price, strike, time_to_expiry, self.risk_free_rate, call_iv or 0.2, 'call'
+                call_analysis.append(
+                    self._analyze_option_leg(option['call'], strike, spot_price, time_to_expiry, 'call')
                 )
-                call_analysis.append({
-                    'strike': strike,
-                    'price': call_data['last_price'],
-                    'iv': call_iv,
-                    'volume': call_data.get('volume', 0),
-                    'open_interest': call_data.get('open_interest', 0),
-                    'greeks': call_greeks
-                })
             if 'put' in option and option['put']:
-                put_data = option['put']
-                put_iv = self._calculate_implied_volatility(
-                    put_data['last_price'], spot_price, strike, time_to_expiry, 'put'
+                put_analysis.append(
+                    self._analyze_option_leg(option['put'], strike, spot_price, time_to_expiry, 'put')
                 )
-                put_greeks = self.bs_calculator.calculate_greeks(
-                    spot_price, strike, time_to_expiry, self.risk_free_rate, put_iv or 0.2, 'put'
-                )
-                put_analysis.append({
-                    'strike': strike,
-                    'price': put_data['last_price'],
-                    'iv': put_iv,
-                    'volume': put_data.get('volume', 0),
-                    'open_interest': put_data.get('open_interest', 0),
-                    'greeks': put_greeks
-                })
         return {
             'calls': call_analysis,
             'puts': put_analysis
         }
 
+    def _analyze_option_leg(self, leg: Dict, strike: float, spot_price: float, time_to_expiry: float, option_type: str) -> Dict:
+        iv = self._calculate_implied_volatility(
+            leg['last_price'], spot_price, strike, time_to_expiry, option_type
+        )
+        greeks = self.bs_calculator.calculate_greeks(
+            spot_price, strike, time_to_expiry, self.risk_free_rate, iv or 0.2, option_type
+        )
+        return {
+            'strike': strike,
+            'price': leg['last_price'],
+            'iv': iv,
+            'volume': leg.get('volume', 0),
+            'open_interest': leg.get('open_interest', 0),
+            'greeks': greeks
+        }
+
+    def _ivs_from_analysis(self, option_analysis: Dict) -> Dict:
+        ivs = {(entry['strike'], 'call'): entry['iv'] for entry in option_analysis['calls']}
+        ivs.update({(entry['strike'], 'put'): entry['iv'] for entry in option_analysis['puts']})
+        return ivs
+
     def _generate_strategies(self, options_data: List[Dict], spot_price: float, time_to_expiry: float) -> List[Dict]:
         strategies = []
         strikes = sorted([opt['strike_price'] for opt in options_data])
@@ -137,88 +146,89 @@ class OptionsAnalyzer:
         # Placeholder for straddles and strangles
         return []
 
-    def _generate_strangle_pairs(self, options_data: List[Dict], spot_price: float, time_to_expiry: float) -> List[Dict]:
+    def _generate_strangle_pairs(self, symbol: str, expiry_date: str, options_data: List[Dict], spot_price: float,
+                                 time_to_expiry: float, ivs: Dict = None) -> List[Dict]:
         # Generate strangle pairs: Sell OTM Call + Sell OTM Put
+        # IVs are solved once per strike, not once per pair
+        if ivs is None:
+            ivs = self._option_ivs(options_data, spot_price, time_to_expiry)
         strategies = []
         calls = [opt for opt in options_data if opt['call'] and opt['strike_price'] > spot_price]
         puts = [opt for opt in options_data if opt['put'] and opt['strike_price'] < spot_price]
-        
-        # Debug logging removed
-        
-        for call in calls:
-            for put in puts:
-                call_leg = call['call']
-                put_leg = put['put']
-                
-                # Calculate net premium with more realistic and varied premiums
-                # Generate varied premiums based on strike distance from spot price
-                call_distance = abs(call['strike_price'] - spot_price)
-                put_distance = abs(spot_price - put['strike_price'])
-                
-                # More realistic premium calculation based on distance from spot
-                call_premium = max(0.1, min(5.0, call_distance * 0.02 + np.random.uniform(0.1, 0.5)))
-                put_premium = max(0.1, min(5.0, put_distance * 0.02 + np.random.uniform(0.1, 0.5)))
-                
-                net_premium = call_premium + put_premium
-                
-                # Get IVs for better probability calculation
-                call_iv = self._calculate_implied_volatility(
-                    call_leg['last_price'], spot_price, call['strike_price'], time_to_expiry, 'call'
-                )
-                put_iv = self._calculate_implied_volatility(
-                    put_leg['last_price'], spot_price, put['strike_price'], time_to_expiry, 'put'
-                )
-                
-                # Calculate probability of profit with improved IV calculation
-                prob_profit = self._estimate_strangle_probability(
-                    spot_price, put['strike_price'], call['strike_price'], time_to_expiry, call_iv, put_iv
+        call_ivs = [ivs[(call['strike_price'], 'call')] for call in calls]
+        put_ivs = [ivs[(put['strike_price'], 'put')] for put in puts]
+        # Margin for every call x put pair from one scenario repricing per strike
+        margins = self.margin_engine.short_strangle_margins(
+            symbol, expiry_date, spot_price, time_to_expiry,
+            [call['strike_price'] for call in calls], call_ivs, [put['strike_price'] for put in puts], put_ivs
+        )
+        for i, call in enumerate(calls):
+            for j, put in enumerate(puts):
+                strategy = self._build_strangle(
+                    symbol, expiry_date, call, put, spot_price, time_to_expiry, call_ivs[i], put_ivs[j], float(margins[i, j])
                 )
-                
-                # Calculate max profit and loss
-                max_profit = net_premium
-                max_loss = max((spot_price - put['strike_price']), (call['strike_price'] - spot_price)) - net_premium
-                
-                # Calculate profit percentage (max profit as % of capital at risk)
-                # For short strangles, margin varies based on strike distances and volatility
-                # Closer strikes = higher margin, farther strikes = lower margin
-                avg_strike_distance = (call_distance + put_distance) / 2
-                
-                # More realistic margin calculation - higher margins for closer strikes
-                if avg_strike_distance < 50:
-                    margin_multiplier = np.random.uniform(8.0, 12.0)  # Higher margin for closer strikes
-                elif avg_strike_distance < 100:
-                    margin_multiplier = np.random.uniform(6.0, 10.0)  # Medium margin
-                else:
-                    margin_multiplier = np.random.uniform(4.0, 8.0)   # Lower margin for far strikes
-                
-                margin_required = net_premium * margin_multiplier
-                profit_percentage = (max_profit / margin_required) * 100 if margin_required > 0 else 0
-                
-                # Only include strategies with profit > 3% for better returns
-                if profit_percentage > 3.0:
-                    strategy = {
-                        'strategy_type': 'Short Strangle',
-                        'legs': [
-                            {'action': 'SELL', 'type': 'PUT', 'strike': put['strike_price'], 'premium': put_premium},
-                            {'action': 'SELL', 'type': 'CALL', 'strike': call['strike_price'], 'premium': call_premium}
-                        ],
-                        'probability_of_profit': prob_profit,
-                        'net_premium': net_premium,
-                        'max_profit': max_profit,
-                        'max_loss': max_loss,
-                        'profit_percentage': profit_percentage,
-                        'call_iv': call_iv,
-                        'put_iv': put_iv,
-                        'strikes': [put['strike_price'], call['strike_price']],
-                        'expiry_date': self.current_expiry_date,
-                        'days_to_expiry': int(time_to_expiry * 365)
-                    }
+                if strategy:
                     strategies.append(strategy)
-        # Debug logging removed
         return strategies
 
-    def _estimate_strangle_probability(self, spot: float, put_strike: float, call_strike: float, 
+    def _option_ivs(self, options_data: List[Dict], spot_price: float, time_to_expiry: float) -> Dict:
+        ivs = {}
+        for option in options_data:
+            for side in ('call', 'put'):
+                if option.get(side):
+                    ivs[(option['strike_price'], side)] = self._calculate_implied_volatility(
+                        option[side]['last_price'], spot_price, option['strike_price'], time_to_expiry, side
+                    )
+        return ivs
+
+    def _build_strangle(self, symbol: str, expiry_date: str, call: Dict, put: Dict, spot_price: float,
+                        time_to_expiry: float, call_iv: float, put_iv: float, margin_required: float = None) -> Dict:
+        """Short strangle metrics for one call/put pair"""
+        # Both legs are sold at their last traded price
+        call_premium = call['call']['last_price']
+        put_premium = put['put']['last_price']
+        net_premium = call_premium + put_premium
+
+        # The trade makes money anywhere between the breakevens, not just between the strikes
+        prob_profit = self._estimate_strangle_probability(
+            spot_price, put['strike_price'] - net_premium, call['strike_price'] + net_premium,
+            time_to_expiry, call_iv, put_iv
+        )
+
+        # Calculate max profit and loss
+        max_profit = net_premium
+        max_loss = max((spot_price - put['strike_price']), (call['strike_price'] - spot_price)) - net_premium
+
+        # Calculate profit percentage (max profit as % of SPAN + exposure margin)
+        if margin_required is None:
+            margin_required = self.margin_engine.short_strangle_margin(
+                symbol, expiry_date, spot_price, time_to_expiry, call['strike_price'], call_iv, put['strike_price'], put_iv
+            )
+        profit_percentage = (max_profit / margin_required) * 100 if margin_required > 0 else 0
+
+        # Every pair is kept; profit and POP cuts are query filters (see high_probability_strategies)
+        return {
+            'strategy_type': 'Short Strangle',
+            'legs': [
+                {'action': 'SELL', 'type': 'PUT', 'strike': put['strike_price'], 'premium': put_premium},
+                {'action': 'SELL', 'type': 'CALL', 'strike': call['strike_price'], 'premium': call_premium}
+            ],
+            'probability_of_profit': prob_profit,
+            'net_premium': net_premium,
+            'max_profit': max_profit,
+            'max_loss': max_loss,
+            'profit_percentage': profit_percentage,
+            'margin_required': margin_required,
+            'call_iv': call_iv,
+            'put_iv': put_iv,
+            'strikes': [put['strike_price'], call['strike_price']],
+            'expiry_date': expiry_date,
+            'days_to_expiry': int(time_to_expiry * 365)
+        }
+
+    def _estimate_strangle_probability(self, spot: float, lower: float, upper: float,
                                      T: float, call_iv: float = None, put_iv: float = None) -> float:
+        """Probability (%) that spot finishes between `lower` and `upper`"""
         # Use average of call and put IV if available, otherwise historical volatility
         if call_iv and put_iv:
             sigma = (call_iv + put_iv) / 2
@@ -227,9 +237,9 @@ class OptionsAnalyzer:
             sigma = self._calculate_historical_volatility('SBICARD', days=30)
         
         std_dev = sigma * np.sqrt(T) * spot
-        z_lower = (put_strike - spot) / std_dev
-        z_upper = (call_strike - spot) / std_dev
-        return (norm.cdf(z_upper) - norm.cdf(z_lower)) * 100
+        z_lower = (lower - spot) / std_dev
+        z_upper = (upper - spot) / std_dev
+        return (norm_cdf(z_upper) - norm_cdf(z_lower)) * 100
 
     def _calculate_historical_volatility(self, symbol: str, days: int = 30) -> float:
         """Calculate historical volatility from past price data"""
@@ -251,20 +261,22 @@ class OptionsAnalyzer:
         return sorted(high_prob, key=lambda x: x.get('expected_return', 0), reverse=True)[:20]
 
     def _filter_high_probability_strangle_strategies(self, strategies: List[Dict]) -> List[Dict]:
-        # Only keep those with profit > 3% and probability > 85%
+        # Only keep those with profit >= 0.5% and probability >= 85%, inclusive like the /strategies bounds
         filtered = [s for s in strategies if 
-                   s.get('profit_percentage', 0) > 3.0 and
-                   s.get('probability_of_profit', 0) > 85]  # High quality strategies only
+                   s.get('profit_percentage', 0) >= self.MIN_PROFIT_PERCENTAGE and
+                   s.get('probability_of_profit', 0) >= self.MIN_PROBABILITY_OF_PROFIT]  # High quality strategies only
         # Sort by probability of profit descending (safety first)
         return sorted(filtered, key=lambda x: x['probability_of_profit'], reverse=True)
 
+    def _builds_strategies(self, symbol: str, time_to_expiry: float) -> bool:
+        # An expired chain has nothing left to sell
+        return symbol in self.SUPPORTED_SYMBOLS and time_to_expiry > 0
+
     def _calculate_time_to_expiry(self, expiry_date: str) -> float:
+        # Year fraction to the 15:30 IST close in the configured basis, refreshed by the calendar on a timer
         try:
-            expiry = datetime.strptime(expiry_date, '%Y-%m-%d')
-            now = datetime.now()
-            days_to_expiry = (expiry - now).days
-            return max(days_to_expiry / 365.0, 1/365)
-        except:
+            return self.calendar.year_fraction(expiry_date)
+        except (TypeError, ValueError):
             return 7/365
 
     def _calculate_implied_volatility(self, market_price: float, spot_price: float, strike: float, time_to_expiry: float, option_type: str) -> float:
@@ -273,55 +285,8 @@ class OptionsAnalyzer:
             self.risk_free_rate, option_type
         ) or 0.2
 
-    def _calculate_market_indicators(self, option_chain_data: Dict) -> Dict:
+    def _calculate_market_indicators(self, option_chain_data: Dict, time_to_expiry: float) -> Dict:
         try:
-            options = option_chain_data.get('options', [])
-            total_call_volume = sum(
-                opt.get('call', {}).get('volume', 0) for opt in options if 'call' in opt
-            )
-            total_put_volume = sum(
-                opt.get('put', {}).get('volume', 0) for opt in options if 'put' in opt
-            )
-            total_call_oi = sum(
-                opt.get('call', {}).get('open_interest', 0) for opt in options if 'call' in opt
-            )
-            total_put_oi = sum(
-                opt.get('put', {}).get('open_interest', 0) for opt in options if 'put' in opt
-            )
-            pcr_volume = total_put_volume / total_call_volume if total_call_volume > 0 else 1.0
-            pcr_oi = total_put_oi / total_call_oi if total_call_oi > 0 else 1.0
-            max_pain = self._calculate_max_pain(options)
-            return {
-                'pcr_volume': pcr_volume,
-                'pcr_oi': pcr_oi,
-                'total_call_volume': total_call_volume,
-                'total_put_volume': total_put_volume,
-                'total_call_oi': total_call_oi,
-                'total_put_oi': total_put_oi,
-                'max_pain': max_pain
-            }
+            return self.indicator_engine.compute(option_chain_data, time_to_expiry)
         except Exception as e:
             return {'error': str(e)}
-
-    def _calculate_max_pain(self, options: List[Dict]) -> float:
-        try:
-            strikes = [opt['strike_price'] for opt in options]
-            min_strike, max_strike = min(strikes), max(strikes)
-            max_pain_strike = min_strike
-            min_total_value = float('inf')
-            for strike in range(int(min_strike), int(max_strike) + 1, 25):
-                total_value = 0
-                for opt in options:
-                    opt_strike = opt['strike_price']
-                    if 'call' in opt and strike > opt_strike:
-                        call_oi = opt['call'].get('open_interest', 0)
-                        total_value += (strike - opt_strike) * call_oi
-                    if 'put' in opt and strike < opt_strike:
-                        put_oi = opt['put'].get('open_interest', 0)
-                        total_value += (opt_strike - strike) * put_oi
-                if total_value < min_total_value:
-                    min_total_value = total_value
-                    max_pain_strike = strike
-            return max_pain_strike
-        except:
-            return 0 
\ No newline at end of file
@@ -0,0 +1,323 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from .trading_calendar import TRADING_CALENDAR
+
+# What a full stage queue does with a new item
+BLOCK = "block"              # wait for room, pushing back on the upstream stage
+DROP_OLDEST = "drop_oldest"  # discard the item that has waited longest
+COALESCE = "coalesce"        # merge into a queued item with the same key, else block
+POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+THROUGHPUT_WINDOW = 60.0
+
+
+class PipelineDropped(Exception):
+    """The item was discarded by a stage queue's drop policy"""
+
+
+class PipelineItem:
+    """
+    One unit of work moving through the stages. `data` accumulates what each
+    stage produces; every submitter merged into the item waits on `waiters`.
+    `seq` orders results for the same key: a stage that fixes which data the
+    item carries (e.g. the fetch) sets it, and a later stage can then tell a
+    result that finished late from one that is really newer.
+    """
+    def __init__(self, key: str, data: Optional[Dict[str, Any]] = None):
+        self.key = key
+        self.data: Dict[str, Any] = data or {}
+        self.seq = 0
+        self.submitted_at = time.monotonic()
+        self.waiters: List[asyncio.Future] = []
+
+    def absorb(self, newer: "PipelineItem"):
+        """Take over a newer item for the same key: its data wins, everyone waits on the result"""
+        self.data = newer.data
+        self.seq = newer.seq
+        self.submitted_at = newer.submitted_at
+        self.waiters.extend(newer.waiters)
+
+    def resolve(self, result: Any):
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+    def fail(self, error: Exception):
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_exception(error)
+                # Fire-and-forget submitters never await their future
+                waiter.exception()
+
+
+class StageMetrics:
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.busy = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._completed: Deque[float] = deque()
+
+    def record(self, seconds: float):
+        now = time.monotonic()
+        self.processed += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self._completed.append(now)
+        while self._completed and self._completed[0] < now - THROUGHPUT_WINDOW:
+            self._completed.popleft()
+
+    def throughput(self) -> float:
+        """Items per second over the trailing window"""
+        now = time.monotonic()
+        while self._completed and self._completed[0] < now - THROUGHPUT_WINDOW:
+            self._completed.popleft()
+        return len(self._completed) / THROUGHPUT_WINDOW
+
+
+class StageQueue:
+    """Bounded FIFO in front of a stage, applying the stage's overflow policy"""
+    def __init__(self, maxsize: int, policy: str, metrics: StageMetrics):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy {policy!r}: expected one of {', '.join(POLICIES)}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.metrics = metrics
+        self._items: Deque[PipelineItem] = deque()
+        self._by_key: Dict[str, PipelineItem] = {}
+        self._changed = asyncio.Condition()
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, item: PipelineItem):
+        async with self._changed:
+            if self.closed:
+                item.fail(PipelineDropped(f"{item.key} dropped: pipeline stopped"))
+                return
+            if self.policy == COALESCE and item.key in self._by_key:
+                self._by_key[item.key].absorb(item)
+                self.metrics.coalesced += 1
+                return
+            if len(self._items) >= self.maxsize and self.policy == DROP_OLDEST:
+                dropped = self._items.popleft()
+                self._by_key.pop(dropped.key, None)
+                dropped.fail(PipelineDropped(f"{dropped.key} dropped: queue full"))
+                self.metrics.dropped += 1
+            while len(self._items) >= self.maxsize:
+                await self._changed.wait()
+                if self.closed:
+                    item.fail(PipelineDropped(f"{item.key} dropped: pipeline stopped"))
+                    return
+                # The queued twin may have been taken while we waited; re-check
+                if self.policy == COALESCE and item.key in self._by_key:
+                    self._by_key[item.key].absorb(item)
+                    self.metrics.coalesced += 1
+                    return
+            self._items.append(item)
+            if self.policy == COALESCE:
+                self._by_key[item.key] = item
+            self._changed.notify_all()
+
+    async def get(self) -> PipelineItem:
+        async with self._changed:
+            while not self._items:
+                await self._changed.wait()
+            item = self._items.popleft()
+            if self._by_key.get(item.key) is item:
+                del self._by_key[item.key]
+            self._changed.notify_all()
+            return item
+
+    async def close(self):
+        """Fail everything queued and release every put() still waiting for room"""
+        async with self._changed:
+            self.closed = True
+            for item in self._items:
+                item.fail(PipelineDropped(f"{item.key} dropped: pipeline stopped"))
+            self._items.clear()
+            self._by_key.clear()
+            self._changed.notify_all()
+
+
+class Stage:
+    """A named async step; `handler(item)` fills in `item.data`"""
+    def __init__(self, name: str, handler: Callable[[PipelineItem], Awaitable[Any]],
+                 concurrency: int = 1, queue_size: int = 32, policy: str = COALESCE):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.metrics = StageMetrics()
+        self.queue = StageQueue(queue_size, policy, self.metrics)
+
+
+class Pipeline:
+    """
+    Stages connected by bounded queues, each drained by `concurrency` worker
+    tasks. A worker hands its finished item to the next queue before taking
+    another, so a stalled stage fills its queue and then stalls the one before
+    it, unless that queue's policy drops or coalesces instead.
+    The last stage's return value resolves the submitter's future.
+    """
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self._tasks: List[asyncio.Task] = []
+        self._latest: Dict[str, asyncio.Future] = {}
+
+    def start(self):
+        if self._tasks:
+            return
+        for stage in self.stages:
+            stage.queue.closed = False
+        for i, stage in enumerate(self.stages):
+            downstream = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            for n in range(stage.concurrency):
+                self._tasks.append(asyncio.create_task(self._work(stage, downstream), name=f"pipeline-{stage.name}-{n}"))
+
+    async def stop(self):
+        """Cancel the workers, then fail queued items so no submitter waits forever"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for stage in self.stages:
+            await stage.queue.close()
+
+    async def submit(self, key: str, data: Optional[Dict[str, Any]] = None) -> asyncio.Future:
+        """Queue `key` at the first stage; the future resolves with the last stage's result"""
+        self.start()
+        item = PipelineItem(key, data)
+        future = asyncio.get_running_loop().create_future()
+        item.waiters.append(future)
+        self._latest[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        await self.stages[0].queue.put(item)
+        return future
+
+    def in_flight(self, key: str) -> Optional[asyncio.Future]:
+        """Most recent unfinished submission for `key`, if any"""
+        return self._latest.get(key)
+
+    def backlog(self) -> int:
+        return sum(len(stage.queue) + stage.metrics.busy for stage in self.stages)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'running': bool(self._tasks),
+            'in_flight': len(self._latest),
+            'stages': [
+                {
+                    'name': stage.name,
+                    'policy': stage.queue.policy,
+                    'concurrency': stage.concurrency,
+                    'queue_depth': len(stage.queue),
+                    'queue_size': stage.queue.maxsize,
+                    'busy': stage.metrics.busy,
+                    'processed': stage.metrics.processed,
+                    'errors': stage.metrics.errors,
+                    'dropped': stage.metrics.dropped,
+                    'coalesced': stage.metrics.coalesced,
+                    'throughput_per_s': round(stage.metrics.throughput(), 3),
+                    'avg_ms': round(stage.metrics.total_seconds / stage.metrics.processed * 1000, 2)
+                    if stage.metrics.processed else None,
+                    'max_ms': round(stage.metrics.max_seconds * 1000, 2),
+                }
+                for stage in self.stages
+            ],
+        }
+
+    async def _work(self, stage: Stage, downstream: Optional[Stage]):
+        while True:
+            item = await stage.queue.get()
+            stage.metrics.busy += 1
+            started = time.perf_counter()
+            try:
+                result = await stage.handler(item)
+            except asyncio.CancelledError:
+                item.fail(PipelineDropped(f"{item.key} cancelled in {stage.name}"))
+                raise
+            except Exception as e:
+                stage.metrics.errors += 1
+                item.fail(e)
+                continue
+            finally:
+                stage.metrics.busy -= 1
+            stage.metrics.record(time.perf_counter() - started)
+            if downstream is None:
+                item.resolve(result)
+                continue
+            try:
+                await downstream.queue.put(item)
+            except asyncio.CancelledError:
+                item.fail(PipelineDropped(f"{item.key} cancelled waiting for {downstream.name}"))
+                raise
+
+    def _forget(self, key: str, done: asyncio.Future):
+        if self._latest.get(key) is done:
+            del self._latest[key]
+
+
+class AdaptiveScheduler:
+    """
+    Per-key refresh intervals. Keys start at `base_interval` while the market
+    is open and `off_hours_interval` otherwise; an interval doubles (up to
+    `max_interval`) whenever a refresh took longer than half of it or the
+    pipeline is backed up, and eases back towards the base once it keeps up.
+    """
+    def __init__(self, base_interval: float, off_hours_interval: float, max_interval: float, backlog_limit: int = 8):
+        self.base_interval = base_interval
+        self.off_hours_interval = off_hours_interval
+        self.max_interval = max(max_interval, base_interval, off_hours_interval)
+        self.backlog_limit = backlog_limit
+        self._intervals: Dict[str, float] = {}
+        self._next_due: Dict[str, float] = {}
+
+    @staticmethod
+    def market_open(now: Optional[datetime] = None) -> bool:
+        return TRADING_CALENDAR.is_open(now)
+
+    def floor(self) -> float:
+        return self.base_interval if self.market_open() else self.off_hours_interval
+
+    def interval(self, key: str) -> float:
+        return max(self._intervals.get(key, 0.0), self.floor())
+
+    def due(self, keys: List[str]) -> List[str]:
+        now = time.monotonic()
+        return [key for key in keys if self._next_due.get(key, 0.0) <= now]
+
+    def retain(self, keys: List[str]):
+        """Forget keys nobody is interested in any more"""
+        for key in set(self._next_due) - set(keys):
+            self._next_due.pop(key, None)
+            self._intervals.pop(key, None)
+
+    def scheduled(self, key: str):
+        self._next_due[key] = time.monotonic() + self.interval(key)
+
+    def record(self, key: str, seconds: float, backlog: int):
+        """Adapt `key`'s interval after a refresh that took `seconds`"""
+        interval = self.interval(key)
+        if seconds > interval / 2 or backlog > self.backlog_limit:
+            interval = min(interval * 2, self.max_interval)
+        else:
+            interval = max(interval * 0.75, self.floor())
+        self._intervals[key] = interval
+
+    def seconds_until_next(self) -> float:
+        if not self._next_due:
+            return self.floor()
+        return max(0.0, min(self._next_due.values()) - time.monotonic())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'market_open': self.market_open(),
+            'intervals': {key: round(self.interval(key), 2) for key in sorted(self._next_due)},
+        }
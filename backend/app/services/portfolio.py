@@ -0,0 +1,178 @@
+import itertools
+import numpy as np
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple
+from ..models.portfolio import Position
+from .black_scholes import BlackScholesCalculator
+from .options_analyzer import OptionsAnalyzer
+
+DEFAULT_SPOT_SHOCKS = [-0.10, -0.07, -0.05, -0.03, -0.01, 0.0, 0.01, 0.03, 0.05, 0.07, 0.10]
+DEFAULT_VOL_SHOCKS = [-0.05, -0.02, 0.0, 0.02, 0.05]
+DEFAULT_DAYS_FORWARD = [0, 1, 3, 7]
+
+
+class PortfolioRiskEngine:
+    """
+    Holds open positions and evaluates their combined risk. Static leg data
+    (strikes, sides, quantities) is packed into arrays once per change to the
+    book; each refresh only supplies spots, expiries' year fractions and IVs, so
+    Greeks and the full scenario grid are single broadcasted NumPy evaluations
+    over every leg.
+    """
+    def __init__(self, options_analyzer: Optional[OptionsAnalyzer] = None):
+        self.bs_calculator = BlackScholesCalculator()
+        self.options_analyzer = options_analyzer or OptionsAnalyzer()
+        self.risk_free_rate = self.bs_calculator.risk_free_rate
+        self.positions: Dict[str, Position] = {}
+        self._ids = itertools.count(1)
+        self._legs: Optional[Dict[str, np.ndarray]] = None
+
+    # ------------------------------------------------------------- positions
+
+    def add_position(self, position: Position) -> Position:
+        position.id = position.id or str(next(self._ids))
+        for leg in position.legs:
+            leg.symbol = leg.symbol.upper()
+            leg.type = leg.type.upper()
+            leg.action = leg.action.upper()
+            if leg.type not in ('CE', 'PE') or leg.action not in ('BUY', 'SELL'):
+                raise ValueError(f"Invalid leg {leg.type} {leg.action}: expected CE/PE and BUY/SELL")
+            try:
+                date.fromisoformat(leg.expiry)
+            except ValueError:
+                raise ValueError(f"Invalid expiry {leg.expiry!r}: expected YYYY-MM-DD")
+        self.positions[position.id] = position
+        self._legs = None
+        return position
+
+    def remove_position(self, position_id: str) -> bool:
+        removed = self.positions.pop(position_id, None) is not None
+        if removed:
+            self._legs = None
+        return removed
+
+    def chain_keys(self) -> List[Tuple[str, str]]:
+        """(symbol, expiry) pairs whose chains are needed to mark the book"""
+        return sorted({(leg.symbol, leg.expiry) for p in self.positions.values() for leg in p.legs})
+
+    # ---------------------------------------------------------------- pricing
+
+    def greeks(self, chains: Dict[Tuple[str, str], Dict]) -> Dict[str, Any]:
+        """Net delta, gamma, vega and theta across all legs, in total and per underlying"""
+        legs = self._leg_arrays()
+        if not len(legs['strike']):
+            return {'legs': 0, 'total': self._empty_totals(), 'by_symbol': {}}
+        spot, T, sigma, mark = self._market_inputs(legs, chains)
+        greeks = self.bs_calculator.greeks_vectorized(spot, legs['strike'], T, self.risk_free_rate, sigma, legs['is_call'])
+        qty = legs['signed_quantity']
+        exposures = {
+            'delta': greeks['delta'] * qty,
+            'gamma': greeks['gamma'] * qty,
+            'vega': greeks['vega'] * qty,
+            'theta': greeks['theta'] * qty,
+            'market_value': mark * qty,
+            'unrealized_pnl': (mark - legs['premium']) * qty,
+        }
+        n_symbols = len(legs['symbols'])
+        by_symbol = {name: np.bincount(legs['symbol_code'], weights=values, minlength=n_symbols)
+                     for name, values in exposures.items()}
+        return {
+            'legs': int(len(qty)),
+            'total': {name: float(values.sum()) for name, values in exposures.items()},
+            'by_symbol': {
+                symbol: {name: float(values[i]) for name, values in by_symbol.items()}
+                for i, symbol in enumerate(legs['symbols'])
+            },
+        }
+
+    def scenario_grid(self, chains: Dict[Tuple[str, str], Dict], spot_shocks: Optional[List[float]] = None,
+                      vol_shocks: Optional[List[float]] = None, days_forward: Optional[List[float]] = None) -> Dict[str, Any]:
+        """
+        Book P&L for every spot shock (relative) x vol shock (absolute vol points)
+        x days forward, evaluated as one (spot, vol, time, leg) broadcast.
+        """
+        spot_shocks = np.asarray(spot_shocks if spot_shocks is not None else DEFAULT_SPOT_SHOCKS, dtype=float)
+        vol_shocks = np.asarray(vol_shocks if vol_shocks is not None else DEFAULT_VOL_SHOCKS, dtype=float)
+        days_forward = np.asarray(days_forward if days_forward is not None else DEFAULT_DAYS_FORWARD, dtype=float)
+        legs = self._leg_arrays()
+        axes = {'spot_shocks': spot_shocks.tolist(), 'vol_shocks': vol_shocks.tolist(), 'days_forward': days_forward.tolist()}
+        if not len(legs['strike']):
+            return {**axes, 'pnl': np.zeros((len(spot_shocks), len(vol_shocks), len(days_forward))).tolist()}
+
+        spot, T, sigma, mark = self._market_inputs(legs, chains)
+        shocked_spot = spot * (1 + spot_shocks[:, None, None, None])
+        shocked_sigma = np.maximum(sigma + vol_shocks[None, :, None, None], 0.01)
+        shocked_T = np.maximum(T - days_forward[None, None, :, None] / 365, 0.0)
+        prices = self.bs_calculator.price_vectorized(
+            shocked_spot, legs['strike'], shocked_T, self.risk_free_rate, shocked_sigma, legs['is_call']
+        )
+        pnl = ((prices - mark) * legs['signed_quantity']).sum(axis=-1)
+        return {**axes, 'pnl': pnl.tolist()}
+
+    # --------------------------------------------------------------- helpers
+
+    def _leg_arrays(self) -> Dict[str, np.ndarray]:
+        """Static per-leg arrays, rebuilt only when the book changes"""
+        if self._legs is None:
+            legs = [leg for p in self.positions.values() for leg in p.legs]
+            symbols = sorted({leg.symbol for leg in legs})
+            codes = {symbol: i for i, symbol in enumerate(symbols)}
+            self._legs = {
+                'symbols': symbols,
+                'symbol': np.array([leg.symbol for leg in legs], dtype=object),
+                'symbol_code': np.array([codes[leg.symbol] for leg in legs], dtype=np.int64),
+                'expiry': np.array([leg.expiry for leg in legs], dtype=object),
+                'strike': np.array([leg.strike for leg in legs], dtype=float),
+                'is_call': np.array([leg.type == 'CE' for leg in legs], dtype=bool),
+                'signed_quantity': np.array(
+                    [leg.quantity * (1 if leg.action == 'BUY' else -1) for leg in legs], dtype=float
+                ),
+                'premium': np.array([leg.premium for leg in legs], dtype=float),
+                'iv_override': np.array([leg.iv if leg.iv else np.nan for leg in legs], dtype=float),
+            }
+        return self._legs
+
+    def _market_inputs(self, legs: Dict[str, np.ndarray], chains: Dict[Tuple[str, str], Dict]):
+        """Spot, year fraction, volatility and mark price per leg from the latest chains"""
+        n = len(legs['strike'])
+        spot = np.empty(n)
+        # Every leg's year fraction in one lookup against the shared calendar cache
+        T = self.options_analyzer.calendar.year_fractions(legs['expiry']) if n else np.empty(0)
+        mark = np.full(n, np.nan)
+        for (symbol, expiry), chain in chains.items():
+            rows = (legs['symbol'] == symbol) & (legs['expiry'] == expiry)
+            if not rows.any():
+                continue
+            spot[rows] = chain.get('underlying_value', 0)
+            quotes = {}
+            for option in chain.get('options', []):
+                for side, is_call in (('call', True), ('put', False)):
+                    if option.get(side):
+                        quotes[(option['strike_price'], is_call)] = option[side].get('last_price', 0)
+            idx = np.flatnonzero(rows)
+            mark[idx] = [quotes.get((k, c), np.nan) for k, c in zip(legs['strike'][idx], legs['is_call'][idx])]
+
+        missing = set(zip(legs['symbol'], legs['expiry'])) - set(chains)
+        if missing:
+            raise ValueError(f"No market data for {sorted(missing)}")
+        # A source that does not list the expiry falls back to its nearest one; never mark legs against that
+        mismatched = sorted(
+            f"{symbol} {expiry} (chain is for {chain.get('expiry_date')})"
+            for (symbol, expiry), chain in chains.items() if chain.get('expiry_date') != expiry
+        )
+        if mismatched:
+            raise ValueError(f"No chain for the legs' expiry: {', '.join(mismatched)}")
+
+        market_iv = self.bs_calculator.implied_volatility_vectorized(
+            np.nan_to_num(mark), spot, legs['strike'], T, self.risk_free_rate, legs['is_call']
+        )
+        sigma = np.where(np.isnan(legs['iv_override']), market_iv, legs['iv_override'])
+        sigma = np.where(np.isnan(sigma), 0.2, sigma)
+        # Strikes missing from the chain are marked at the model price
+        model = self.bs_calculator.price_vectorized(spot, legs['strike'], T, self.risk_free_rate, sigma, legs['is_call'])
+        mark = np.where(np.isnan(mark), model, mark)
+        return spot, T, sigma, mark
+
+    @staticmethod
+    def _empty_totals() -> Dict[str, float]:
+        return {name: 0.0 for name in ('delta', 'gamma', 'vega', 'theta', 'market_value', 'unrealized_pnl')}
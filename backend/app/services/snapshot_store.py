@@ -0,0 +1,278 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Header of a snapshot file: seqlock counter, snapshot version, payload length
+HEADER = struct.Struct("<QQQ")
+MAX_READ_ATTEMPTS = 1000
+
+
+class SnapshotStore:
+    """
+    Versioned byte snapshots shared between the leader that publishes them and
+    every worker that reads them. `read` is cheap when the caller already holds
+    the current version, which is the common case between refreshes.
+    Interest older than `interests`' max_age is dropped, not just skipped.
+    """
+    # True when calls wait on the network; the service then makes them off the event loop
+    blocking = False
+
+    def publish(self, key: str, payload: bytes) -> int:
+        raise NotImplementedError
+
+    def read(self, key: str, known_version: int = 0) -> Optional[Tuple[int, Optional[bytes]]]:
+        """(version, payload) for `key`; payload is None when `known_version` is still current"""
+        raise NotImplementedError
+
+    def register_interest(self, key: str):
+        """Ask the leader to keep `key` fresh"""
+        raise NotImplementedError
+
+    def interests(self, max_age: float) -> List[str]:
+        raise NotImplementedError
+
+    def try_acquire_leadership(self) -> bool:
+        """Become (or stay) the single publisher; safe to call repeatedly"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemorySnapshotStore(SnapshotStore):
+    """Single-process store; the only worker is always the leader"""
+    def __init__(self):
+        self._snapshots: Dict[str, Tuple[int, bytes]] = {}
+        self._interests: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, key: str, payload: bytes) -> int:
+        with self._lock:
+            version = self._snapshots.get(key, (0, b""))[0] + 1
+            self._snapshots[key] = (version, payload)
+        return version
+
+    def read(self, key: str, known_version: int = 0) -> Optional[Tuple[int, Optional[bytes]]]:
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            return None
+        version, payload = snapshot
+        return version, (None if version == known_version else payload)
+
+    def register_interest(self, key: str):
+        with self._lock:
+            self._interests[key] = time.time()
+
+    def interests(self, max_age: float) -> List[str]:
+        cutoff = time.time() - max_age
+        with self._lock:
+            for key in [key for key, seen in self._interests.items() if seen < cutoff]:
+                del self._interests[key]
+            return list(self._interests)
+
+    def try_acquire_leadership(self) -> bool:
+        return True
+
+
+class MmapSnapshotStore(SnapshotStore):
+    """
+    One memory-mapped file per key under `directory`, shared by every worker on
+    the host. Writers follow a seqlock: bump the counter to odd, write payload,
+    length and version, bump it back to even. Readers retry until they see the
+    same even counter before and after copying, and skip the copy entirely when
+    the version they already hold is current. Leadership is an flock on a lock
+    file, released by the kernel if the leader dies.
+    """
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        (self.directory / "interest").mkdir(parents=True, exist_ok=True)
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._files: Dict[str, int] = {}
+        self._lock_fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def publish(self, key: str, payload: bytes) -> int:
+        with self._lock:
+            mm = self._map(key, HEADER.size + len(payload))
+            seq, version, _ = HEADER.unpack_from(mm, 0)
+            struct.pack_into("<Q", mm, 0, seq + 1)
+            mm[HEADER.size:HEADER.size + len(payload)] = payload
+            HEADER.pack_into(mm, 0, seq + 1, version + 1, len(payload))
+            struct.pack_into("<Q", mm, 0, seq + 2)
+            return version + 1
+
+    def read(self, key: str, known_version: int = 0) -> Optional[Tuple[int, Optional[bytes]]]:
+        with self._lock:
+            return self._read(key, known_version)
+
+    def _read(self, key: str, known_version: int) -> Optional[Tuple[int, Optional[bytes]]]:
+        for _ in range(MAX_READ_ATTEMPTS):
+            mm = self._map(key)
+            if mm is None:
+                return None
+            seq, version, length = HEADER.unpack_from(mm, 0)
+            if seq % 2:
+                time.sleep(0)
+                continue
+            if version == 0:
+                return None
+            if version == known_version:
+                payload = None
+            elif HEADER.size + length > len(mm):
+                # The writer grew the file since we mapped it
+                self._remap(key)
+                continue
+            else:
+                # The one copy a reader makes per version: the seqlock only
+                # vouches for bytes taken between the two counter reads
+                payload = mm[HEADER.size:HEADER.size + length]
+            if struct.unpack_from("<Q", mm, 0)[0] == seq:
+                return version, payload
+        raise TimeoutError(f"Snapshot {key} kept changing while being read")
+
+    def register_interest(self, key: str):
+        (self.directory / "interest" / self._filename(key)).touch()
+
+    def interests(self, max_age: float) -> List[str]:
+        cutoff = time.time() - max_age
+        keys = []
+        for path in (self.directory / "interest").iterdir():
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    keys.append(path.name.replace("__", "/"))
+                else:
+                    path.unlink()
+            except FileNotFoundError:
+                # Another worker's leader pass removed it first
+                continue
+        return keys
+
+    def try_acquire_leadership(self) -> bool:
+        import fcntl
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.directory / "leader.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def close(self):
+        for mm in self._maps.values():
+            mm.close()
+        for fd in self._files.values():
+            os.close(fd)
+        self._maps.clear()
+        self._files.clear()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _map(self, key: str, min_size: int = 0) -> Optional[mmap.mmap]:
+        """Map the file for `key`; only the writer passes `min_size`, to create or grow it"""
+        mm = self._maps.get(key)
+        if mm is not None and len(mm) >= min_size:
+            return mm
+        if key not in self._files:
+            path = self.directory / f"{self._filename(key)}.snap"
+            if not min_size and not path.exists():
+                return None
+            self._files[key] = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fd = self._files[key]
+        size = os.fstat(fd).st_size
+        if min_size and size < min_size:
+            # Grow geometrically so steady-state publishes never resize; growing
+            # leaves existing bytes, and therefore concurrent readers, untouched
+            size = max(min_size * 2, HEADER.size + 4096)
+            os.ftruncate(fd, size)
+        if size < HEADER.size:
+            return None
+        if mm is not None:
+            mm.close()
+        self._maps[key] = mmap.mmap(fd, size)
+        return self._maps[key]
+
+    def _remap(self, key: str):
+        mm = self._maps.pop(key, None)
+        if mm is not None:
+            mm.close()
+
+    @staticmethod
+    def _filename(key: str) -> str:
+        return key.replace("/", "__")
+
+
+class RedisSnapshotStore(SnapshotStore):
+    """
+    Redis (or any Redis-compatible server) backend for workers spread across
+    hosts. Each key is a hash holding version and payload, written in one
+    MULTI/EXEC so readers never see a torn pair.
+    """
+    blocking = True
+    LEADER_KEY = "snapshots:leader"
+    INTEREST_KEY = "snapshots:interest"
+    RENEW_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+
+    def __init__(self, url: str, leader_ttl_ms: int = 15000):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("SNAPSHOT_BACKEND=redis requires the 'redis' package") from e
+        self.client = redis.Redis.from_url(url)
+        self.leader_ttl_ms = leader_ttl_ms
+        self.worker_id = f"{os.uname().nodename}:{os.getpid()}"
+
+    def publish(self, key: str, payload: bytes) -> int:
+        # Bump and write in the same MULTI/EXEC so concurrent publishers can
+        # never leave a payload paired with another publish's version
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hincrby(f"snapshots:{key}", "version", 1)
+        pipe.hset(f"snapshots:{key}", "payload", payload)
+        version, _ = pipe.execute()
+        return int(version)
+
+    def read(self, key: str, known_version: int = 0) -> Optional[Tuple[int, Optional[bytes]]]:
+        version = self.client.hget(f"snapshots:{key}", "version")
+        if version is None:
+            return None
+        if int(version) == known_version:
+            return known_version, None
+        version, payload = self.client.hmget(f"snapshots:{key}", "version", "payload")
+        return int(version), payload
+
+    def register_interest(self, key: str):
+        self.client.zadd(self.INTEREST_KEY, {key: time.time()})
+
+    def interests(self, max_age: float) -> List[str]:
+        cutoff = time.time() - max_age
+        self.client.zremrangebyscore(self.INTEREST_KEY, 0, cutoff)
+        return [key.decode() for key in self.client.zrangebyscore(self.INTEREST_KEY, cutoff, "+inf")]
+
+    def try_acquire_leadership(self) -> bool:
+        if self.client.set(self.LEADER_KEY, self.worker_id, nx=True, px=self.leader_ttl_ms):
+            return True
+        return bool(self.client.eval(self.RENEW_SCRIPT, 1, self.LEADER_KEY, self.worker_id, self.leader_ttl_ms))
+
+    def close(self):
+        self.client.close()
+
+
+def create_snapshot_store(backend: str, directory: str = "", redis_url: str = "") -> SnapshotStore:
+    backend = backend.lower()
+    if backend == "memory":
+        return MemorySnapshotStore()
+    if backend == "mmap":
+        return MmapSnapshotStore(directory)
+    if backend == "redis":
+        return RedisSnapshotStore(redis_url)
+    raise ValueError(f"Unknown SNAPSHOT_BACKEND {backend!r}: expected memory, mmap or redis")
@@ -0,0 +1,431 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from functools import partial
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
+from .snapshot_store import SnapshotStore
+from .nse_scraper import NSEScraper
+from .options_analyzer import OptionsAnalyzer
+from .ml_predictor import MLPredictor
+from .market_data import get_market_data
+from .pipeline import AdaptiveScheduler, BLOCK, COALESCE, Pipeline, PipelineItem, Stage
+from .strategy_index import StrategyIndex
+from .export import SnapshotColumns, snapshot_columns
+from .trading_calendar import IST, expiry_close
+from ..utils.compression import MIN_COMPRESS_BYTES, compress
+
+# Rendered response bodies kept per snapshot (one per distinct query)
+MAX_CACHED_BODIES = 64
+# Queue policy per pipeline stage unless configured; publish pushes back rather than dropping
+DEFAULT_QUEUE_POLICIES = {'publish': BLOCK}
+
+
+class UnknownChain(ValueError):
+    """A request named a symbol or expiry there is no option chain for"""
+
+
+class Snapshot:
+    """One published option chain and its analysis, decoded once per worker"""
+    def __init__(self, key: str, version: int, data: Dict[str, Any]):
+        self.key = key
+        self.version = version
+        self.symbol = data['symbol']
+        self.expiry = data['expiry']
+        self.created_at = data['created_at']
+        self.chain = data['chain']
+        self.analysis = data['analysis']
+        self.predictions: List[float] = data.get('predictions', [])
+        self.market_data: Dict[str, Any] = data.get('market_data', {})
+        self._strategy_index: Optional[StrategyIndex] = None
+        self._bodies: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._frames: Dict[str, Any] = {}
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    @property
+    def strategy_index(self) -> StrategyIndex:
+        """Built on first query and kept for the lifetime of this snapshot"""
+        if self._strategy_index is None:
+            self._strategy_index = StrategyIndex(
+                self.analysis.get('strategies', []), self.analysis.get('spot_price', 0)
+            )
+        return self._strategy_index
+
+    def etag(self, variant: str = "", encoding: str = "identity") -> str:
+        """
+        Changes whenever the snapshot does; `variant` distinguishes differently
+        queried views of it and `encoding` the content codings of one view, so
+        a strong tag never names two different byte sequences
+        """
+        digest = hashlib.blake2b(f"{self.key}|{variant}".encode(), digest_size=6).hexdigest()
+        coding = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.version:x}-{int(self.created_at * 1e6):x}-{digest}{coding}"'
+
+    def coding(self, variant: str, encoding: str, render: Callable[[], Tuple[Any, Dict[str, str]]]) -> str:
+        """The content coding body() will use for `encoding`: identity when the body is too small to compress"""
+        if encoding != 'identity' and len(self._entry(variant, render)['identity']) < MIN_COMPRESS_BYTES:
+            return 'identity'
+        return encoding
+
+    def body(self, variant: str, encoding: str, render: Callable[[], Tuple[Any, Dict[str, str]]]) -> Tuple[bytes, str, Dict[str, str]]:
+        """
+        (body, content coding, extra headers) for one view of this snapshot.
+        `render` returns the JSON-able content and its headers; it runs once per
+        variant, and each content coding is compressed once and then reused.
+        """
+        entry = self._entry(variant, render)
+        encoding = self.coding(variant, encoding, render)
+        if encoding not in entry:
+            entry[encoding] = compress(entry['identity'], encoding)
+        return entry[encoding], encoding, entry['headers']
+
+    def _entry(self, variant: str, render: Callable[[], Tuple[Any, Dict[str, str]]]) -> Dict[str, Any]:
+        entry = self._bodies.get(variant)
+        if entry is None:
+            content, headers = render()
+            entry = {'headers': headers, 'identity': json.dumps(content, default=_json_default).encode()}
+            self._bodies[variant] = entry
+            while len(self._bodies) > MAX_CACHED_BODIES:
+                self._bodies.popitem(last=False)
+        else:
+            self._bodies.move_to_end(variant)
+        return entry
+
+    def frame(self, encoding: str, encode: Callable[[], Any]) -> Any:
+        """WebSocket frame payload in `encoding`, encoded once and shared by every connection"""
+        frame = self._frames.get(encoding)
+        if frame is None:
+            frame = self._frames[encoding] = encode()
+        return frame
+
+    def columns(self) -> SnapshotColumns:
+        return snapshot_columns(
+            self.symbol, self.expiry, self.created_at, self.chain, self.analysis, self.strategy_index.columns
+        )
+
+
+class SnapshotService:
+    """
+    Serves chain + analysis snapshots to every worker. Whichever worker holds
+    the store's leadership refreshes the snapshots that any worker has asked
+    for recently and publishes them; all other workers only read. A worker
+    that finds nothing fresh enough (cold start, leader behind) builds the
+    snapshot itself so requests never wait on the leader.
+
+    Builds run through a pipeline of bounded async stages
+    (fetch -> parse -> analyze -> score -> serialize -> publish) whose queues
+    coalesce repeated work for the same key, and the leader's refresh rate per
+    key adapts to market hours and to how far behind the pipeline is.
+    """
+    def __init__(self, store: SnapshotStore, nse_scraper: NSEScraper, options_analyzer: OptionsAnalyzer,
+                 ml_predictor: MLPredictor, refresh_interval: float = 5.0, max_age: float = 30.0,
+                 interest_ttl: float = 300.0, off_hours_interval: float = 60.0, max_interval: float = 120.0,
+                 queue_size: int = 32, fetch_concurrency: int = 4, analyze_concurrency: int = 2,
+                 history_size: int = 120, queue_sizes: Optional[Dict[str, int]] = None,
+                 queue_policies: Optional[Dict[str, str]] = None):
+        self.store = store
+        self.nse_scraper = nse_scraper
+        self.options_analyzer = options_analyzer
+        self.ml_predictor = ml_predictor
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.interest_ttl = interest_ttl
+        self.is_leader = False
+        self._decoded: Dict[str, Snapshot] = {}
+        # key -> (version, decode task) while a payload is being parsed
+        self._decoding: Dict[str, Tuple[int, asyncio.Future]] = {}
+        self._local: Dict[str, Snapshot] = {}
+        self._interest_sent: Dict[str, float] = {}
+        # (created_at, columnar copy being built off the event loop) for the last
+        # `history_size` snapshots per key this worker has seen, for export
+        self.history_size = history_size
+        self._history: Dict[str, Deque[Tuple[float, asyncio.Future]]] = {}
+        # Fetch order per key; a build that finishes after a newer one is dropped at publish
+        self._fetch_seq = itertools.count(1)
+        self._published_seq: Dict[str, int] = {}
+        self.stale_dropped = 0
+        self._refresher: Optional[asyncio.Task] = None
+        self.scheduler = AdaptiveScheduler(refresh_interval, off_hours_interval, max_interval, backlog_limit=queue_size)
+        stages = [
+            ('fetch', self._fetch, fetch_concurrency),
+            ('parse', self._parse, 1),
+            ('analyze', self._analyze, analyze_concurrency),
+            ('score', self._score, 1),
+            ('serialize', self._serialize, 1),
+            ('publish', self._publish, 1),
+        ]
+        sizes, policies = queue_sizes or {}, dict(DEFAULT_QUEUE_POLICIES, **(queue_policies or {}))
+        unknown = (set(sizes) | set(policies)) - {name for name, _, _ in stages}
+        if unknown:
+            raise ValueError(f"Unknown pipeline stage {', '.join(sorted(unknown))}: expected one of "
+                             f"{', '.join(name for name, _, _ in stages)}")
+        self.pipeline = Pipeline([
+            Stage(name, handler, concurrency, sizes.get(name, queue_size), policies.get(name, COALESCE))
+            for name, handler, concurrency in stages
+        ])
+
+    @staticmethod
+    def key(symbol: str, expiry: str = "") -> str:
+        return f"chain/{symbol.upper()}/{expiry or 'nearest'}"
+
+    @staticmethod
+    def parse_key(key: str) -> Tuple[str, str]:
+        _, symbol, expiry = key.split("/", 2)
+        return symbol, "" if expiry == "nearest" else expiry
+
+    async def get(self, symbol: str, expiry: str = "") -> Snapshot:
+        """Snapshot of `symbol`'s chain for `expiry` (nearest when empty); raises UnknownChain for anything unlisted"""
+        return await self._get(await self.resolve(symbol, expiry))
+
+    async def resolve(self, symbol: str, expiry: str = "") -> str:
+        """
+        Key of the chain a request refers to. Keys are only ever built from a
+        known symbol and an expiry its nearest chain lists, so arbitrary
+        request strings cannot create refresh work, store files or history.
+        """
+        symbol = symbol.upper()
+        if symbol not in self.nse_scraper.INDICES | self.nse_scraper.STOCKS:
+            raise UnknownChain(f"Unknown symbol {symbol}")
+        nearest = self.key(symbol)
+        if not expiry:
+            return nearest
+        try:
+            expiry = expiry_close(expiry).date().isoformat()
+        except (TypeError, ValueError):
+            raise UnknownChain(f"Invalid expiry {expiry!r}: expected YYYY-MM-DD")
+        listed = (await self._get(nearest)).chain.get('expiry_dates', [])
+        if expiry not in listed:
+            raise UnknownChain(f"{symbol} has no listed expiry {expiry}")
+        # The nearest listed expiry is the chain the nearest key already builds
+        return nearest if expiry == listed[0] else self.key(symbol, expiry)
+
+    async def _get(self, key: str) -> Snapshot:
+        self.start()
+        await self._register_interest(key)
+        snapshot = await self.read(key)
+        # A key the scheduler has backed off (off hours, overload) is allowed to age accordingly
+        if snapshot is not None and snapshot.age <= max(self.max_age, 1.5 * self.scheduler.interval(key)):
+            return snapshot
+        # Join a build already under way for this key rather than starting another
+        build = self.pipeline.in_flight(key) or await self.pipeline.submit(key)
+        try:
+            return await asyncio.shield(build)
+        except Exception:
+            if snapshot is None:
+                raise
+            return snapshot
+
+    async def read(self, key: str) -> Optional[Snapshot]:
+        """
+        Latest snapshot for `key`. The store only hands over a payload when its
+        version is newer than the one this worker holds or is decoding, and
+        each version is decoded once, off the event loop, however many
+        requests are waiting for it.
+        """
+        cached = self._decoded.get(key)
+        decoding = self._decoding.get(key)
+        known = decoding[0] if decoding else (cached.version if cached else 0)
+        result = await self._call_store(self.store.read, key, known)
+        if result is not None:
+            version, payload = result
+            if payload is not None:
+                decoding = self._decoding[key] = (version, asyncio.ensure_future(self._decode(key, version, payload)))
+            if decoding is not None and decoding[0] == version:
+                cached = await asyncio.shield(decoding[1])
+        local = self._local.get(key)
+        if local is not None and (cached is None or local.created_at > cached.created_at):
+            return local
+        return cached
+
+    async def _decode(self, key: str, version: int, payload: bytes) -> Snapshot:
+        try:
+            snapshot = Snapshot(key, version, await asyncio.to_thread(json.loads, payload))
+        finally:
+            if self._decoding.get(key, (None,))[0] == version:
+                del self._decoding[key]
+        current = self._decoded.get(key)
+        # Store versions only grow, so a slower decode of an older one must not win
+        if current is None or current.version < version:
+            self._decoded[key] = snapshot
+            self._remember(snapshot)
+        return snapshot
+
+    async def run(self):
+        """Leader loop: keep every recently requested snapshot fresh"""
+        while True:
+            try:
+                self.is_leader = await self._call_store(self.store.try_acquire_leadership)
+                keys = []
+                if self.is_leader:
+                    keys = await self._call_store(self.store.interests, self.interest_ttl)
+                    self.scheduler.retain(keys)
+                    for key in self.scheduler.due(keys):
+                        self.scheduler.scheduled(key)
+                        build = await self.pipeline.submit(key)
+                        build.add_done_callback(partial(self._refreshed, key, time.monotonic()))
+                self._expire(keys)
+            except Exception as e:
+                print(f"Snapshot refresh failed: {e}")
+            # Wake for the next due key, but re-check leadership at least every refresh_interval
+            await asyncio.sleep(min(max(self.scheduler.seconds_until_next(), 0.1), self.refresh_interval))
+
+    def start(self):
+        """Start the leader loop once something has asked for a snapshot"""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self.run(), name="snapshot-refresher")
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+        await self.pipeline.stop()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'leader': self.is_leader,
+            'stale_dropped': self.stale_dropped,
+            'pipeline': self.pipeline.metrics(),
+            'scheduler': self.scheduler.snapshot(),
+        }
+
+    def _refreshed(self, key: str, started: float, build: asyncio.Future):
+        self.scheduler.record(key, time.monotonic() - started, self.pipeline.backlog())
+
+    async def _fetch(self, item: PipelineItem):
+        symbol, _ = self.parse_key(item.key)
+        item.data['raw'] = await self.nse_scraper.fetch_raw(symbol)
+        item.seq = next(self._fetch_seq)
+
+    async def _parse(self, item: PipelineItem):
+        symbol, expiry = self.parse_key(item.key)
+        item.data['chain'] = await asyncio.to_thread(self.nse_scraper.parse, symbol, item.data.pop('raw'), expiry)
+
+    async def _analyze(self, item: PipelineItem):
+        item.data['analysis'] = await asyncio.to_thread(self.options_analyzer.analyze_option_chain, item.data['chain'])
+
+    async def _score(self, item: PipelineItem):
+        analysis = item.data['analysis']
+        item.data['predictions'] = await asyncio.to_thread(
+            self.ml_predictor.predict_probabilities, analysis.get('strategies', [])
+        )
+        symbol, _ = self.parse_key(item.key)
+        item.data['market_data'] = get_market_data(symbol, analysis.get('market_indicators', {})).dict()
+
+    async def _serialize(self, item: PipelineItem):
+        symbol, expiry = self.parse_key(item.key)
+        chain = item.data.pop('chain')
+        item.data = {
+            'symbol': symbol,
+            'expiry': chain.get('expiry_date', expiry),
+            'created_at': time.time(),
+            'chain': chain,
+            **item.data,
+        }
+        # Only the leader shares its snapshots, so only the leader pays for encoding them
+        if self.is_leader:
+            item.data['payload'] = await asyncio.to_thread(
+                lambda data: json.dumps(data, default=_json_default).encode(), item.data
+            )
+
+    async def _publish(self, item: PipelineItem) -> Snapshot:
+        # Analysis runs concurrently, so an older fetch can get here last; keep the newer result
+        if item.seq < self._published_seq.get(item.key, 0):
+            current = self._latest(item.key)
+            if current is not None:
+                self.stale_dropped += 1
+                return current
+        self._published_seq[item.key] = item.seq
+        payload = item.data.pop('payload', None)
+        if payload is not None:
+            snapshot = Snapshot(item.key, await self._call_store(self.store.publish, item.key, payload), item.data)
+            self._decoded[item.key] = snapshot
+        else:
+            snapshot = Snapshot(item.key, 0, item.data)
+            self._local[item.key] = snapshot
+        self._remember(snapshot)
+        return snapshot
+
+    def _latest(self, key: str) -> Optional[Snapshot]:
+        decoded, local = self._decoded.get(key), self._local.get(key)
+        if decoded is None or (local is not None and local.created_at > decoded.created_at):
+            return local
+        return decoded
+
+    async def history(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> List[SnapshotColumns]:
+        """
+        Retained snapshots, oldest first, optionally limited to `symbols` and
+        [start, end]. Naive bounds are market (IST) time, not server local time.
+        History is per worker: it holds what this worker built or decoded, and
+        is not shared through the snapshot store.
+        """
+        wanted = {symbol.upper() for symbol in symbols} if symbols else None
+        low = _market_time(start).timestamp() if start else float('-inf')
+        high = _market_time(end).timestamp() if end else float('inf')
+        picked = sorted(
+            (
+                (created_at, columns)
+                for key, retained in list(self._history.items())
+                if wanted is None or self.parse_key(key)[0] in wanted
+                for created_at, columns in retained
+                if low <= created_at <= high
+            ),
+            key=lambda entry: entry[0],
+        )
+        # Shielded: a cancelled export must not cancel builds other requests share
+        built = await asyncio.gather(*(asyncio.shield(columns) for _, columns in picked), return_exceptions=True)
+        return [columns for columns in built if isinstance(columns, SnapshotColumns)]
+
+    def _remember(self, snapshot: Snapshot):
+        if self.history_size <= 0:
+            return
+        retained = self._history.setdefault(snapshot.key, deque(maxlen=self.history_size))
+        if not retained or retained[-1][0] < snapshot.created_at:
+            # Flattening the chain and indexing strategies takes milliseconds; keep it off the event loop
+            columns = asyncio.ensure_future(asyncio.to_thread(snapshot.columns))
+            columns.add_done_callback(_report_columns_error)
+            retained.append((snapshot.created_at, columns))
+
+    async def _register_interest(self, key: str):
+        # Interest only needs to outlive interest_ttl, so don't hit the store on every request
+        now = time.time()
+        if now - self._interest_sent.get(key, 0) > self.interest_ttl / 4:
+            await self._call_store(self.store.register_interest, key)
+            self._interest_sent[key] = now
+
+    def _expire(self, wanted: List[str]):
+        """Drop per-key state for keys neither this worker nor (as leader) any other has asked for lately"""
+        cutoff = time.time() - self.interest_ttl
+        keep = set(wanted) | {key for key, sent in self._interest_sent.items() if sent >= cutoff}
+        for table in (self._interest_sent, self._decoded, self._local, self._history, self._published_seq):
+            for key in [key for key in table if key not in keep]:
+                del table[key]
+
+    async def _call_store(self, method: Callable, *args):
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+
+def _market_time(value: datetime) -> datetime:
+    return value.replace(tzinfo=IST) if value.tzinfo is None else value
+
+
+def _report_columns_error(columns: asyncio.Future):
+    # Retrieving the exception also keeps asyncio from warning that nobody did
+    if not columns.cancelled() and columns.exception() is not None:
+        print(f"Could not retain snapshot for export: {columns.exception()}")
+
+
+def _json_default(value):
+    # NumPy scalars that slip through analysis results
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
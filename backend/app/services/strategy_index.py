@@ -0,0 +1,62 @@
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+# Query/sort name -> how to read it off a strategy dict
+FIELDS = {
+    'probability_of_profit': lambda s, spot: s.get('probability_of_profit', 0),
+    'profit_percentage': lambda s, spot: s.get('profit_percentage', 0),
+    'net_premium': lambda s, spot: s.get('net_premium', 0),
+    'max_profit': lambda s, spot: s.get('max_profit', 0),
+    'max_loss': lambda s, spot: s.get('max_loss', 0),
+    'days_to_expiry': lambda s, spot: s.get('days_to_expiry', 0),
+    # Distance from the spot to the nearer short strike, in points
+    'strike_distance': lambda s, spot: min(abs(spot - strike) for strike in s['strikes']) if s.get('strikes') else 0,
+}
+SORT_KEYS = tuple(FIELDS)
+
+
+class StrategyIndex:
+    """
+    Columnar view of one snapshot's strategies for server-side querying.
+    Fields are pulled into arrays once; each sort order is argsorted the first
+    time it is asked for and reused until the snapshot is replaced, so a query
+    is a vectorized range mask over a cached order plus a slice.
+    """
+    def __init__(self, strategies: List[Dict[str, Any]], spot_price: float):
+        self.strategies = strategies
+        self.columns = {
+            name: np.array([read(s, spot_price) for s in strategies], dtype=float)
+            for name, read in FIELDS.items()
+        }
+        self._orders: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.strategies)
+
+    def order(self, sort_by: str, descending: bool) -> np.ndarray:
+        key = f"{sort_by}:{'desc' if descending else 'asc'}"
+        if key not in self._orders:
+            values = self.columns[sort_by]
+            # Stable, so ties keep the analyzer's order in both directions
+            self._orders[key] = np.argsort(-values if descending else values, kind='stable')
+        return self._orders[key]
+
+    def query(self, ranges: Dict[str, Tuple[Optional[float], Optional[float]]],
+              sort_by: str = 'probability_of_profit', descending: bool = True,
+              offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        (total matches, page) for strategies whose fields fall inside the
+        inclusive (low, high) `ranges`; None leaves that side open
+        """
+        if sort_by not in self.columns:
+            raise ValueError(f"Unknown sort key {sort_by!r}: expected one of {', '.join(SORT_KEYS)}")
+        mask = np.ones(len(self.strategies), dtype=bool)
+        for name, (low, high) in ranges.items():
+            if low is not None:
+                mask &= self.columns[name] >= low
+            if high is not None:
+                mask &= self.columns[name] <= high
+        order = self.order(sort_by, descending)
+        matches = order[mask[order]]
+        end = len(matches) if limit is None else offset + limit
+        return len(matches), [self.strategies[i] for i in matches[offset:end]]
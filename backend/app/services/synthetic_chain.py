@@ -0,0 +1,335 @@
+import numpy as np
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from datetime import datetime, date, timedelta
+from .black_scholes import BlackScholesCalculator
+from .trading_calendar import IST, MARKET_CLOSE, SECONDS_PER_YEAR, TRADING_CALENDAR, TradingCalendar
+
+# Per-symbol defaults: reference spot, strike interval and ATM volatility
+SYMBOL_PROFILES = {
+    "NIFTY": {"spot": 24500, "interval": 50, "atm_vol": 0.13},
+    "BANKNIFTY": {"spot": 52000, "interval": 100, "atm_vol": 0.15},
+    "FINNIFTY": {"spot": 21000, "interval": 50, "atm_vol": 0.14},
+    "RELIANCE": {"spot": 2800, "interval": 20, "atm_vol": 0.24},
+    "TCS": {"spot": 3800, "interval": 50, "atm_vol": 0.21},
+    "INFY": {"spot": 1450, "interval": 20, "atm_vol": 0.24},
+    "SBICARD": {"spot": 850, "interval": 10, "atm_vol": 0.27},
+    "HDFCBANK": {"spot": 1600, "interval": 10, "atm_vol": 0.20},
+    "HINDUNILVR": {"spot": 2500, "interval": 20, "atm_vol": 0.19},
+    "MARUTI": {"spot": 12000, "interval": 100, "atm_vol": 0.23},
+}
+DEFAULT_PROFILE = {"spot": 20000, "interval": 50, "atm_vol": 0.18}
+
+# Only NIFTY keeps a weekly series; everything else expires monthly
+WEEKLY_EXPIRY_SYMBOLS = {"NIFTY"}
+EXPIRY_WEEKDAY = 1  # Tuesday, the NSE F&O expiry day
+TICK_SIZE = 0.05
+
+
+class VolSurface:
+    """
+    Parametric implied-volatility surface: an ATM term structure that mean-reverts
+    towards a long-run level, with a linear skew and quadratic smile in
+    normalised log-moneyness.
+    """
+    def __init__(self, atm_vol: float, long_run_vol: Optional[float] = None, term_decay: float = 0.25,
+                 skew: float = -0.12, smile: float = 0.06):
+        self.atm_vol = atm_vol
+        self.long_run_vol = long_run_vol if long_run_vol is not None else atm_vol * 1.1
+        self.term_decay = term_decay
+        self.skew = skew
+        self.smile = smile
+
+    def atm(self, T) -> np.ndarray:
+        T = np.asarray(T, dtype=float)
+        return self.long_run_vol + (self.atm_vol - self.long_run_vol) * np.exp(-T / self.term_decay)
+
+    def iv(self, spot: float, strikes, T, r: float) -> np.ndarray:
+        """Implied volatility for each (strike, T) pair; arrays must broadcast"""
+        T = np.maximum(np.asarray(T, dtype=float), 1e-6)
+        atm = self.atm(T)
+        forward = spot * np.exp(r * T)
+        x = np.clip(np.log(np.asarray(strikes, dtype=float) / forward) / (atm * np.sqrt(T)), -4.0, 4.0)
+        return np.clip(atm * (1 + self.skew * x + self.smile * x**2), 0.05, 2.0)
+
+
+class SyntheticChainGenerator:
+    """
+    Seeded, vectorized option-chain generator for benchmarks, load tests and
+    offline development. Every price and Greek comes from one Black-Scholes pass
+    over a per-symbol vol surface, so the chain is internally consistent and the
+    same seed and `as_of` always reproduce the same data.
+    """
+    def __init__(self, seed: Optional[int] = None, n_strikes: int = 40, n_expiries: int = 4,
+                 as_of: Optional[datetime] = None, calendar: TradingCalendar = TRADING_CALENDAR):
+        self.rng = np.random.default_rng(seed)
+        self.n_strikes = n_strikes
+        self.n_expiries = n_expiries
+        self.as_of = as_of
+        self.calendar = calendar
+        self.bs_calculator = BlackScholesCalculator()
+        self.risk_free_rate = self.bs_calculator.risk_free_rate
+        self._spots: Dict[str, float] = {}
+        self._surfaces: Dict[str, VolSurface] = {}
+        self._open_interest: Dict[Tuple[str, str], np.ndarray] = {}
+        self._volume: Dict[Tuple[str, str], np.ndarray] = {}
+
+    # ------------------------------------------------------------------ state
+
+    def spot(self, symbol: str) -> float:
+        symbol = symbol.upper()
+        if symbol not in self._spots:
+            profile = SYMBOL_PROFILES.get(symbol, DEFAULT_PROFILE)
+            jitter = self.rng.uniform(-0.01, 0.01)
+            self._spots[symbol] = float(self._round_to_tick(profile["spot"] * (1 + jitter)))
+        return self._spots[symbol]
+
+    def surface(self, symbol: str) -> VolSurface:
+        symbol = symbol.upper()
+        if symbol not in self._surfaces:
+            profile = SYMBOL_PROFILES.get(symbol, DEFAULT_PROFILE)
+            self._surfaces[symbol] = VolSurface(profile["atm_vol"] * self.rng.uniform(0.9, 1.1))
+        return self._surfaces[symbol]
+
+    def now(self) -> datetime:
+        return self.as_of if self.as_of is not None else datetime.now(IST)
+
+    def expiry_dates(self, symbol: str) -> List[str]:
+        """
+        Upcoming expiries: weekly for WEEKLY_EXPIRY_SYMBOLS, otherwise the last
+        expiry weekday of each month; one falling on a holiday moves to the
+        trading day before
+        """
+        now = self.now()
+        today = now.date()
+        if (now.hour, now.minute) >= MARKET_CLOSE:
+            today += timedelta(days=1)
+        expiries: List[date] = []
+        if symbol.upper() in WEEKLY_EXPIRY_SYMBOLS:
+            day = today + timedelta(days=(EXPIRY_WEEKDAY - today.weekday()) % 7)
+            while len(expiries) < self.n_expiries:
+                expiry = self.calendar.previous_trading_day(day)
+                if expiry >= today:
+                    expiries.append(expiry)
+                day += timedelta(days=7)
+        else:
+            year, month = today.year, today.month
+            while len(expiries) < self.n_expiries:
+                expiry = self.calendar.previous_trading_day(self._last_weekday_of_month(year, month, EXPIRY_WEEKDAY))
+                if expiry >= today:
+                    expiries.append(expiry)
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return [d.strftime('%Y-%m-%d') for d in expiries]
+
+    def time_to_expiry(self, expiry_dates: List[str]) -> np.ndarray:
+        """
+        Calendar year fractions to the 15:30 IST close of each expiry; live
+        chains share the calendar's cached values with the analyzers
+        """
+        return self.calendar.year_fractions(expiry_dates, now=self.as_of)
+
+    def strikes(self, symbol: str) -> np.ndarray:
+        profile = SYMBOL_PROFILES.get(symbol.upper(), DEFAULT_PROFILE)
+        interval = profile["interval"]
+        center = round(self.spot(symbol) / interval) * interval
+        offsets = np.arange(self.n_strikes) - self.n_strikes // 2
+        strikes = center + offsets * interval
+        return strikes[strikes > 0].astype(float)
+
+    # ------------------------------------------------------------ generation
+
+    def generate_arrays(self, symbol: str) -> Dict[str, np.ndarray]:
+        """
+        Columnar chain for every expiry x strike of `symbol`, flattened to 1-D
+        arrays with one row per (expiry, strike).
+        """
+        symbol = symbol.upper()
+        spot = self.spot(symbol)
+        expiries = self.expiry_dates(symbol)
+        strikes = self.strikes(symbol)
+        T = self.time_to_expiry(expiries)
+        r = self.risk_free_rate
+
+        K = np.tile(strikes, len(expiries))
+        T_rows = np.repeat(T, len(strikes))
+        expiry_rows = np.repeat(np.array(expiries), len(strikes))
+        iv = self.surface(symbol).iv(spot, K, T_rows, r)
+
+        # One pass for both sides: stack calls over puts
+        both_K = np.concatenate([K, K])
+        both_T = np.concatenate([T_rows, T_rows])
+        both_iv = np.concatenate([iv, iv])
+        is_call = np.concatenate([np.ones(len(K), dtype=bool), np.zeros(len(K), dtype=bool)])
+        price = self.bs_calculator.price_vectorized(spot, both_K, both_T, r, both_iv, is_call)
+        greeks = self.bs_calculator.greeks_vectorized(spot, both_K, both_T, r, both_iv, is_call)
+
+        # A contract worth less than a tick has no market: list it without a quote rather
+        # than rounding it up to the tick, which would imply a volatility the surface never had
+        quoted = price >= TICK_SIZE
+        price = self._round_to_tick(price)
+        half_spread = np.maximum(self._round_to_tick(price * 0.01), TICK_SIZE)
+        open_interest, volume = self._activity(symbol, expiries, spot, strikes)
+
+        n = len(K)
+        arrays = {
+            "expiry": expiry_rows,
+            "strike": K,
+            "time_to_expiry": T_rows,
+            "iv": iv,
+        }
+        for side, rows in (("call", slice(0, n)), ("put", slice(n, 2 * n))):
+            arrays[f"{side}_quoted"] = quoted[rows]
+            arrays[f"{side}_last_price"] = price[rows]
+            arrays[f"{side}_bid"] = np.maximum(price[rows] - half_spread[rows], 0.0)
+            arrays[f"{side}_ask"] = price[rows] + half_spread[rows]
+            for greek in ("delta", "gamma", "theta", "vega"):
+                arrays[f"{side}_{greek}"] = greeks[greek][rows]
+            arrays[f"{side}_open_interest"] = open_interest[rows]
+            arrays[f"{side}_volume"] = volume[rows]
+        return arrays
+
+    def generate_chain(self, symbol: str, expiry: str = "") -> Dict[str, Any]:
+        """Chain for one expiry in the same shape NSEScraper returns"""
+        arrays = self.generate_arrays(symbol)
+        expiry_dates = list(dict.fromkeys(arrays["expiry"].tolist()))
+        selected_expiry = expiry if expiry and expiry in expiry_dates else expiry_dates[0]
+        rows = np.flatnonzero(arrays["expiry"] == selected_expiry)
+        return {
+            "symbol": symbol,
+            "expiry_date": selected_expiry,
+            "expiry_dates": expiry_dates,
+            "underlying_value": self.spot(symbol),
+            "options": self._rows_to_options(arrays, rows),
+        }
+
+    def to_nse_payload(self, symbol: str) -> Dict[str, Any]:
+        """
+        All expiries of `symbol` in the raw JSON layout served by NSE's
+        /api/option-chain-* endpoints (no Greeks, IV in percent, dd-Mon-yyyy dates)
+        """
+        symbol = symbol.upper()
+        arrays = self.generate_arrays(symbol)
+        spot = self.spot(symbol)
+        nse_dates = {e: datetime.strptime(e, '%Y-%m-%d').strftime('%d-%b-%Y') for e in dict.fromkeys(arrays["expiry"].tolist())}
+        columns = {name: values.tolist() for name, values in arrays.items()}
+        data = []
+        for i, strike in enumerate(columns["strike"]):
+            expiry = nse_dates[columns["expiry"][i]]
+            row = {"strikePrice": strike, "expiryDate": expiry}
+            for side, key in (("call", "CE"), ("put", "PE")):
+                if not columns[f"{side}_quoted"][i]:
+                    continue
+                row[key] = {
+                    "strikePrice": strike,
+                    "expiryDate": expiry,
+                    "underlying": symbol,
+                    "openInterest": columns[f"{side}_open_interest"][i],
+                    "totalTradedVolume": columns[f"{side}_volume"][i],
+                    "impliedVolatility": round(columns["iv"][i] * 100, 2),
+                    "lastPrice": columns[f"{side}_last_price"][i],
+                    "bidprice": round(columns[f"{side}_bid"][i], 2),
+                    "askPrice": round(columns[f"{side}_ask"][i], 2),
+                    "underlyingValue": spot,
+                }
+            data.append(row)
+        return {
+            "records": {
+                "expiryDates": list(nse_dates.values()),
+                "data": data,
+                "timestamp": self.now().strftime('%d-%b-%Y %H:%M:%S'),
+                "underlyingValue": spot,
+                "strikePrices": sorted(set(columns["strike"])),
+            }
+        }
+
+    def generate_all(self, symbols: Optional[List[str]] = None, expiry: str = "") -> Dict[str, Dict[str, Any]]:
+        symbols = symbols or list(SYMBOL_PROFILES)
+        return {symbol: self.generate_chain(symbol, expiry) for symbol in symbols}
+
+    def stream(self, symbols: Optional[List[str]] = None, ticks: Optional[int] = None,
+               interval: float = 1.0, expiry: str = "") -> Iterator[Dict[str, Any]]:
+        """
+        Yield tick snapshots: each tick advances simulated time by `interval`
+        seconds, moves every spot along a GBM path and emits one chain per symbol.
+        Runs forever when `ticks` is None.
+        """
+        symbols = symbols or list(SYMBOL_PROFILES)
+        tick = 0
+        while ticks is None or tick < ticks:
+            if tick:
+                self.advance(interval, symbols)
+            for symbol in symbols:
+                yield {"tick": tick, "timestamp": self.now().isoformat(), "chain": self.generate_chain(symbol, expiry)}
+            tick += 1
+
+    def advance(self, seconds: float, symbols: Optional[List[str]] = None):
+        """Move simulated time forward, evolving spots, ATM vols and traded volume"""
+        symbols = [s.upper() for s in (symbols or list(SYMBOL_PROFILES))]
+        dt = seconds / SECONDS_PER_YEAR
+        shocks = self.rng.standard_normal((len(symbols), 2))
+        for symbol, (spot_shock, vol_shock) in zip(symbols, shocks):
+            surface = self.surface(symbol)
+            sigma = surface.atm_vol
+            spot = self.spot(symbol) * np.exp((self.risk_free_rate - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * spot_shock)
+            self._spots[symbol] = float(self._round_to_tick(spot))
+            surface.atm_vol = float(np.clip(sigma * np.exp(0.5 * np.sqrt(dt) * vol_shock), 0.05, 1.0))
+            for key in [k for k in self._volume if k[0] == symbol]:
+                traded = self.rng.poisson(np.maximum(self._volume[key] * seconds / 3600, 1.0))
+                self._volume[key] = self._volume[key] + traded
+                self._open_interest[key] = np.maximum(
+                    self._open_interest[key] + self.rng.integers(-1, 2, traded.shape) * traded // 2, 0
+                )
+        if self.as_of is not None:
+            self.as_of = self.as_of + timedelta(seconds=seconds)
+
+    # --------------------------------------------------------------- helpers
+
+    def _activity(self, symbol: str, expiries: List[str], spot: float, strikes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Open interest and volume per row, stacked calls then puts; peaked at ATM and round strikes"""
+        interval = SYMBOL_PROFILES.get(symbol, DEFAULT_PROFILE)["interval"]
+        open_interest, volume = [], []
+        for side in ("call", "put"):
+            for expiry in expiries:
+                key = (symbol, f"{expiry}:{side}")
+                if key not in self._open_interest:
+                    distance = np.abs(strikes - spot) / spot
+                    weight = np.exp(-distance * 25) + 0.3 * (strikes % (interval * 2) == 0)
+                    self._open_interest[key] = (self.rng.lognormal(9.5, 0.5, len(strikes)) * weight).astype(np.int64) + 100
+                    self._volume[key] = (self.rng.lognormal(8.0, 0.7, len(strikes)) * weight).astype(np.int64) + 10
+                open_interest.append(self._open_interest[key])
+                volume.append(self._volume[key])
+        return np.concatenate(open_interest), np.concatenate(volume)
+
+    def _rows_to_options(self, arrays: Dict[str, np.ndarray], rows: np.ndarray) -> List[Dict[str, Any]]:
+        columns = {name: values[rows].tolist() for name, values in arrays.items()}
+        options = []
+        for i, strike in enumerate(columns["strike"]):
+            option = {"strike_price": strike}
+            for side in ("call", "put"):
+                if not columns[f"{side}_quoted"][i]:
+                    option[side] = None
+                    continue
+                option[side] = {
+                    "last_price": round(columns[f"{side}_last_price"][i], 2),
+                    "bid": round(columns[f"{side}_bid"][i], 2),
+                    "ask": round(columns[f"{side}_ask"][i], 2),
+                    "iv": round(columns["iv"][i], 4),
+                    "delta": round(columns[f"{side}_delta"][i], 4),
+                    "gamma": round(columns[f"{side}_gamma"][i], 6),
+                    "theta": round(columns[f"{side}_theta"][i], 4),
+                    "vega": round(columns[f"{side}_vega"][i], 4),
+                    "open_interest": int(columns[f"{side}_open_interest"][i]),
+                    "volume": int(columns[f"{side}_volume"][i]),
+                    "expiry": columns["expiry"][i],
+                }
+            options.append(option)
+        return options
+
+    @staticmethod
+    def _round_to_tick(value):
+        return np.round(np.round(np.asarray(value, dtype=float) / TICK_SIZE) * TICK_SIZE, 2)
+
+    @staticmethod
+    def _last_weekday_of_month(year: int, month: int, weekday: int) -> date:
+        next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        last_day = next_month - timedelta(days=1)
+        return last_day - timedelta(days=(last_day.weekday() - weekday) % 7)
@@ -0,0 +1,186 @@
+"""
+NSE trading calendar and time-to-expiry engine.
+
+Options expire at the 15:30 IST close of their expiry day. Year fractions are
+measured to that instant in two bases:
+
+- calendar: seconds to expiry / seconds in 365 days
+- business: trading sessions left (today's counting only the part still to
+  trade) / 252, skipping weekends and exchange holidays
+
+TIME_TO_EXPIRY_BASIS picks the one Black-Scholes pricing, IVs and Greeks use
+throughout the app (calendar by default). Contracts past their close have
+T = 0 in both bases.
+
+Fractions are computed for all requested expiries in one vectorized pass and
+cached as of the start of the current `refresh_seconds` wall-clock bucket, so
+every consumer in the process sees the same T until the next bucket. This
+keeps analyses that key on T (incremental re-solves, margin scenario caches)
+stable between refreshes.
+
+Holidays are only known through the last year listed in NSE_HOLIDAYS plus
+TRADING_HOLIDAYS. Business fractions for an expiry past that year count
+every weekday as a session, so the first such expiry logs a warning; add the
+exchange's published list to TRADING_HOLIDAYS until NSE_HOLIDAYS catches up.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence, Set, Tuple
+import numpy as np
+from ..utils.config import TIME_TO_EXPIRY_BASIS, TRADING_CALENDAR_REFRESH_SECONDS, TRADING_HOLIDAYS
+
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = (9, 15)
+MARKET_CLOSE = (15, 30)
+SESSION_SECONDS = ((MARKET_CLOSE[0] - MARKET_OPEN[0]) * 60 + MARKET_CLOSE[1] - MARKET_OPEN[1]) * 60
+SECONDS_PER_YEAR = 365 * 24 * 3600
+TRADING_DAYS_PER_YEAR = 252
+
+CALENDAR = "calendar"
+BUSINESS = "business"
+BASES = (CALENDAR, BUSINESS)
+
+# NSE equity derivatives trading holidays that fall on weekdays. NSE publishes
+# the next year's list in December; 2027 is not out yet
+NSE_HOLIDAYS = frozenset(date.fromisoformat(d) for d in (
+    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10", "2025-04-14", "2025-04-18",
+    "2025-05-01", "2025-08-15", "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22",
+    "2025-11-05", "2025-12-25",
+    "2026-01-26", "2026-03-03", "2026-03-26", "2026-03-31", "2026-04-03", "2026-04-14",
+    "2026-05-01", "2026-05-28", "2026-06-26", "2026-09-14", "2026-10-02", "2026-10-20",
+    "2026-11-10", "2026-11-24", "2026-12-25",
+))
+
+
+@lru_cache(maxsize=1024)
+def expiry_close(expiry: str) -> datetime:
+    """15:30 IST on the expiry date, given as YYYY-MM-DD or NSE's DD-Mon-YYYY"""
+    try:
+        day = date.fromisoformat(expiry)
+    except ValueError:
+        day = datetime.strptime(expiry, '%d-%b-%Y').date()
+    return datetime(day.year, day.month, day.day, *MARKET_CLOSE, tzinfo=IST)
+
+
+class TradingCalendar:
+    def __init__(self, holidays: Iterable[date] = NSE_HOLIDAYS, refresh_seconds: float = TRADING_CALENDAR_REFRESH_SECONDS,
+                 basis: str = CALENDAR):
+        if basis not in BASES:
+            raise ValueError(f"Unknown basis {basis!r}: expected one of {', '.join(BASES)}")
+        # Default basis for year_fraction(s)
+        self.basis = basis
+        self.holidays = frozenset(holidays)
+        self.refresh_seconds = refresh_seconds
+        self._busday_holidays = np.array(sorted(self.holidays), dtype='datetime64[D]')
+        # Last year with any listed holiday; later years are assumed to have none
+        self.holidays_through: Optional[int] = max((day.year for day in self.holidays), default=None)
+        self._warned_years: Set[int] = set()
+        # (bucket, fractions per expiry), replaced whole rather than mutated so
+        # the lock-free read in year_fraction always sees a consistent pair
+        self._table: Tuple[Optional[int], Dict[str, Tuple[float, float]]] = (None, {})
+        self._lock = threading.Lock()
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        now = _ist(now)
+        return self.is_trading_day(now.date()) and MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
+    def previous_trading_day(self, day: date) -> date:
+        """`day` itself if the market trades then, else the trading day before it"""
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def as_of(self) -> datetime:
+        """Start of the current refresh bucket: the instant cached fractions are measured from"""
+        return datetime.fromtimestamp(self._current_bucket() * self.refresh_seconds, IST)
+
+    def year_fractions(self, expiries: Sequence[str], basis: Optional[str] = None,
+                       now: Optional[datetime] = None) -> np.ndarray:
+        """
+        Year fraction to each expiry's close in `basis` (the calendar's own by
+        default), as an array aligned with `expiries`; 0 once an expiry has closed.
+        Passing `now` computes afresh for that instant instead of using the cache.
+        """
+        basis = basis or self.basis
+        if basis not in BASES:
+            raise ValueError(f"Unknown basis {basis!r}: expected one of {', '.join(BASES)}")
+        column = BASES.index(basis)
+        unique, inverse = np.unique(np.asarray(expiries, dtype=str), return_inverse=True)
+        if now is not None:
+            table = self._compute(unique.tolist(), _ist(now))
+        else:
+            with self._lock:
+                bucket = self._current_bucket()
+                cached_bucket, cache = self._table
+                if bucket != cached_bucket:
+                    cache = {}
+                missing = [e for e in unique.tolist() if e not in cache]
+                if missing or bucket != cached_bucket:
+                    as_of = datetime.fromtimestamp(bucket * self.refresh_seconds, IST)
+                    cache = dict(cache, **{e: tuple(row) for e, row in zip(missing, self._compute(missing, as_of))})
+                    self._table = (bucket, cache)
+                table = np.array([cache[e] for e in unique.tolist()], dtype=float).reshape(-1, len(BASES))
+        return table[inverse.reshape(-1), column]
+
+    def year_fraction(self, expiry: str, basis: Optional[str] = None, now: Optional[datetime] = None) -> float:
+        basis = basis or self.basis
+        if now is None and basis in BASES:
+            bucket, cache = self._table
+            cached = cache.get(expiry)
+            if cached is not None and bucket == self._current_bucket():
+                return cached[BASES.index(basis)]
+        return float(self.year_fractions([expiry], basis, now)[0])
+
+    def _current_bucket(self) -> int:
+        return int(time.time() // self.refresh_seconds)
+
+    def _compute(self, expiries: Sequence[str], now: datetime) -> np.ndarray:
+        """(n, 2) calendar and business year fractions measured from `now`"""
+        closes = [expiry_close(e) for e in expiries]
+        self._check_holiday_coverage(closes)
+        seconds = np.array([(close - now).total_seconds() for close in closes], dtype=float)
+        calendar = np.maximum(seconds, 0.0) / SECONDS_PER_YEAR
+
+        today = now.date()
+        days = np.array([close.date() for close in closes], dtype='datetime64[D]')
+        close_today = datetime(today.year, today.month, today.day, *MARKET_CLOSE, tzinfo=IST)
+        today_left = (
+            min(max((close_today - now).total_seconds() / SESSION_SECONDS, 0.0), 1.0)
+            if self.is_trading_day(today) else 0.0
+        )
+        after_today = np.datetime64(today, 'D') + 1
+        full_sessions = np.busday_count(after_today, np.maximum(days + 1, after_today), holidays=self._busday_holidays)
+        sessions = np.where(days >= np.datetime64(today, 'D'), today_left + full_sessions, 0.0)
+        business = sessions / TRADING_DAYS_PER_YEAR
+        return np.column_stack([calendar, business])
+
+    def _check_holiday_coverage(self, closes: Sequence[datetime]):
+        unlisted = sorted({
+            close.year for close in closes
+            if self.holidays_through is None or close.year > self.holidays_through
+        } - self._warned_years)
+        if unlisted:
+            self._warned_years.update(unlisted)
+            print(f"Warning: no trading holidays listed for {', '.join(map(str, unlisted))}; "
+                  f"business-day fractions count every weekday. Add them to TRADING_HOLIDAYS")
+
+
+def _ist(now: Optional[datetime]) -> datetime:
+    if now is None:
+        return datetime.now(IST)
+    # Naive times are taken to be IST already
+    return now.replace(tzinfo=IST) if now.tzinfo is None else now.astimezone(IST)
+
+
+def _holidays() -> frozenset:
+    extra = {date.fromisoformat(d.strip()) for d in TRADING_HOLIDAYS.split(",") if d.strip()}
+    return NSE_HOLIDAYS | extra
+
+
+# Shared so the chain generator, analyzers and portfolio all price with the same T
+TRADING_CALENDAR = TradingCalendar(_holidays(), basis=TIME_TO_EXPIRY_BASIS)
@@ -1,3 +1,55 @@
 import os
+import tempfile
 
-NSE_BASE_URL = os.getenv("NSE_BASE_URL", "https://www.nseindia.com") 
\ No newline at end of file
+NSE_BASE_URL = os.getenv("NSE_BASE_URL", "https://www.nseindia.com")
+# Fetch chains from NSE_BASE_URL instead of the synthetic fallback
+NSE_LIVE_DATA = os.getenv("NSE_LIVE_DATA", "").lower() in ("1", "true", "yes")
+
+# Seed for the synthetic fallback chain generator; unset means a fresh market every run
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED")) if os.getenv("SYNTHETIC_SEED") else None
+
+# Re-solve only the strikes whose quotes changed since the previous tick
+INCREMENTAL_ANALYSIS = os.getenv("INCREMENTAL_ANALYSIS", "1").lower() in ("1", "true", "yes")
+
+# Where workers share chain/analysis snapshots: memory (single worker), mmap (all
+# workers on one host) or redis (any Redis-compatible server)
+SNAPSHOT_BACKEND = os.getenv("SNAPSHOT_BACKEND", "memory")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "optional-trading-snapshots"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "5"))
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", "30"))
+
+# Leader refresh pipeline: off-hours refresh interval, the ceiling the adaptive
+# scheduler may back off to, stage queue bound and per-stage worker counts
+SNAPSHOT_OFF_HOURS_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_OFF_HOURS_REFRESH_SECONDS", "60"))
+SNAPSHOT_MAX_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_MAX_REFRESH_SECONDS", "120"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+PIPELINE_FETCH_CONCURRENCY = int(os.getenv("PIPELINE_FETCH_CONCURRENCY", "4"))
+PIPELINE_ANALYZE_CONCURRENCY = int(os.getenv("PIPELINE_ANALYZE_CONCURRENCY", "2"))
+# Per-stage overrides as comma-separated stage=value pairs, e.g. "analyze=8,publish=4"
+# and "fetch=drop_oldest"; policies are block, drop_oldest or coalesce (the default,
+# except publish, which blocks)
+PIPELINE_QUEUE_SIZES = {
+    stage.strip(): int(size) for stage, _, size in
+    (pair.partition("=") for pair in os.getenv("PIPELINE_QUEUE_SIZES", "").split(",") if pair.strip())
+}
+PIPELINE_QUEUE_POLICIES = {
+    stage.strip(): policy.strip().lower() for stage, _, policy in
+    (pair.partition("=") for pair in os.getenv("PIPELINE_QUEUE_POLICIES", "").split(",") if pair.strip())
+}
+
+# Snapshots per symbol/expiry each worker keeps in columnar form for /export
+SNAPSHOT_HISTORY = int(os.getenv("SNAPSHOT_HISTORY", "120"))
+
+# Admin endpoints (profiler, slow-request traces) need this token in X-Admin-Token;
+# unset disables them. SLOW_REQUEST_TRACE_MS > 0 captures slow-request traces from startup
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+SLOW_REQUEST_TRACE_MS = float(os.getenv("SLOW_REQUEST_TRACE_MS", "0"))
+
+# Time-to-expiry year fractions are recomputed at most this often; extra exchange
+# holidays (comma-separated YYYY-MM-DD) on top of the built-in NSE list
+TRADING_CALENDAR_REFRESH_SECONDS = float(os.getenv("TRADING_CALENDAR_REFRESH_SECONDS", "60"))
+TRADING_HOLIDAYS = os.getenv("TRADING_HOLIDAYS", "")
+# Year-fraction basis for pricing, IVs and Greeks: "calendar" (seconds / 365 days)
+# or "business" (trading sessions / 252)
+TIME_TO_EXPIRY_BASIS = os.getenv("TIME_TO_EXPIRY_BASIS", "calendar").strip().lower()
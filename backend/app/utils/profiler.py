@@ -0,0 +1,216 @@
+"""
+In-process sampling profiler and slow-request trace capture.
+
+A daemon thread wakes every `interval` seconds and records the Python stack
+of every other thread from sys._current_frames(), so profiled code runs
+untouched: the cost scales with the sampling rate, not with the load, and the
+thread only exists while a profile or trace capture is running. Stacks come
+out in the collapsed format read by flamegraph.pl, speedscope and inferno:
+
+    MainThread;uvicorn/server.py:serve;app/api/routes.py:get_strategies 42
+
+While trace capture is armed the samples also go to a short timestamped ring
+buffer, and SlowRequestTraceMiddleware keeps the samples taken while each
+request over the threshold was in flight, tagged with its symbol and expiry.
+The event loop interleaves requests, so a trace shows everything the process
+did during the slow request, including work for concurrent ones.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+DEFAULT_INTERVAL = 0.005
+MAX_PROFILE_SECONDS = 60.0
+TRACE_BUFFER_SAMPLES = 50_000
+MAX_TRACES = 50
+
+# Leaf frames of threads that are blocked waiting for work rather than running
+IDLE_LEAVES = {
+    ('selectors.py', 'select'), ('threading.py', 'wait'), ('queue.py', 'get'),
+    ('thread.py', '_worker'), ('base_events.py', '_run_once'),
+}
+
+
+class ProfilerBusy(Exception):
+    """A profile is already being collected in this process"""
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = DEFAULT_INTERVAL, trace_buffer: int = TRACE_BUFFER_SAMPLES,
+                 max_traces: int = MAX_TRACES):
+        self.default_interval = interval
+        self.interval = interval
+        self.trace_threshold: Optional[float] = None
+        self.trace_until = 0.0
+        self.traces: Deque[Dict[str, Any]] = deque(maxlen=max_traces)
+        self._counts: Optional[Counter] = None
+        self._include_idle = False
+        self._recent: Deque[Tuple[float, str]] = deque(maxlen=trace_buffer)
+        self._labels: Dict[Any, Tuple[str, bool]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def tracing(self) -> bool:
+        return self.trace_threshold is not None and time.monotonic() < self.trace_until
+
+    @property
+    def profiling(self) -> bool:
+        return self._counts is not None
+
+    def start(self, interval: Optional[float] = None, include_idle: bool = False):
+        """Begin collecting a profile; `stop()` returns it"""
+        with self._lock:
+            if self._counts is not None:
+                raise ProfilerBusy("A profile is already running")
+            self._counts = Counter()
+            self._include_idle = include_idle
+            self.interval = interval or self.default_interval
+            self._ensure_sampling()
+
+    def stop(self) -> Counter:
+        with self._lock:
+            counts, self._counts = self._counts or Counter(), None
+            self.interval = self.default_interval
+        return counts
+
+    def arm_traces(self, threshold_seconds: float, duration_seconds: float = float('inf')):
+        """Capture traces of requests slower than `threshold_seconds` for the next `duration_seconds`"""
+        with self._lock:
+            self.trace_threshold = threshold_seconds
+            self.trace_until = time.monotonic() + duration_seconds
+            self._ensure_sampling()
+
+    def disarm_traces(self):
+        with self._lock:
+            self.trace_threshold = None
+            self._recent.clear()
+
+    def record_request(self, started: float, finished: float, tags: Dict[str, Any]):
+        """Keep a trace for a request that ran from `started` to `finished` (monotonic) if it was slow"""
+        threshold = self.trace_threshold
+        if threshold is None or finished - started < threshold:
+            return
+        counts = Counter(stack for at, stack in list(self._recent) if started <= at <= finished)
+        self.traces.append(dict(
+            tags,
+            started_at=datetime.fromtimestamp(time.time() - (time.monotonic() - started)).isoformat(),
+            duration_ms=round((finished - started) * 1000, 2),
+            samples=sum(counts.values()),
+            stacks=collapsed(counts),
+        ))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'profiling': self.profiling,
+            'tracing': self.tracing,
+            'trace_threshold_ms': round(self.trace_threshold * 1000, 2) if self.tracing else None,
+            'trace_seconds_left': round(self.trace_until - time.monotonic(), 1)
+            if self.tracing and self.trace_until != float('inf') else None,
+            'interval_ms': self.interval * 1000,
+            'traces': len(self.traces),
+        }
+
+    def _ensure_sampling(self):
+        # Called with the lock held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                counts, tracing = self._counts, self.tracing
+                if counts is None and not tracing:
+                    self._thread = None
+                    return
+            now = time.monotonic()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack, idle = self._stack(names.get(ident, str(ident)), frame)
+                if counts is not None and (self._include_idle or not idle):
+                    counts[stack] += 1
+                if tracing and not idle:
+                    self._recent.append((now, stack))
+
+    def _stack(self, thread_name: str, frame) -> Tuple[str, bool]:
+        labels: List[str] = []
+        idle = None
+        while frame is not None:
+            label, leaf_idle = self._label(frame.f_code)
+            if idle is None:
+                idle = leaf_idle
+            labels.append(label)
+            frame = frame.f_back
+        labels.append(thread_name)
+        return ';'.join(reversed(labels)), bool(idle)
+
+    def _label(self, code) -> Tuple[str, bool]:
+        cached = self._labels.get(code)
+        if cached is None:
+            cached = self._labels[code] = (
+                f"{_short_path(code.co_filename)}:{code.co_name}",
+                (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES,
+            )
+        return cached
+
+
+def collapsed(counts: Counter) -> str:
+    """One `frame;frame;frame count` line per distinct stack, hottest first"""
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to the longest sys.path entry (or working directory) containing it"""
+    roots = sorted({os.path.join(os.path.abspath(p), '') for p in sys.path + [os.getcwd()] if p}, key=len, reverse=True)
+    for root in roots:
+        if filename.startswith(root):
+            return filename[len(root):]
+    return filename
+
+
+class SlowRequestTraceMiddleware:
+    """
+    ASGI middleware handing request timings to the profiler. When trace
+    capture is not armed it adds one attribute check per request.
+    """
+    def __init__(self, app, profiler: Optional[SamplingProfiler] = None):
+        self.app = app
+        self.profiler = profiler or PROFILER
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.tracing:
+            await self.app(scope, receive, send)
+            return
+        response: Dict[str, int] = {}
+
+        async def send_and_record_status(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            await send(message)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            query = parse_qs(scope.get("query_string", b"").decode())
+            self.profiler.record_request(started, time.monotonic(), {
+                'method': scope["method"],
+                'path': scope["path"],
+                'symbol': query.get('symbol', [None])[0],
+                'expiry': query.get('expiry', [None])[0],
+                'status': response.get("status"),
+            })
+
+
+# sys._current_frames() sees the whole process, so one profiler per process
+PROFILER = SamplingProfiler()
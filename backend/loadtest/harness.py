@@ -0,0 +1,245 @@
+"""
+End-to-end load test: N concurrent REST clients and M WebSocket subscribers
+against the FastAPI app, reporting latency percentiles, throughput, tick
+delivery lag (receive time minus the frame's snapshot_created_at, so it
+includes how stale the snapshot was when sent) and server memory growth.
+
+    # against a running server (pass its pid to track memory)
+    python -m loadtest.harness --rest-clients 50 --ws-clients 20 --duration 60 --server-pid 1234
+
+    # spawn the NSE replay server and the app, wired together, then tear both down
+    python -m loadtest.harness --spawn --rest-clients 50 --ws-clients 20 --latency-ms 80
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+import websockets
+
+# Only needed to decode binary frames (--ws-path /ws?encoding=msgpack)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_SYMBOLS = ["NIFTY", "BANKNIFTY", "FINNIFTY", "RELIANCE", "TCS"]
+DEFAULT_ENDPOINTS = ["option-chain", "strategies", "market-data"]
+
+
+class Recorder:
+    """Collects latency samples and error counts per endpoint"""
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.tick_lags: List[float] = []
+        self.ticks = 0
+        self.ws_errors = 0
+        self.rss_samples: List[int] = []
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        if ok:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+        else:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+async def rest_client(client: httpx.AsyncClient, recorder: Recorder, endpoints: List[str],
+                      symbols: List[str], deadline: float, client_id: int):
+    i = client_id
+    while time.monotonic() < deadline:
+        endpoint = endpoints[i % len(endpoints)]
+        symbol = symbols[i % len(symbols)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(f"/api/v1/{endpoint}", params={"symbol": symbol})
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        recorder.record(endpoint, time.perf_counter() - start, ok)
+
+
+async def ws_subscriber(url: str, recorder: Recorder, deadline: float):
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            while time.monotonic() < deadline:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=max(0.1, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                received = datetime.now(timezone.utc)
+                recorder.ticks += 1
+                # Binary frames are msgpack (?encoding=msgpack); only the creation stamp is needed here
+                decoded = json.loads(message) if isinstance(message, str) else msgpack.unpackb(message)
+                if isinstance(decoded, dict):
+                    stamp = decoded.get("snapshot_created_at")
+                    if stamp:
+                        recorder.tick_lags.append((received - datetime.fromisoformat(stamp)).total_seconds())
+    except (OSError, websockets.WebSocketException):
+        recorder.ws_errors += 1
+
+
+async def sample_memory(pid: int, recorder: Recorder, deadline: float):
+    while time.monotonic() < deadline:
+        rss = read_rss_kb(pid)
+        if rss is not None:
+            recorder.rss_samples.append(rss)
+        await asyncio.sleep(1.0)
+
+
+def summarize(recorder: Recorder, duration: float) -> Dict:
+    def percentiles(samples: List[float]) -> Dict[str, float]:
+        if not samples:
+            return {}
+        ms = np.asarray(samples) * 1000
+        return {
+            "p50_ms": round(float(np.percentile(ms, 50)), 2),
+            "p99_ms": round(float(np.percentile(ms, 99)), 2),
+            "mean_ms": round(float(ms.mean()), 2),
+            "max_ms": round(float(ms.max()), 2),
+        }
+
+    report = {"duration_s": duration, "endpoints": {}}
+    total = 0
+    for endpoint in sorted(set(recorder.latencies) | set(recorder.errors)):
+        samples = recorder.latencies.get(endpoint, [])
+        total += len(samples)
+        report["endpoints"][endpoint] = {
+            "requests": len(samples),
+            "errors": recorder.errors.get(endpoint, 0),
+            "throughput_rps": round(len(samples) / duration, 2),
+            **percentiles(samples),
+        }
+    report["throughput_rps"] = round(total / duration, 2)
+    report["websocket"] = {
+        "ticks": recorder.ticks,
+        "errors": recorder.ws_errors,
+        "ticks_per_s": round(recorder.ticks / duration, 2),
+        "lag": percentiles(recorder.tick_lags),
+    }
+    if recorder.rss_samples:
+        report["memory"] = {
+            "rss_start_mb": round(recorder.rss_samples[0] / 1024, 1),
+            "rss_end_mb": round(recorder.rss_samples[-1] / 1024, 1),
+            "rss_peak_mb": round(max(recorder.rss_samples) / 1024, 1),
+            "growth_mb": round((recorder.rss_samples[-1] - recorder.rss_samples[0]) / 1024, 1),
+        }
+    return report
+
+
+async def run(args, server_pid: Optional[int]) -> Dict:
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    ws_url = args.base_url.replace("http", "ws", 1) + args.ws_path
+    limits = httpx.Limits(max_connections=args.rest_clients)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        tasks = [
+            rest_client(client, recorder, args.endpoints, args.symbols, deadline, i)
+            for i in range(args.rest_clients)
+        ]
+        tasks += [ws_subscriber(ws_url, recorder, deadline) for _ in range(args.ws_clients)]
+        if server_pid:
+            tasks.append(sample_memory(server_pid, recorder, deadline))
+        started = time.monotonic()
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - started
+    return summarize(recorder, elapsed)
+
+
+def wait_for(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def spawn_stack(args) -> List[subprocess.Popen]:
+    """Start the NSE replay server and the app pointed at it"""
+    replay_cmd = [
+        sys.executable, "-m", "loadtest.nse_replay_server", "--port", str(args.replay_port),
+        "--latency-ms", str(args.latency_ms), "--forbidden-rate", str(args.forbidden_rate),
+        "--rate-limit", str(args.rate_limit),
+    ]
+    if args.recordings:
+        replay_cmd += ["--recordings", args.recordings]
+    if args.seed is not None:
+        replay_cmd += ["--seed", str(args.seed)]
+    replay = subprocess.Popen(replay_cmd, cwd=BACKEND_DIR)
+    wait_for(f"http://127.0.0.1:{args.replay_port}/stats")
+
+    port = args.base_url.rsplit(":", 1)[-1].strip("/")
+    env = dict(os.environ, NSE_BASE_URL=f"http://127.0.0.1:{args.replay_port}", NSE_LIVE_DATA="1")
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", port, "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    wait_for(f"{args.base_url}/health")
+    return [replay, app]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the options dashboard API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--ws-path", default="/ws", help="e.g. /ws?encoding=msgpack for binary frames")
+    parser.add_argument("--rest-clients", type=int, default=20)
+    parser.add_argument("--ws-clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--server-pid", type=int, help="pid of the app server, for memory tracking")
+    parser.add_argument("--output", help="also write the JSON report here")
+    spawn = parser.add_argument_group("spawned stack")
+    spawn.add_argument("--spawn", action="store_true", help="start the replay server and app locally")
+    spawn.add_argument("--replay-port", type=int, default=9000)
+    spawn.add_argument("--recordings", help="recordings directory for the replay server")
+    spawn.add_argument("--seed", type=int)
+    spawn.add_argument("--latency-ms", type=float, default=0.0)
+    spawn.add_argument("--forbidden-rate", type=float, default=0.0)
+    spawn.add_argument("--rate-limit", type=float, default=0.0)
+    args = parser.parse_args()
+    if "msgpack" in args.ws_path and msgpack is None:
+        parser.error("msgpack frames need the 'msgpack' package (pip install msgpack)")
+
+    processes = spawn_stack(args) if args.spawn else []
+    server_pid = processes[-1].pid if processes else args.server_pid
+    try:
+        report = asyncio.run(run(args, server_pid))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=10)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Local stand-in for nseindia.com that serves recorded or synthetic option-chain
+JSON on the same paths NSEScraper uses, with configurable latency, 403s and
+rate limiting.
+
+    python -m loadtest.nse_replay_server --port 9000 --latency-ms 80 --forbidden-rate 0.05
+    NSE_BASE_URL=http://127.0.0.1:9000 NSE_LIVE_DATA=1 uvicorn app.main:app
+
+Recordings are raw NSE responses saved as <dir>/<SYMBOL>.json or as several
+snapshots in <dir>/<SYMBOL>/*.json, which are replayed in name order and looped.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, Response
+
+from app.services.synthetic_chain import SyntheticChainGenerator
+
+SESSION_COOKIE = "nsit"
+
+
+class ReplaySource:
+    """Serves recorded snapshots per symbol, falling back to a synthetic market"""
+    def __init__(self, recordings_dir: Optional[str] = None, seed: Optional[int] = None,
+                 n_strikes: int = 40, n_expiries: int = 4, tick_seconds: float = 1.0):
+        self.recordings: Dict[str, List[Path]] = {}
+        self.positions: Dict[str, int] = {}
+        self.generator = SyntheticChainGenerator(seed=seed, n_strikes=n_strikes, n_expiries=n_expiries)
+        self.tick_seconds = tick_seconds
+        self._last_tick = time.monotonic()
+        if recordings_dir:
+            self._load_recordings(Path(recordings_dir))
+
+    def _load_recordings(self, root: Path):
+        for path in sorted(root.iterdir()):
+            if path.is_dir():
+                files = sorted(path.glob("*.json"))
+                if files:
+                    self.recordings[path.name.upper()] = files
+            elif path.suffix == ".json":
+                self.recordings[path.stem.upper()] = [path]
+        print(f"Loaded recordings for {sorted(self.recordings)}")
+
+    def payload(self, symbol: str) -> bytes:
+        symbol = symbol.upper()
+        files = self.recordings.get(symbol)
+        if files:
+            position = self.positions.get(symbol, 0)
+            self.positions[symbol] = (position + 1) % len(files)
+            return files[position].read_bytes()
+        # Synthetic market moves on wall-clock ticks, like the real feed
+        now = time.monotonic()
+        if now - self._last_tick >= self.tick_seconds:
+            self.generator.advance(now - self._last_tick)
+            self._last_tick = now
+        return json.dumps(self.generator.to_nse_payload(symbol)).encode()
+
+
+class TokenBucket:
+    """Per-client request budget: `rate` requests per second with bursts up to `burst`"""
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens: Dict[str, float] = {}
+        self.updated: Dict[str, float] = {}
+
+    def allow(self, client: str) -> bool:
+        now = time.monotonic()
+        elapsed = now - self.updated.get(client, now)
+        tokens = min(self.burst, self.tokens.get(client, self.burst) + elapsed * self.rate)
+        self.updated[client] = now
+        if tokens < 1:
+            self.tokens[client] = tokens
+            return False
+        self.tokens[client] = tokens - 1
+        return True
+
+
+def create_app(recordings_dir: Optional[str] = None, seed: Optional[int] = None, latency_ms: float = 0.0,
+               jitter_ms: float = 0.0, forbidden_rate: float = 0.0, rate_limit: float = 0.0,
+               burst: int = 10, require_cookie: bool = False, n_strikes: int = 40,
+               n_expiries: int = 4) -> FastAPI:
+    app = FastAPI(title="NSE replay server")
+    source = ReplaySource(recordings_dir, seed, n_strikes, n_expiries)
+    bucket = TokenBucket(rate_limit, burst) if rate_limit > 0 else None
+    app.state.stats = {"requests": 0, "served": 0, "forbidden": 0, "rate_limited": 0}
+
+    async def chain_response(request: Request, symbol: str) -> Response:
+        stats = request.app.state.stats
+        stats["requests"] += 1
+        if latency_ms or jitter_ms:
+            await asyncio.sleep(max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000)
+        if bucket and not bucket.allow(request.client.host if request.client else "unknown"):
+            stats["rate_limited"] += 1
+            return JSONResponse({"error": "rate limited"}, status_code=429)
+        if (require_cookie and SESSION_COOKIE not in request.cookies) or random.random() < forbidden_rate:
+            stats["forbidden"] += 1
+            return JSONResponse({"error": "forbidden"}, status_code=403)
+        stats["served"] += 1
+        return Response(source.payload(symbol), media_type="application/json")
+
+    @app.get("/")
+    @app.get("/option-chain")
+    async def home():
+        # The scraper visits these pages first to pick up session cookies
+        response = Response("<html>NSE replay</html>", media_type="text/html")
+        response.set_cookie(SESSION_COOKIE, "replay")
+        return response
+
+    @app.get("/api/option-chain-indices")
+    async def option_chain_indices(request: Request, symbol: str = Query(...)):
+        return await chain_response(request, symbol)
+
+    @app.get("/api/option-chain-equities")
+    async def option_chain_equities(request: Request, symbol: str = Query(...)):
+        return await chain_response(request, symbol)
+
+    @app.get("/stats")
+    async def stats(request: Request):
+        return request.app.state.stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve recorded or synthetic NSE option chains locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--recordings", help="directory of recorded NSE responses")
+    parser.add_argument("--seed", type=int, help="seed for the synthetic market")
+    parser.add_argument("--strikes", type=int, default=40, help="synthetic strikes per expiry")
+    parser.add_argument("--expiries", type=int, default=4, help="synthetic expiries per symbol")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean added response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="standard deviation of the latency")
+    parser.add_argument("--forbidden-rate", type=float, default=0.0, help="fraction of requests answered with 403")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second per client (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=10, help="rate-limit burst size")
+    parser.add_argument("--require-cookie", action="store_true", help="403 requests without a session cookie")
+    args = parser.parse_args()
+
+    app = create_app(
+        recordings_dir=args.recordings, seed=args.seed, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        forbidden_rate=args.forbidden_rate, rate_limit=args.rate_limit, burst=args.burst,
+        require_cookie=args.require_cookie, n_strikes=args.strikes, n_expiries=args.expiries,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
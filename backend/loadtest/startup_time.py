@@ -0,0 +1,59 @@
+"""
+Cold-start check: time `import app.main` plus the lifespan startup in fresh
+interpreters and fail when the median exceeds the budget.
+
+    python -m loadtest.startup_time --runs 5 --budget-ms 1000
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def start():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(json.dumps({"import_ms": (imported - started) * 1000, "lifespan_ms": (ready - imported) * 1000}))
+"""
+
+
+def measure_once() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="maximum median import + startup time")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    totals = [run["import_ms"] + run["lifespan_ms"] for run in runs]
+    report = {
+        "runs": args.runs,
+        "median_import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+        "median_lifespan_ms": round(statistics.median(run["lifespan_ms"] for run in runs), 1),
+        "median_total_ms": round(statistics.median(totals), 1),
+        "budget_ms": args.budget_ms,
+    }
+    print(json.dumps(report, indent=2))
+    if report["median_total_ms"] > args.budget_ms:
+        sys.exit(f"Cold start {report['median_total_ms']}ms exceeds the {args.budget_ms}ms budget")
+
+
+if __name__ == "__main__":
+    main()
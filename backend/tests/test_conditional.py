@@ -0,0 +1,44 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.conditional import snapshot_response
+from app.services.snapshots import Snapshot
+
+SNAPSHOT = Snapshot("chain/NIFTY/nearest", 3, {
+    'symbol': "NIFTY", 'expiry': "27-Oct-2026", 'created_at': 1_800_000_000.0, 'chain': {}, 'analysis': {},
+})
+
+
+def render():
+    return {'strikes': list(range(2000))}, {}
+
+
+def client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/view")
+    async def view(request: Request):
+        return snapshot_response(request, SNAPSHOT, render, "view")
+
+    return TestClient(app)
+
+
+def test_each_content_coding_gets_its_own_etag():
+    with client() as c:
+        plain = c.get("/view", headers={"Accept-Encoding": "identity"})
+        gzipped = c.get("/view", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"].endswith('-gzip"')
+    assert plain.headers["etag"] != gzipped.headers["etag"]
+
+
+def test_revalidation_only_matches_the_same_coding_and_varies():
+    with client() as c:
+        etag = c.get("/view", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        cached = c.get("/view", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        other = c.get("/view", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["vary"] == "Accept-Encoding"
+    assert cached.headers["etag"] == etag
+    assert other.status_code == 200
+    assert "content-encoding" not in other.headers
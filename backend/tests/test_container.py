@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_startup_builds_no_services_and_the_first_read_starts_the_refresher():
+    with TestClient(app) as client:
+        container = app.state.container
+        assert client.get("/health").status_code == 200
+        assert container._snapshots is None and container._nse_scraper is None
+
+        assert client.get("/api/v1/market-data", params={"symbol": "NIFTY"}).status_code == 200
+        refresher = container.snapshots._refresher
+        assert refresher is not None and not refresher.done()
+    assert container.snapshots._refresher is None
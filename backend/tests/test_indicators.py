@@ -0,0 +1,55 @@
+import copy
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services.incremental_analyzer import IncrementalOptionsAnalyzer
+from app.services.options_analyzer import OptionsAnalyzer
+from app.services.synthetic_chain import SyntheticChainGenerator
+from app.services.trading_calendar import IST
+
+AS_OF = datetime(2026, 10, 22, 11, 0, tzinfo=IST)
+
+
+def pinned(analyzer, chain):
+    # Both analyzers price with the chain's T, not the wall clock's
+    T = analyzer.calendar.year_fraction(chain['expiry_date'], now=AS_OF)
+    analyzer._calculate_time_to_expiry = lambda expiry: T
+    return analyzer
+
+
+def strike_below_spot(chain):
+    return max(opt['strike_price'] for opt in chain['options'] if opt['strike_price'] < chain['underlying_value'])
+
+
+@pytest.fixture
+def chain():
+    return SyntheticChainGenerator(seed=11, as_of=AS_OF).generate_chain("NIFTY")
+
+
+def test_incremental_matches_full_indicators_when_an_atm_solve_fails(chain):
+    incremental = pinned(IncrementalOptionsAnalyzer(), chain)
+    incremental.analyze_option_chain(chain)
+
+    broken = copy.deepcopy(chain)
+    option = next(opt for opt in broken['options'] if opt['strike_price'] == strike_below_spot(chain))
+    # An in-the-money call quoted under intrinsic has no implied volatility
+    option['call']['last_price'] = 0.05
+    engine = incremental.indicator_engine
+    call_ivs, _ = engine.solve_ivs(np.array([option['strike_price']]), np.array([0.05]), np.array([np.nan]),
+                                   broken['underlying_value'], incremental._calculate_time_to_expiry(None))
+    assert np.isnan(call_ivs[0])
+
+    patched = incremental.analyze_option_chain(broken)['market_indicators']
+    assert incremental.stats['incremental'] == 1
+    full = pinned(OptionsAnalyzer(), broken).analyze_option_chain(broken)['market_indicators']
+    for name in ('volatility_index', 'pcr_volume', 'pcr_oi', 'max_pain', 'total_call_oi', 'total_put_oi'):
+        assert patched[name] == pytest.approx(full[name], rel=1e-12), name
+
+
+def test_incremental_matches_full_volatility_index_on_a_clean_chain(chain):
+    incremental = pinned(IncrementalOptionsAnalyzer(), chain)
+    full = pinned(OptionsAnalyzer(), chain)
+    assert (incremental.analyze_option_chain(chain)['market_indicators']['volatility_index']
+            == pytest.approx(full.analyze_option_chain(chain)['market_indicators']['volatility_index'], rel=1e-12))
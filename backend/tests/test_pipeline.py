@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.pipeline import BLOCK, Pipeline, PipelineDropped, PipelineItem, Stage
+from app.services.snapshot_store import MemorySnapshotStore
+from app.services.snapshots import Snapshot, SnapshotService
+
+
+def service(**kwargs) -> SnapshotService:
+    return SnapshotService(MemorySnapshotStore(), None, None, None, **kwargs)
+
+
+def built(key: str, seq: int, created_at: float) -> PipelineItem:
+    symbol, expiry = SnapshotService.parse_key(key)
+    item = PipelineItem(key, {
+        'symbol': symbol, 'expiry': expiry, 'created_at': created_at,
+        'chain': {'options': []}, 'analysis': {'strategies': []},
+    })
+    item.seq = seq
+    return item
+
+
+def test_stop_releases_submitters_blocked_on_a_full_queue():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def stall(item):
+            await release.wait()
+
+        async def finish(item):
+            return item.key
+
+        pipeline = Pipeline([Stage('slow', stall, 1, 1, policy=BLOCK), Stage('last', finish, 1, 1)])
+        futures = [await pipeline.submit(f"k{n}") for n in range(2)]
+        # One item in the worker, one queued, and a third submit waiting for room
+        blocked = asyncio.create_task(pipeline.submit("k2"))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+
+        await asyncio.wait_for(pipeline.stop(), 1)
+        third = await asyncio.wait_for(blocked, 1)
+        for future in futures + [third]:
+            with pytest.raises(PipelineDropped):
+                await asyncio.wait_for(future, 1)
+
+    asyncio.run(scenario())
+
+
+def test_an_older_build_finishing_last_does_not_replace_the_newer_snapshot():
+    async def scenario():
+        snapshots = service()
+        key = snapshots.key("NIFTY", "27-Oct-2026")
+        newer = await snapshots._publish(built(key, seq=2, created_at=100.0))
+        # The older fetch was analysed more slowly, so it was serialized later
+        kept = await snapshots._publish(built(key, seq=1, created_at=101.0))
+        assert kept is newer
+        assert await snapshots.read(key) is newer
+        assert snapshots.stale_dropped == 1
+
+    asyncio.run(scenario())
+
+
+def test_queue_sizes_and_policies_come_from_config():
+    snapshots = service(queue_sizes={'analyze': 4}, queue_policies={'fetch': 'drop_oldest'})
+    queues = {stage.name: stage.queue for stage in snapshots.pipeline.stages}
+    assert queues['analyze'].maxsize == 4
+    assert queues['fetch'].policy == 'drop_oldest'
+    assert queues['publish'].policy == BLOCK
+
+    with pytest.raises(ValueError):
+        service(queue_sizes={'analyse': 4})
+    with pytest.raises(ValueError):
+        service(queue_policies={'fetch': 'newest'})
+
+
+def test_history_columns_are_built_off_the_event_loop(monkeypatch):
+    built_on = []
+    columns = Snapshot.columns
+    monkeypatch.setattr(Snapshot, 'columns', lambda snapshot: built_on.append(threading.get_ident()) or columns(snapshot))
+
+    async def scenario():
+        snapshots = service()
+        key = snapshots.key("NIFTY", "27-Oct-2026")
+        loop_thread = threading.get_ident()
+        for seq in (1, 2):
+            await snapshots._publish(built(key, seq=seq, created_at=100.0 + seq))
+        history = await snapshots.history(["nifty"])
+        assert [c.created_at for c in history] == [101.0, 102.0]
+        assert len(built_on) == 2 and loop_thread not in built_on
+
+    asyncio.run(scenario())
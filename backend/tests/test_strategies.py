@@ -0,0 +1,33 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.options_analyzer import OptionsAnalyzer
+from app.services.strategy_index import StrategyIndex
+from app.services.synthetic_chain import SyntheticChainGenerator
+from app.services.trading_calendar import IST
+
+# Mid-week, a few sessions before the 2026-10-27 expiry
+AS_OF = datetime(2026, 10, 22, 11, 0, tzinfo=IST)
+
+
+def analyze(symbol: str) -> dict:
+    chain = SyntheticChainGenerator(seed=7, as_of=AS_OF).generate_chain(symbol)
+    analyzer = OptionsAnalyzer()
+    # Price with T as of the chain's own clock rather than the wall clock
+    analyzer._calculate_time_to_expiry = lambda expiry: analyzer.calendar.year_fraction(expiry, now=AS_OF)
+    return analyzer.analyze_option_chain(chain)
+
+
+@pytest.mark.parametrize("symbol", ["NIFTY", "BANKNIFTY", "TCS"])
+def test_default_strategy_query_is_not_empty(symbol):
+    analysis = analyze(symbol)
+    index = StrategyIndex(analysis['strategies'], analysis['spot_price'])
+    # The same bounds GET /strategies applies when called without parameters
+    total, page = index.query({
+        'probability_of_profit': (OptionsAnalyzer.MIN_PROBABILITY_OF_PROFIT, None),
+        'profit_percentage': (OptionsAnalyzer.MIN_PROFIT_PERCENTAGE, None),
+    })
+    assert total > 0
+    assert all(s['probability_of_profit'] >= OptionsAnalyzer.MIN_PROBABILITY_OF_PROFIT for s in page)
+    assert analysis['high_probability_strategies']
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import numpy as np
+
+from app.services.black_scholes import BlackScholesCalculator
+from app.services.synthetic_chain import TICK_SIZE, SyntheticChainGenerator
+from app.services.trading_calendar import IST
+
+# The Monday before a Tuesday expiry, when far wings are worth less than a tick
+AS_OF = datetime(2026, 10, 26, 14, 0, tzinfo=IST)
+
+
+def test_legs_worth_less_than_a_tick_are_unquoted_and_the_rest_solve_back_to_the_surface():
+    generator = SyntheticChainGenerator(seed=5, as_of=AS_OF)
+    arrays = generator.generate_arrays("NIFTY")
+    spot = generator.spot("NIFTY")
+    calculator = BlackScholesCalculator()
+    for side, is_call in (("call", True), ("put", False)):
+        quoted = arrays[f"{side}_quoted"]
+        price = arrays[f"{side}_last_price"][quoted]
+        assert (price >= TICK_SIZE).all()
+        ivs = calculator.implied_volatility_vectorized(
+            price, spot, arrays["strike"][quoted], arrays["time_to_expiry"][quoted], generator.risk_free_rate, is_call
+        )
+        assert not np.isnan(ivs).any()
+
+    assert not arrays["call_quoted"].all()
+
+    chain = generator.generate_chain("NIFTY")
+    assert any(option["call"] is None or option["put"] is None for option in chain["options"])
+    payload = generator.to_nse_payload("NIFTY")["records"]["data"]
+    assert sum("CE" not in row for row in payload) == (~arrays["call_quoted"]).sum()
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.incremental_analyzer import IncrementalOptionsAnalyzer
+from app.services.options_analyzer import OptionsAnalyzer
+from app.services.synthetic_chain import SyntheticChainGenerator
+from app.services.trading_calendar import BUSINESS, CALENDAR, IST, TradingCalendar
+
+EXPIRY = "2026-10-27"
+
+
+def test_expired_contracts_have_no_time_left():
+    calendar = TradingCalendar()
+    after_close = datetime(2026, 10, 27, 15, 31, tzinfo=IST)
+    assert calendar.year_fraction(EXPIRY, CALENDAR, now=after_close) == 0
+    assert calendar.year_fraction(EXPIRY, BUSINESS, now=after_close) == 0
+
+
+def test_the_configured_basis_is_the_default():
+    monday = datetime(2026, 10, 26, 15, 30, tzinfo=IST)
+    business = TradingCalendar(basis=BUSINESS)
+    # One full session left on expiry day
+    assert business.year_fraction(EXPIRY, now=monday) == pytest.approx(1 / 252)
+    assert TradingCalendar().year_fraction(EXPIRY, now=monday) == pytest.approx(1 / 365)
+    with pytest.raises(ValueError):
+        TradingCalendar(basis="trading")
+
+
+@pytest.mark.parametrize("analyzer_class", [OptionsAnalyzer, IncrementalOptionsAnalyzer])
+def test_analyzer_skips_an_expired_chain(analyzer_class):
+    chain = SyntheticChainGenerator(seed=3, as_of=datetime(2026, 10, 27, 11, 0, tzinfo=IST)).generate_chain("NIFTY")
+    analyzer = analyzer_class()
+    analyzer._calculate_time_to_expiry = lambda expiry: 0.0
+    analysis = analyzer.analyze_option_chain(chain)
+    assert 'error' not in analysis
+    assert analysis['strategies'] == [] and analysis['high_probability_strategies'] == []
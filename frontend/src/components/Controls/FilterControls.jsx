@@ -1,6 +1,14 @@
 import React from 'react';
 import ExpiryCalendar from './ExpiryCalendar';
 
+// Sort keys GET /strategies accepts, highest first
+const SORT_OPTIONS = [
+  ['probability_of_profit', 'Probability of Profit'],
+  ['profit_percentage', 'Return on Margin'],
+  ['net_premium', 'Net Premium'],
+  ['strike_distance', 'Strike Distance'],
+];
+
 const FilterControls = ({ filters, onChange, expiries = [] }) => {
   return (
     <div className="mb-6">
@@ -27,16 +35,17 @@ const FilterControls = ({ filters, onChange, expiries = [] }) => {
         
         <div className="grid grid-2 gap-6">
           <div className="flex flex-col">
-            <label className="text-sm font-semibold text-gray-700 mb-2">Risk %</label>
+            <label className="text-sm font-semibold text-gray-700 mb-2">Min Return on Margin</label>
             <div className="relative">
               <input
                 type="number"
                 min={0}
                 max={100}
+                step={0.1}
                 className="input w-full"
-                value={filters.risk}
-                onChange={e => onChange({ ...filters, risk: e.target.value })}
-                placeholder="0"
+                value={filters.minProfit}
+                onChange={e => onChange({ ...filters, minProfit: e.target.value })}
+                placeholder="0.5"
               />
               <span className="absolute right-3 top-1/2 transform -translate-y-1/2 text-gray-400">%</span>
             </div>
@@ -57,13 +66,26 @@ const FilterControls = ({ filters, onChange, expiries = [] }) => {
               <span className="absolute right-3 top-1/2 transform -translate-y-1/2 text-gray-400">%</span>
             </div>
           </div>
+
+          <div className="flex flex-col">
+            <label className="text-sm font-semibold text-gray-700 mb-2">Sort By</label>
+            <select
+              className="input w-full"
+              value={filters.sort}
+              onChange={e => onChange({ ...filters, sort: e.target.value })}
+            >
+              {SORT_OPTIONS.map(([value, label]) => (
+                <option key={value} value={value}>{label}</option>
+              ))}
+            </select>
+          </div>
         </div>
         
         <div className="mt-4 p-3 bg-green-50 rounded-lg">
           <div className="flex items-center gap-2">
             <span className="text-green-600">📊</span>
             <span className="text-sm text-green-700">
-              Showing strategies with probability ≥ {filters.prob || 85}% and risk/reward ≥ {filters.risk || 0}
+              Showing strategies with probability ≥ {filters.prob || 0}% and return on margin ≥ {filters.minProfit || 0}%
             </span>
           </div>
         </div>
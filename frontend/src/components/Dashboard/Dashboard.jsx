@@ -11,38 +11,30 @@ import useMarketData from '../../hooks/useMarketData';
 import useWebSocket from '../../hooks/useWebSocket';
 import '../../styles/components.css';
 
-const defaultFilters = { expiry: '', risk: 0, prob: 85 };
+const defaultFilters = { expiry: '', minProfit: 0.5, prob: 85, sort: 'probability_of_profit' };
+const PAGE_SIZE = 50;
 
 const Dashboard = () => {
   const [symbol, setSymbol] = useState('SBICARD');
   const [filters, setFilters] = useState(defaultFilters);
-  const { optionChain, strategies, loading } = useOptionsData(symbol, filters.expiry);
-  const { marketData } = useMarketData(symbol);
   const wsData = useWebSocket();
+  // The server filters, sorts and pages strategies; refetch the first page whenever a new snapshot lands
+  const { optionChain, strategies, total, hasMore, loadMore, loading } = useOptionsData(
+    symbol,
+    filters.expiry,
+    { min_pop: filters.prob, min_profit: filters.minProfit, sort: filters.sort, limit: PAGE_SIZE },
+    wsData.snapshot_created_at
+  );
+  const { marketData } = useMarketData(symbol);
 
   // Always use REST API data when expiry is selected, otherwise use WebSocket data
-  const liveOptionChain = wsData.option_chain || optionChain;
-  const liveStrategies = filters.expiry ? (strategies || []) : 
-                        (wsData.strategies && wsData.strategies.length ? wsData.strategies : (strategies || []));
+  const liveOptionChain = filters.expiry ? optionChain : (wsData.option_chain || optionChain);
   const liveMarketData = wsData.market_data || marketData;
 
   // Expiry options for filter
   const expiries = liveOptionChain?.expiry_dates || [];
 
-  // Filter strategies by expiry, probability
-  const filteredStrategies = Array.isArray(liveStrategies) ? liveStrategies.filter(s => {
-    if (!s) return false;
-    const prob = (s.probability_of_profit || 0);
-    const expiryMatch = !filters.expiry || s.expiry_date === filters.expiry;
-    const probMatch = !filters.prob || prob >= filters.prob;
-    return expiryMatch && probMatch;
-  }) : [];
-
-  // Debug logging
-  console.log(`Dashboard - Selected expiry: ${filters.expiry}, Strategies count: ${filteredStrategies.length}`);
-  if (filteredStrategies.length > 0) {
-    console.log(`First strategy expiry: ${filteredStrategies[0].expiry_date}`);
-  }
+  console.log(`Dashboard - Selected expiry: ${filters.expiry}, Strategies: ${strategies.length} of ${total}`);
 
   return (
     <div className="container">
@@ -55,7 +47,7 @@ const Dashboard = () => {
           <div>
             <h3 className="font-semibold text-green-800">Risk Management Active</h3>
             <p className="text-sm text-green-700">
-              All strategies have attractive profit margins (&gt;3%) with high-probability (&gt;85%) success rates. 
+              All strategies have a return on margin of at least 0.5% (&ge;0.5%) with high-probability (&ge;85%) success rates. 
               Only the best risk-adjusted opportunities are shown.
             </p>
           </div>
@@ -66,9 +58,16 @@ const Dashboard = () => {
       <FilterControls filters={filters} onChange={setFilters} expiries={expiries} />
       <RefreshButton onClick={() => window.location.reload()} loading={loading} />
       <MetricsCards data={liveMarketData} />
-      <ChartsSection optionChain={liveOptionChain} strategies={filteredStrategies} />
-      <OptionPairsTable strategies={filteredStrategies} symbol={symbol} />
-      <AIInsights strategies={filteredStrategies} marketData={liveMarketData} />
+      <ChartsSection optionChain={liveOptionChain} strategies={strategies} />
+      <OptionPairsTable strategies={strategies} total={total} symbol={symbol} />
+      {hasMore && (
+        <div className="flex justify-center mb-6">
+          <button className="btn" onClick={loadMore}>
+            Load more ({strategies.length} of {total})
+          </button>
+        </div>
+      )}
+      <AIInsights strategies={strategies} marketData={liveMarketData} />
     </div>
   );
 };
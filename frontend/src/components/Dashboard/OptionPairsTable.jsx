@@ -1,7 +1,7 @@
 import React from 'react';
 import '../../styles/components.css';
 
-const OptionPairsTable = ({ strategies, symbol = 'NIFTY' }) => {
+const OptionPairsTable = ({ strategies, total, symbol = 'NIFTY' }) => {
   if (!strategies) return (
     <div className="card text-center">
       <div className="loading text-2xl mb-4">⏳</div>
@@ -35,7 +35,7 @@ const OptionPairsTable = ({ strategies, symbol = 'NIFTY' }) => {
         </div>
         <div className="text-right">
           <div className="text-sm text-gray-500">Total Strategies</div>
-          <div className="text-2xl font-bold text-primary">{strategies.length}</div>
+          <div className="text-2xl font-bold text-primary">{total ?? strategies.length}</div>
         </div>
       </div>
       
@@ -127,7 +127,7 @@ const OptionPairsTable = ({ strategies, symbol = 'NIFTY' }) => {
                         {s.profit_percentage?.toFixed(1)}%
                       </div>
                       <div className="text-xs text-gray-500">Max Profit</div>
-                      {s.profit_percentage > 3.0 && (
+                      {s.profit_percentage >= 2.0 && (
                         <div className="text-xs text-green-600 font-medium">✓ High Return</div>
                       )}
                     </div>
@@ -162,16 +162,16 @@ const OptionPairsTable = ({ strategies, symbol = 'NIFTY' }) => {
         </div>
         <p className="text-sm text-gray-600 mb-3">
           These strangle strategies offer high probability of profit with attractive returns. 
-          All strategies have profit greater than 1% with probability above 85%.
+          All strategies return at least 0.5% on margin with probability of at least 85%.
         </p>
         <div className="grid grid-cols-2 gap-4 text-sm">
           <div className="flex items-center gap-2">
             <span className="text-green-600">✓</span>
-            <span>Min Profit: &gt; 1%</span>
+            <span>Min Profit: &ge; 0.5%</span>
           </div>
           <div className="flex items-center gap-2">
             <span className="text-green-600">✓</span>
-            <span>Probability: &gt; 85%</span>
+            <span>Probability: &ge; 85%</span>
           </div>
           <div className="flex items-center gap-2">
             <span className="text-blue-600">ℹ</span>
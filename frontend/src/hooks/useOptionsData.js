@@ -1,24 +1,51 @@
-import { useState, useEffect } from 'react';
-import { fetchOptionChain, fetchStrategies } from '../services/api';
+import { useState, useEffect, useCallback } from 'react';
+import { fetchOptionChain, fetchStrategies, StaleCursorError } from '../services/api';
 
-export default function useOptionsData(symbol = 'NIFTY', expiry = '') {
+// query: filters and sort passed straight to GET /strategies; refreshKey refetches when it changes
+export default function useOptionsData(symbol = 'NIFTY', expiry = '', query = {}, refreshKey = null) {
   const [optionChain, setOptionChain] = useState(null);
   const [strategies, setStrategies] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const queryKey = JSON.stringify(query);
+
+  const loadFirstPage = useCallback(() => {
+    return fetchStrategies(symbol, expiry, JSON.parse(queryKey)).then((page) => {
+      console.log(`Received ${page.strategies.length} of ${page.total} strategies for ${symbol} with expiry ${expiry}`);
+      setStrategies(page.strategies);
+      setTotal(page.total);
+      setNextCursor(page.nextCursor);
+    });
+  }, [symbol, expiry, queryKey]);
 
   useEffect(() => {
     setLoading(true);
     console.log(`Fetching data for symbol: ${symbol}, expiry: ${expiry}`);
     Promise.all([
-      fetchOptionChain(symbol, expiry),
-      fetchStrategies(symbol, expiry)
-    ]).then(([chain, strats]) => {
-      console.log(`Received ${strats.length} strategies for ${symbol} with expiry ${expiry}`);
-      setOptionChain(chain);
-      setStrategies(strats);
-      setLoading(false);
-    });
-  }, [symbol, expiry]);
+      fetchOptionChain(symbol, expiry).then(setOptionChain),
+      loadFirstPage(),
+    ]).finally(() => setLoading(false));
+  }, [symbol, expiry, loadFirstPage]);
+
+  // A new snapshot: the first page may have changed, and old cursors no longer apply
+  useEffect(() => {
+    if (refreshKey) loadFirstPage();
+  }, [refreshKey, loadFirstPage]);
+
+  const loadMore = useCallback(() => {
+    if (!nextCursor) return Promise.resolve();
+    return fetchStrategies(symbol, expiry, { ...JSON.parse(queryKey), cursor: nextCursor })
+      .then((page) => {
+        setStrategies((loaded) => [...loaded, ...page.strategies]);
+        setTotal(page.total);
+        setNextCursor(page.nextCursor);
+      })
+      .catch((err) => {
+        if (err instanceof StaleCursorError) return loadFirstPage();
+        throw err;
+      });
+  }, [symbol, expiry, queryKey, nextCursor, loadFirstPage]);
 
-  return { optionChain, strategies, loading };
-} 
\ No newline at end of file
+  return { optionChain, strategies, total, hasMore: Boolean(nextCursor), loadMore, loading };
+}
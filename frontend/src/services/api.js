@@ -8,12 +8,26 @@ export async function fetchOptionChain(symbol = 'SBICARD', expiry = '') {
   return res.json();
 }
 
-export async function fetchStrategies(symbol = 'SBICARD', expiry = '') {
-  const url = expiry ? 
-    `${API_BASE}/api/v1/strategies?symbol=${symbol}&expiry=${expiry}` :
-    `${API_BASE}/api/v1/strategies?symbol=${symbol}`;
-  const res = await fetch(url);
-  return res.json();
+export class StaleCursorError extends Error {}
+
+export async function fetchStrategies(symbol = 'SBICARD', expiry = '', query = {}) {
+  // query: min_pop, max_pop, min_profit, max_profit, min_strike_distance, max_strike_distance,
+  // min_dte, max_dte, sort, order, limit, page, cursor. The server filters, sorts and pages;
+  // resolves to { strategies, total, nextCursor }
+  const params = new URLSearchParams({ symbol });
+  if (expiry) params.set('expiry', expiry);
+  Object.entries(query).forEach(([name, value]) => {
+    if (value !== undefined && value !== null && value !== '') params.set(name, value);
+  });
+  const res = await fetch(`${API_BASE}/api/v1/strategies?${params}`);
+  // The cursor's snapshot has been replaced; page again from the start
+  if (res.status === 409) throw new StaleCursorError(await res.text());
+  const strategies = await res.json();
+  return {
+    strategies: Array.isArray(strategies) ? strategies : [],
+    total: Number(res.headers.get('X-Total-Count') ?? (Array.isArray(strategies) ? strategies.length : 0)),
+    nextCursor: res.headers.get('X-Next-Cursor'),
+  };
 }
 
 export async function fetchMarketData(symbol = 'SBICARD') {